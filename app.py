@@ -2,317 +2,31 @@ import threading
 import time
 import json
 import os
-from pynput import mouse, keyboard
-from pynput.keyboard import Key, KeyCode, Listener as KeyboardListener, Controller as KeyboardController
-from pynput.mouse import Listener as MouseListener, Controller as MouseController
 import tkinter as tk
-from tkinter import messagebox, simpledialog, filedialog
+from tkinter import messagebox
 from tkinter import ttk
-from tkinter import font
-import webbrowser
-
-# Constants for the unified stop hotkey
-STOP_HOTKEY = {Key.esc}
-
-# Directory to store recordings
-RECORDINGS_DIR = "recordings"
+from log import logger, configure_logging
+from catalog import Catalog, describe_entry
+from capture import CAPTURE_PRESETS, DEFAULT_CAPTURE_PRESET
+from ui_bus import UIBus, UI_FRAME_RATE
+from io_task import IOTask
+from scheduler import TIMING_MODES, DEFAULT_TIMING_MODE, CATCH_UP_POLICIES, DEFAULT_CATCH_UP_POLICY
+from pacing import GAP_PRESETS, DEFAULT_GAP_PRESET
+from event_buffer import EventBuffer
+from recording_format import find_recording, recording_path, recording_name, RECORDING_EXTENSIONS, RECORDINGS_DIR
+from playback_stream import open_playback_stream, STREAM_PLAYBACK_THRESHOLD
+from stream_log import recover_logs
 
 # Path to the configuration file
 CONFIG_FILE = "config.json"
 
-# Ensure the recordings directory exists
-if not os.path.exists(RECORDINGS_DIR):
-    os.makedirs(RECORDINGS_DIR)
-
-
-class Recorder:
-    def __init__(self):
-        self.events = []
-        self.start_time = None
-        self.recording = False
-        self.keyboard_listener = None
-        self.mouse_listener = None
-
-    def start(self):
-        self.events = []
-        self.start_time = time.time()
-        self.recording = True
-
-        self.keyboard_listener = KeyboardListener(on_press=self.on_press, on_release=self.on_release)
-        self.mouse_listener = MouseListener(on_move=self.on_move, on_click=self.on_click, on_scroll=self.on_scroll)
-
-        self.keyboard_listener.start()
-        self.mouse_listener.start()
-
-        print("Recording started...")
-
-    def stop(self):
-        self.recording = False
-        if self.keyboard_listener is not None:
-            self.keyboard_listener.stop()
-        if self.mouse_listener is not None:
-            self.mouse_listener.stop()
-        print("Recording stopped.")
-
-    def on_press(self, key):
-        if not self.recording:
-            return
-        if key in STOP_HOTKEY:
-            # Don't record the stop hotkey
-            return
-        event = {
-            'type': 'keyboard',
-            'action': 'press',
-            'key': self.get_key_name(key),
-            'time': time.time() - self.start_time
-        }
-        self.events.append(event)
-        print(f"Recorded Keyboard Press: {event}")
-
-    def on_release(self, key):
-        if not self.recording:
-            return
-        if key in STOP_HOTKEY:
-            # Don't record the stop hotkey
-            return
-        event = {
-            'type': 'keyboard',
-            'action': 'release',
-            'key': self.get_key_name(key),
-            'time': time.time() - self.start_time
-        }
-        self.events.append(event)
-        print(f"Recorded Keyboard Release: {event}")
-
-    def on_move(self, x, y):
-        if not self.recording:
-            return
-        event = {
-            'type': 'mouse',
-            'action': 'move',
-            'position': (x, y),
-            'time': time.time() - self.start_time
-        }
-        self.events.append(event)
-        print(f"Recorded Mouse Move: {event}")
-
-    def on_click(self, x, y, button, pressed):
-        if not self.recording:
-            return
-        event = {
-            'type': 'mouse',
-            'action': 'click',
-            'position': (x, y),
-            'button': button.name,
-            'pressed': pressed,
-            'time': time.time() - self.start_time
-        }
-        self.events.append(event)
-        action = "Pressed" if pressed else "Released"
-        print(f"Recorded Mouse {action} Click: {event}")
-
-    def on_scroll(self, x, y, dx, dy):
-        if not self.recording:
-            return
-        event = {
-            'type': 'mouse',
-            'action': 'scroll',
-            'position': (x, y),
-            'scroll': (dx, dy),
-            'time': time.time() - self.start_time
-        }
-        self.events.append(event)
-        print(f"Recorded Mouse Scroll: {event}")
-
-    def get_key_name(self, key):
-        try:
-            return key.char
-        except AttributeError:
-            return str(key)
-
-    def save_events(self, name):
-        # Sanitize the recording name
-        safe_name = "".join([c for c in name if c.isalpha() or c.isdigit() or c in (' ', '_', '-')]).rstrip()
-        if not safe_name:
-            safe_name = f"recording_{int(time.time())}"
-        filename = os.path.join(RECORDINGS_DIR, f"recording_{safe_name}.json")
-        try:
-            with open(filename, 'w') as f:
-                json.dump(self.events, f, indent=4)
-            print(f"Events saved to {filename}")
-            return filename
-        except Exception as e:
-            print(f"Error saving events: {e}")
-            messagebox.showerror("Error", f"Failed to save events: {e}")
-            return None
-
-    def load_events(self, filename):
-        try:
-            with open(filename, 'r') as f:
-                self.events = json.load(f)
-            print(f"Events loaded from {filename}")
-            return True
-        except FileNotFoundError:
-            print(f"No recorded events found. Please record actions first.")
-            messagebox.showerror("Error", f"No recorded events found. Please record actions first.")
-            return False
-        except json.JSONDecodeError:
-            print(f"Recorded events file is corrupted.")
-            messagebox.showerror("Error", f"Recorded events file is corrupted.")
-            return False
-        except Exception as e:
-            print(f"Error loading events: {e}")
-            messagebox.showerror("Error", f"Failed to load events: {e}")
-            return False
-
-
-class Player:
-    def __init__(self, events, loop=False, speed=1.0, progress_callback=None):
-        self.events = events
-        self.playing = False
-        self.loop = loop
-        self.speed = speed
-        self.keyboard_controller = KeyboardController()
-        self.mouse_controller = MouseController()
-        self.play_thread = None
-        self.progress_callback = progress_callback  # Callback to update progress bar
-
-    def start(self):
-        if not self.events:
-            print("No events to play.")
-            messagebox.showwarning("Warning", "No recorded events to play.")
-            return
-        self.playing = True
-        self.play_thread = threading.Thread(target=self.play_loop, daemon=True)
-        self.play_thread.start()
-        print("Playback started...")
-        if self.progress_callback:
-            self.progress_callback(0)  # Initialize progress
-
-    def stop(self):
-        self.playing = False
-        print("Playback stopped.")
-
-    def play_loop(self):
-        while self.playing:
-            try:
-                previous_time = 0
-                total_time = self.events[-1]['time'] if self.events else 0
-                print("Starting playback iteration...")
-                
-                # Calculate start time for this iteration
-                start_time = time.perf_counter()
-                
-                for event in self.events:
-                    if not self.playing:
-                        print("Playback interrupted by user.")
-                        break
-                        
-                    # Calculate when this event should occur relative to start time
-                    target_time = start_time + (event['time'] / self.speed)
-                    current_time = time.perf_counter()
-                    
-                    # If we're ahead of schedule, wait until the right moment
-                    if current_time < target_time:
-                        sleep_time = target_time - current_time
-                        if sleep_time > 0:
-                            # Use shorter sleep intervals for more precise timing
-                            while time.perf_counter() < target_time and self.playing:
-                                remaining = target_time - time.perf_counter()
-                                if remaining > 0.01:
-                                    time.sleep(0.001)  # Small sleep interval for better precision
-                    
-                    # Execute the event
-                    if self.playing:  # Check again in case we were stopped during sleep
-                        self.execute_event(event)
-                        previous_time = event['time']
-                        # Update progress
-                        if self.progress_callback and total_time > 0:
-                            progress = (previous_time / total_time) * 100
-                            self.progress_callback(progress)
-                
-                if self.loop and self.playing:
-                    print("Completed one loop. Restarting playback...")
-                else:
-                    print("Completed playback without looping.")
-                    self.playing = False  # Stop after one iteration if not looping
-                    if self.progress_callback:
-                        self.progress_callback(100)  # Ensure progress is complete
-            except Exception as e:
-                print(f"Error during playback: {e}")
-                self.playing = False
-                messagebox.showerror("Error", f"An error occurred during playback: {e}")
-
-    def execute_event(self, event):
-        try:
-            if event['type'] == 'keyboard':
-                key = self.parse_key(event['key'])
-                if event['action'] == 'press':
-                    self.keyboard_controller.press(key)
-                    print(f"Executed Keyboard Press: {key}")
-                elif event['action'] == 'release':
-                    self.keyboard_controller.release(key)
-                    print(f"Executed Keyboard Release: {key}")
-            elif event['type'] == 'mouse':
-                if event['action'] == 'move':
-                    x, y = event['position']
-                    self.mouse_controller.position = (x, y)
-                    print(f"Executed Mouse Move to: ({x}, {y})")
-                elif event['action'] == 'click':
-                    x, y = event['position']
-                    button = self.get_button(event['button'])
-                    self.mouse_controller.position = (x, y)
-                    if event['pressed']:
-                        self.mouse_controller.press(button)
-                        print(f"Executed Mouse Press: {button} at ({x}, {y})")
-                    else:
-                        self.mouse_controller.release(button)
-                        print(f"Executed Mouse Release: {button} at ({x}, {y})")
-                elif event['action'] == 'scroll':
-                    dx, dy = event['scroll']
-                    self.mouse_controller.scroll(dx, dy)
-                    print(f"Executed Mouse Scroll: ({dx}, {dy})")
-        except Exception as e:
-            print(f"Error executing event {event}: {e}")
-            raise e  # Re-raise exception to be caught in play_loop
-
-    def parse_key(self, key_str):
-        try:
-            if len(key_str) == 1:
-                return key_str
-            else:
-                # Remove 'Key.' prefix and get the attribute from Key
-                key_attr = key_str.replace('Key.', '')
-                return getattr(Key, key_attr)
-        except AttributeError:
-            print(f"Unknown key: {key_str}")
-            return key_str
-
-    def get_button(self, button_str):
-        try:
-            return getattr(mouse.Button, button_str)
-        except AttributeError:
-            print(f"Unknown mouse button: {button_str}")
-            return mouse.Button.left  # Default to left button
-
-
-class HotkeyListener:
-    def __init__(self, callback, keys):
-        self.callback = callback
-        self.keys = keys
-        self.current_keys = set()
-        self.listener = KeyboardListener(on_press=self.on_press, on_release=self.on_release)
-        self.listener.start()
-
-    def on_press(self, key):
-        self.current_keys.add(key)
-        if self.keys.issubset(self.current_keys):
-            print("Hotkey pressed.")
-            self.callback()
+# pynput (through engine), webbrowser, simpledialog and tkinter.font are
+# imported where they are first used, and the compact widgets are only built
+# the first time compact mode is shown, so the window paints as early as
+# possible. See benchmarks/bench_gui_startup.py.
 
-    def on_release(self, key):
-        if key in self.current_keys:
-            self.current_keys.remove(key)
+# Finish startup after this long even if the window never reports a paint
+STARTUP_FALLBACK_MS = 1000
 
 
 class Application(tk.Tk):
@@ -323,39 +37,80 @@ class Application(tk.Tk):
         self.configure(bg="#f0f0f0")  # Light gray background for a modern look
 
         # Center the main window
-        self.center_window(700, 700)
-
-        self.recorder = Recorder()
+        self.center_window(700, 850)
+
+        # Worker threads report to the UI only through the bus, drained once per frame
+        self.bus = UIBus()
+        self.bus.subscribe_progress(self.update_progress)
+        self.bus.subscribe("error", messagebox.showerror)
+        self.bus.subscribe("warning", messagebox.showwarning)
+        self.bus.subscribe("playback_finished", self.on_playback_finished)
+        self.bus.subscribe("stop_hotkey", self.stop_current_action)
+        self.bus.subscribe("start_hotkey", self.start_recording_if_idle)
+        self.bus.subscribe("io_done", self.on_io_done)
+        self.bus.subscribe("catalog_refreshed", self.on_catalog_refreshed)
+        self.bus.subscribe("gap_measured", self.on_gap_measured)
+        self.after(1000 // UI_FRAME_RATE, self.drain_bus)
+
+        self.recorder = None  # Created with the input hooks once the window has painted
         self.player = None
+        self.player_recording = None  # Identity of the saved recording the player was started on, for resuming
+        self.gap_source = None  # RetimedSource the Idle Pauses projection is being shown for
+        self.gap_duration = None  # Its retimed duration, once measured
+        self.loaded_recording = None  # Saved recording recorder.events holds, if any
+        self.io_task = None  # Save or load running in the background
         self.stop_listener = None
         self.start_listener = None  # Listener for 'R' key
         self.compact_mode = False
 
-        # Create frames that will be used in both modes
-        self.regular_frame = tk.Frame(self, bg="#f0f0f0")
-        self.regular_frame.pack(fill="both", expand=True)  # Pack the regular frame initially
-        
-        self.compact_frame = tk.Frame(self, bg="#f0f0f0")
-        
-        # Create compact mode widgets
-        self.create_compact_widgets()
-        
-        # Initially hide compact frame
-        self.compact_frame.pack_forget()
+        # Index of saved recordings; the dropdown queries it instead of rescanning files
+        os.makedirs(RECORDINGS_DIR, exist_ok=True)
+        self.catalog = Catalog(RECORDINGS_DIR)
+        self.catalog_refreshing = False  # Indexing new or changed files in the background
 
         self.create_widgets()
         # Bind 'R' key within the app's focus (optional redundancy)
         self.bind_all("<r>", self.handle_r_key)
 
+        # Handle window closing to stop listeners
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
+
+        # Everything else waits until the window has painted
+        self.bind("<Expose>", self.on_first_expose)
+        self.after(STARTUP_FALLBACK_MS, self.finish_startup)
+
+    def on_first_expose(self, event):
+        self.unbind("<Expose>")
+        self.after_idle(self.finish_startup)
+
+    def finish_startup(self):
+        if self.recorder is not None:
+            return  # Already done
+        from engine import Recorder
+        from metrics import metrics_from_environment
+        from tracer import tracer_from_environment
+        # Only collected when AUTOWIZ_METRICS or AUTOWIZ_TRACE names a file to write to
+        self.metrics, self.metrics_writer = metrics_from_environment()
+        self.tracer = tracer_from_environment()
+        self.recorder = Recorder(bus=self.bus, metrics=self.metrics, tracer=self.tracer)
+
         # Initialize HotkeyListeners
         self.init_hotkey_listeners()
 
+        # Pick up recordings added or changed while AutoWiz was closed. Indexing
+        # parses every new file, so it runs off the Tk thread; the dropdown
+        # shows the index as it was until it is done
+        self.catalog_refreshing = True
+        self.recording_info_label.config(text="Indexing recordings...")
+        threading.Thread(target=self.refresh_catalog, name="autowiz-catalog", daemon=True).start()
+        self.update_projected_duration()
+
         # Check configuration and show disclaimer if needed
         if not self.has_agreed_disclaimer():
             self.show_disclaimer()
 
-        # Handle window closing to stop listeners
-        self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        # Finalize streamed recordings left behind by a crash
+        self.recover_interrupted_recordings()
 
     def center_window(self, width, height):
         """Centers the window on the screen."""
@@ -383,22 +138,18 @@ class Application(tk.Tk):
         self.regular_frame = tk.Frame(self, bg="#f0f0f0")
         self.regular_frame.pack(fill="both", expand=True)
         
-        # Create compact mode frame
-        self.compact_frame = tk.Frame(self, bg="#f0f0f0")
-        
+        # The compact frame is built the first time compact mode is shown
+        self.compact_frame = None
+
         # Create regular mode widgets
         self.create_regular_widgets()
-        
-        # Create compact mode widgets
-        self.create_compact_widgets()
-        
-        # Initially hide compact frame
-        self.compact_frame.pack_forget()
-        
+
         # Initialize status
         self.update_status("Idle", "blue")
 
     def create_compact_widgets(self):
+        self.compact_frame = tk.Frame(self, bg="#f0f0f0")
+
         # Status frame (top)
         self.compact_status_frame = tk.Frame(self.compact_frame, bg="#f0f0f0")
         self.compact_status_frame.pack(fill="x", pady=(5, 5))
@@ -436,7 +187,10 @@ class Application(tk.Tk):
                                            bg="#95a5a6", fg="white", 
                                            font=("Helvetica", 10, "bold"))
         self.compact_stop_button.pack(side="left", padx=2)
-        self.compact_stop_button.config(state='disabled')
+        # Built on first use, possibly mid-recording, so copy the regular buttons' state
+        self.compact_record_button.config(state=self.record_button.cget("state"))
+        self.compact_play_button.config(state=self.play_button.cget("state"))
+        self.compact_stop_button.config(state=self.stop_button.cget("state"))
         
         # Regular mode button (bottom)
         self.compact_mode_button = tk.Button(self.compact_frame, text="Regular Mode", 
@@ -488,6 +242,29 @@ class Application(tk.Tk):
         )
         self.loop_checkbox.pack(pady=5)
 
+        # Stream to Disk Checkbox
+        self.stream_var = tk.BooleanVar()
+        self.stream_var.set(False)
+        self.stream_checkbox = tk.Checkbutton(
+            record_frame,
+            text="Stream Recording to Disk (crash-safe)",
+            variable=self.stream_var,
+            bg="#f0f0f0",
+            font=("Helvetica", 10)
+        )
+        self.stream_checkbox.pack(pady=5)
+
+        # Mouse Move Capture Policy
+        capture_frame = tk.Frame(record_frame, bg="#f0f0f0")
+        capture_frame.pack(pady=5, fill="x")
+        capture_label = tk.Label(capture_frame, text="Mouse Move Capture:", bg="#f0f0f0", font=("Helvetica", 10))
+        capture_label.pack(side="left", padx=(0,10))
+        self.capture_var = tk.StringVar()
+        self.capture_var.set(DEFAULT_CAPTURE_PRESET)
+        self.capture_dropdown = ttk.Combobox(capture_frame, textvariable=self.capture_var, values=list(CAPTURE_PRESETS),
+                                             state='readonly', width=12)
+        self.capture_dropdown.pack(side="left")
+
         # Playback Speed Control
         speed_frame = tk.Frame(record_frame, bg="#f0f0f0")
         speed_frame.pack(pady=5, fill="x")
@@ -496,15 +273,68 @@ class Application(tk.Tk):
         self.speed_var = tk.DoubleVar()
         self.speed_var.set(1.0)  # Default speed
         self.speed_slider = tk.Scale(speed_frame, from_=0.5, to=2.0, resolution=0.1, orient='horizontal',
-                                     variable=self.speed_var, bg="#f0f0f0", length=200)
+                                     variable=self.speed_var, bg="#f0f0f0", length=200,
+                                     command=self.on_speed_change)
         self.speed_slider.pack(side="left")
 
+        # Timing Mode Selection
+        timing_frame = tk.Frame(record_frame, bg="#f0f0f0")
+        timing_frame.pack(pady=5, fill="x")
+        timing_label = tk.Label(timing_frame, text="Timing Mode:", bg="#f0f0f0", font=("Helvetica", 10))
+        timing_label.pack(side="left", padx=(0,10))
+        self.timing_var = tk.StringVar()
+        self.timing_var.set(DEFAULT_TIMING_MODE)
+        self.timing_dropdown = ttk.Combobox(timing_frame, textvariable=self.timing_var, values=list(TIMING_MODES),
+                                            state='readonly', width=12)
+        self.timing_dropdown.pack(side="left")
+
+        # What to do when playback falls behind schedule
+        catch_up_frame = tk.Frame(record_frame, bg="#f0f0f0")
+        catch_up_frame.pack(pady=5, fill="x")
+        catch_up_label = tk.Label(catch_up_frame, text="When Behind:", bg="#f0f0f0", font=("Helvetica", 10))
+        catch_up_label.pack(side="left", padx=(0,10))
+        self.catch_up_var = tk.StringVar()
+        self.catch_up_var.set(DEFAULT_CATCH_UP_POLICY)
+        self.catch_up_dropdown = ttk.Combobox(catch_up_frame, textvariable=self.catch_up_var,
+                                              values=list(CATCH_UP_POLICIES), state='readonly', width=12)
+        self.catch_up_dropdown.pack(side="left")
+
+        # Idle Gap Compression
+        gap_frame = tk.Frame(record_frame, bg="#f0f0f0")
+        gap_frame.pack(pady=5, fill="x")
+        gap_label = tk.Label(gap_frame, text="Idle Pauses:", bg="#f0f0f0", font=("Helvetica", 10))
+        gap_label.pack(side="left", padx=(0,10))
+        self.gap_var = tk.StringVar()
+        self.gap_var.set(DEFAULT_GAP_PRESET)
+        self.gap_dropdown = ttk.Combobox(gap_frame, textvariable=self.gap_var, values=list(GAP_PRESETS),
+                                         state='readonly', width=20)
+        self.gap_dropdown.pack(side="left")
+        self.gap_dropdown.bind("<<ComboboxSelected>>", lambda event: self.update_projected_duration())
+        # Projected length of one loop with the pauses shortened, for the recording Play would use
+        self.gap_info_label = tk.Label(gap_frame, text="", bg="#f0f0f0", fg="#7f8c8d", font=("Helvetica", 9))
+        self.gap_info_label.pack(side="left", padx=(10,0))
+
         # Frame for Recording Management
         manage_frame = tk.LabelFrame(self.regular_frame, text="Manage Recordings", padx=10, pady=10, bg="#f0f0f0")
         manage_frame.pack(padx=20, pady=10, fill="x")
 
-        # Dropdown to select recordings
-        recordings = self.get_all_recordings()
+        # Search box filtering the recordings dropdown
+        search_frame = tk.Frame(manage_frame, bg="#f0f0f0")
+        search_frame.pack(pady=5)
+        search_label = tk.Label(search_frame, text="Search:", bg="#f0f0f0", font=("Helvetica", 10))
+        search_label.pack(side="left", padx=(0,10))
+        self.search_var = tk.StringVar()
+        self.search_entry = tk.Entry(search_frame, textvariable=self.search_var, width=25)
+        self.search_entry.pack(side="left")
+        self.search_var.trace_add("write", lambda *args: self.refresh_recordings())
+        # The global 'R' hotkey must not fire while typing a search
+        self.search_has_focus = False
+        self.search_entry.bind("<FocusIn>", lambda event: setattr(self, "search_has_focus", True))
+        self.search_entry.bind("<FocusOut>", lambda event: setattr(self, "search_has_focus", False))
+
+        # Dropdown to select recordings, filled from the index as it was last
+        # time; finish_startup brings it up to date once the window has painted
+        recordings = self.get_all_recordings(refresh=False)
         self.selected_recording = tk.StringVar()
         if recordings and recordings[0] != "No Recordings":
             self.selected_recording.set(recordings[0])
@@ -514,6 +344,11 @@ class Application(tk.Tk):
         self.recording_dropdown.pack(pady=5)
         self.recording_dropdown.bind("<<ComboboxSelected>>", self.on_recording_selected)
 
+        # Duration and event counts of the selected recording, from the catalog
+        self.recording_info_label = tk.Label(manage_frame, text="", bg="#f0f0f0", fg="#555555", font=("Helvetica", 9))
+        self.recording_info_label.pack()
+        self.update_recording_info()
+
         # Save Recording Button
         self.save_button = tk.Button(manage_frame, text="Save Recording", command=self.save_recording, width=20, bg="#3498db", fg="white", font=("Helvetica", 10, "bold"))
         self.save_button.pack(pady=5)
@@ -552,7 +387,7 @@ class Application(tk.Tk):
         self.help_button.pack(side="right", padx=5)
 
         # GitHub Button
-        self.github_button = tk.Button(additional_frame, text="GitHub", command=lambda: webbrowser.open('https://github.com/techcow2/autowiz'), width=10, bg="#333333", fg="white", font=("Helvetica", 10, "bold"))
+        self.github_button = tk.Button(additional_frame, text="GitHub", command=self.open_github, width=10, bg="#333333", fg="white", font=("Helvetica", 10, "bold"))
         self.github_button.pack(side="right", padx=5)
 
         # Exit Button
@@ -591,15 +426,35 @@ class Application(tk.Tk):
         self.instructions_label = tk.Label(self.regular_frame, text=instructions, justify="left", padx=20, pady=10, bg="#f0f0f0", font=("Helvetica", 10))
         self.instructions_label.pack(pady=10)
 
-    def get_all_recordings(self):
+    def refresh_catalog(self):
+        """Runs on a worker thread at startup."""
+        try:
+            updated = self.catalog.refresh()
+        except Exception as e:
+            logger.error("Error indexing recordings: %s", e)
+            updated = 0
+        self.bus.post("catalog_refreshed", updated)
+
+    def on_catalog_refreshed(self, updated):
+        self.catalog_refreshing = False
+        self.refresh_recordings()
+
+    def get_all_recordings(self, refresh=True):
         try:
-            files = os.listdir(RECORDINGS_DIR)
-            recordings = [f.replace("recording_", "").replace(".json", "") for f in files if f.startswith("recording_") and f.endswith(".json")]
+            # Only rescans the directory if files were added, removed or renamed.
+            # Skipped while the startup refresh is indexing in the background
+            if refresh and not self.catalog_refreshing:
+                self.catalog.refresh(full=False)
+            search = self.search_var.get().strip()
+            if search:
+                recordings = [entry.name for entry in self.catalog.search(search)]
+            else:
+                recordings = self.catalog.names()
             if not recordings:
                 return ["No Recordings"]
             return recordings
         except Exception as e:
-            print(f"Error accessing recordings directory: {e}")
+            logger.error("Error accessing recordings directory: %s", e)
             messagebox.showerror("Error", f"Error accessing recordings directory: {e}")
             return ["No Recordings"]
 
@@ -612,49 +467,58 @@ class Application(tk.Tk):
         else:
             self.recording_dropdown['values'] = ["No Recordings"]
             self.selected_recording.set("No Recordings")
+        self.update_recording_info()
+
+    def update_recording_info(self):
+        if self.catalog_refreshing:
+            return  # Keeps showing that indexing is in progress
+        entry = self.catalog.get(self.selected_recording.get())
+        self.recording_info_label.config(text=describe_entry(entry) if entry else "")
+
+    def recover_interrupted_recordings(self):
+        recovered = recover_logs(RECORDINGS_DIR)
+        if recovered:
+            names = [recording_name(os.path.basename(path)) for path in recovered]
+            self.refresh_recordings()
+            messagebox.showinfo("Recovered Recordings",
+                                "Recordings interrupted by a crash were recovered:\n" + "\n".join(names))
 
     def on_recording_selected(self, event):
         selected = self.selected_recording.get()
         if selected == "No Recordings":
             return
-        print(f"Selected Recording: {selected}")
+        logger.info("Selected Recording: %s", selected)
+        self.update_recording_info()
+        self.update_projected_duration()
 
     def save_recording(self):
         if not self.recorder.events:
             messagebox.showwarning("Warning", "No events to save. Please record actions first.")
             return
             
-        # Temporarily stop hotkey listeners
-        if hasattr(self, 'stop_listener') and self.stop_listener and hasattr(self.stop_listener, 'listener'):
-            self.stop_listener.listener.stop()
-        if hasattr(self, 'start_listener') and self.start_listener and hasattr(self.start_listener, 'listener'):
-            self.start_listener.listener.stop()
-            
+        # Pause the hotkeys so typing the name does not trigger them
+        self.stop_listener.stop()
+        self.start_listener.stop()
+
         # Prompt user for a recording name
+        from tkinter import simpledialog
         name = simpledialog.askstring("Save Recording", "Enter a name for the recording:")
         
-        # Restart hotkey listeners
-        if not self.recorder.recording and not (self.player and self.player.playing):
-            # Only restart listeners if we're not recording or playing
-            self.stop_listener = HotkeyListener(self.stop_current_action, STOP_HOTKEY)
-            START_HOTKEY = {KeyCode.from_char('r')}
-            self.start_listener = HotkeyListener(self.start_recording_if_idle, START_HOTKEY)
-            
+        self.stop_listener.start()
+        self.start_listener.start()
+
         if name:
             # Sanitize and check for duplicates
             safe_name = "".join([c for c in name if c.isalpha() or c.isdigit() or c in (' ', '_', '-')]).rstrip()
             if not safe_name:
                 safe_name = f"recording_{int(time.time())}"
-            filename = os.path.join(RECORDINGS_DIR, f"recording_{safe_name}.json")
-            if os.path.exists(filename):
+            if find_recording(RECORDINGS_DIR, safe_name):
                 overwrite = messagebox.askyesno("Overwrite Recording", f"A recording named '{safe_name}' already exists. Do you want to overwrite it?")
                 if not overwrite:
                     return  # Exit without saving
-            # Proceed to save
-            saved_filename = self.recorder.save_events(safe_name)
-            if saved_filename:
-                messagebox.showinfo("Success", f"Recording saved as '{safe_name}'.")
-                self.refresh_recordings()
+            # Proceed to save in the background
+            self.run_io_task("Saving...", self.recorder.save_events, (safe_name,),
+                             lambda task: self.on_save_done(task, safe_name))
         else:
             messagebox.showwarning("Warning", "Recording not saved. No name provided.")
 
@@ -663,10 +527,57 @@ class Application(tk.Tk):
         if selected == "No Recordings":
             messagebox.showwarning("Warning", "No recordings available to load.")
             return
-        filename = os.path.join(RECORDINGS_DIR, f"recording_{selected}.json")
-        success = self.recorder.load_events(filename)
-        if success:
-            messagebox.showinfo("Success", f"Recording '{selected}' loaded successfully.")
+        filename = find_recording(RECORDINGS_DIR, selected) or recording_path(RECORDINGS_DIR, selected)
+        self.run_io_task("Loading...", self.recorder.load_events, (filename,),
+                         lambda task: self.on_load_done(task, selected))
+
+    def recording_identity(self, name):
+        """Return (path, mtime, size) for a saved recording, or None; it changes whenever the file is rewritten."""
+        path = name and find_recording(RECORDINGS_DIR, name)
+        try:
+            stat = os.stat(path) if path else None
+        except OSError:
+            return None
+        return (path, stat.st_mtime_ns, stat.st_size) if stat else None
+
+    def forget_resume_point(self):
+        """Drop the stopped player and its checkpoint once the events it played are replaced."""
+        if self.player and not self.player.playing:
+            self.player = None
+            self.player_recording = None
+
+    def on_save_done(self, task, name):
+        if task.result:
+            self.forget_resume_point()
+            self.loaded_recording = name
+            self.catalog.update(task.result)
+            messagebox.showinfo("Success", f"Recording saved as '{name}'.")
+            self.refresh_recordings()
+
+    def on_load_done(self, task, name):
+        if task.result:
+            self.forget_resume_point()
+            self.loaded_recording = name
+            self.update_projected_duration()
+            messagebox.showinfo("Success", f"Recording '{name}' loaded successfully.")
+
+    def run_io_task(self, status, function, args, on_done):
+        """Run a save or load on a worker thread; on_done(task) runs on the Tk thread afterwards."""
+        self.status_before_task = (self.status_label.cget("text"), self.status_label.cget("fg"))
+        self.update_status(status, "#8e44ad")
+        self.progress['value'] = 0
+        self.io_task = IOTask(function, args, progress_callback=self.bus.post_progress,
+                              done_callback=lambda task: self.bus.post("io_done", task, on_done))
+        self.io_task.start()
+
+    def on_io_done(self, task, on_done):
+        self.io_task = None
+        self.progress['value'] = 0
+        self.update_status(*self.status_before_task)
+        if task.cancelled:
+            logger.info("Background task cancelled.")
+            return
+        on_done(task)
 
     def delete_recording(self):
         selected = self.selected_recording.get()
@@ -675,22 +586,38 @@ class Application(tk.Tk):
             return
         confirm = messagebox.askyesno("Confirm Deletion", f"Are you sure you want to delete the recording '{selected}'?")
         if confirm:
-            filename = os.path.join(RECORDINGS_DIR, f"recording_{selected}.json")
             try:
-                os.remove(filename)
+                if self.recorder.events and getattr(self.recorder.events, "path", None) == find_recording(RECORDINGS_DIR, selected):
+                    # Unmap the recording before deleting it
+                    self.recorder.close_events()
+                    self.recorder.events = EventBuffer()
+                    self.loaded_recording = None
+                for extension in RECORDING_EXTENSIONS:
+                    filename = recording_path(RECORDINGS_DIR, selected, extension)
+                    if os.path.exists(filename):
+                        os.remove(filename)
+                    self.catalog.remove(filename)
                 messagebox.showinfo("Deleted", f"Recording '{selected}' has been deleted.")
                 self.refresh_recordings()
+                self.update_projected_duration()
             except Exception as e:
-                print(f"Error deleting recording: {e}")
+                logger.error("Error deleting recording: %s", e)
                 messagebox.showerror("Error", f"Failed to delete recording '{selected}': {e}")
 
+    def open_github(self):
+        import webbrowser
+        webbrowser.open('https://github.com/techcow2/autowiz')
+
     def toggle_always_on_top(self):
         self.attributes("-topmost", self.always_on_top_var.get())
-        print(f"Always on Top set to {self.always_on_top_var.get()}")
+        logger.info("Always on Top set to %s", self.always_on_top_var.get())
 
     def toggle_compact_mode(self):
         self.compact_mode = not self.compact_mode
         if self.compact_mode:
+            if self.compact_frame is None:
+                self.create_compact_widgets()
+
             # Hide regular frame
             self.regular_frame.pack_forget()
             
@@ -722,7 +649,7 @@ class Application(tk.Tk):
             self.update_status(current_status, current_color)
             
             # Resize window back to original size
-            self.center_window(700, 700)
+            self.center_window(700, 850)
 
     def update_status(self, state, color):
         """Update status in both regular and compact modes."""
@@ -773,6 +700,21 @@ class Application(tk.Tk):
                 self.compact_play_button.config(bg="#27ae60")
                 self.compact_stop_button.config(state='normal')
                 
+        elif state in ("Saving...", "Loading..."):
+            # Only cancelling is possible while a recording is saved or loaded
+            if hasattr(self, 'record_button'):
+                self.record_button.config(state='disabled')
+                self.play_button.config(state='disabled')
+                self.save_button.config(state='disabled')
+                self.load_button.config(state='disabled')
+                self.delete_button.config(state='disabled')
+                self.stop_button.config(state='normal', text="Cancel")
+
+            if hasattr(self, 'compact_record_button'):
+                self.compact_record_button.config(state='disabled')
+                self.compact_play_button.config(state='disabled')
+                self.compact_stop_button.config(state='normal')
+
         elif state == "Ready to Preview":
             # Regular mode buttons
             if hasattr(self, 'record_button'):
@@ -841,7 +783,7 @@ class Application(tk.Tk):
             "- Review Recording: After stopping, playback your recording without saving to ensure it performs as expected.\n"
             "- Save Recording: Click 'Save Recording' to save your recorded actions for future use.\n"
             "- Playback Recording: Select a recording from the dropdown and click 'Play' to execute the actions.\n"
-            "- Playback Speed: Adjust the playback speed using the slider.\n"
+            "- Playback Speed: Adjust the playback speed using the slider, even while playing.\n"
             "- Loop Playback: Enable or disable looping of the playback.\n"
             "- Manage Recordings: Load, delete, and organize your recordings.\n"
             "- Compact Mode: Toggle compact mode to simplify the UI.\n\n"
@@ -870,6 +812,7 @@ class Application(tk.Tk):
 
     def show_disclaimer(self):
         """Show the disclaimer window if not already agreed."""
+        from tkinter import font
         disclaimer_window = tk.Toplevel(self)
         disclaimer_window.title("Disclaimer - AutoWiz")
         disclaimer_window.geometry("700x500")  # Increased size
@@ -954,7 +897,7 @@ class Application(tk.Tk):
                     config = json.load(f)
                 return config.get("agreed_disclaimer", False)
             except Exception as e:
-                print(f"Error reading config file: {e}")
+                logger.error("Error reading config file: %s", e)
                 return False
         return False
 
@@ -964,9 +907,9 @@ class Application(tk.Tk):
         try:
             with open(CONFIG_FILE, 'w') as f:
                 json.dump(config, f)
-            print("Disclaimer agreement saved.")
+            logger.info("Disclaimer agreement saved.")
         except Exception as e:
-            print(f"Error writing to config file: {e}")
+            logger.error("Error writing to config file: %s", e)
             messagebox.showerror("Error", f"Failed to save configuration: {e}")
 
     def handle_r_key(self, event):
@@ -975,20 +918,33 @@ class Application(tk.Tk):
         pass  # No action needed as we use HotkeyListener
 
     def init_hotkey_listeners(self):
+        from engine import HotkeyListener, STOP_HOTKEY
+        # Both hotkeys share the input hub's keyboard hook and stay subscribed
+        # for the whole session; ESC does nothing while idle.
         # Initialize HotkeyListener for stopping (ESC key)
-        self.stop_listener = HotkeyListener(self.stop_current_action, STOP_HOTKEY)
+        self.stop_listener = HotkeyListener(self.on_stop_hotkey, STOP_HOTKEY)
         # Initialize HotkeyListener for starting recording ('r' key)
-        START_HOTKEY = {KeyCode.from_char('r')}
-        self.start_listener = HotkeyListener(self.start_recording_if_idle, START_HOTKEY)
+        START_HOTKEY = {'r'}
+        self.start_listener = HotkeyListener(self.on_start_hotkey, START_HOTKEY)
+
+    def drain_bus(self):
+        self.bus.drain()
+        self.after(1000 // UI_FRAME_RATE, self.drain_bus)
+
+    def on_stop_hotkey(self):
+        # Runs on the input hook thread; the Tk thread acts on it on the next frame
+        self.bus.post("stop_hotkey")
+
+    def on_start_hotkey(self):
+        self.bus.post("start_hotkey")
 
     def start_recording_if_idle(self):
-        if not self.recorder.recording and (not self.player or not self.player.playing):
-            # Schedule the recording to start in the main thread
-            self.after(0, self.start_recording)
-            # Immediately update status to ensure UI responsiveness
-            self.after(0, lambda: self.update_status("Recording", "#e74c3c"))
+        if self.search_has_focus:
+            return
+        if not self.recorder.recording and (not self.player or not self.player.playing) and not self.io_task:
+            self.start_recording()
         else:
-            print("Cannot start recording. App is not idle.")
+            logger.warning("Cannot start recording. App is not idle.")
 
     def start_recording(self):
         if self.recorder.recording:
@@ -999,27 +955,28 @@ class Application(tk.Tk):
             messagebox.showwarning("Warning", "Cannot start recording while playback is active.")
             return
             
+        self.recorder.stream = self.stream_var.get()
+        self.recorder.capture_policy = CAPTURE_PRESETS[self.capture_var.get()]
         self.recorder.start()
+        self.forget_resume_point()
+        self.loaded_recording = None
         # Update status first to ensure both modes are synchronized
         self.update_status("Recording", "#e74c3c")  # Red color
-        print("Recording started from GUI.")
-        
-        # Set up hotkey to stop recording
-        if self.stop_listener:
-            self.stop_listener.listener.stop()
-        self.stop_listener = HotkeyListener(self.stop_current_action, STOP_HOTKEY)
+        logger.info("Recording started from GUI.")
 
     def stop_recording(self):
         if self.recorder.recording:
-            self.recorder.stop()
+            self.recorder.stop(finalize=False)
             # Use update_status to handle all UI updates
             self.update_status("Ready to Preview", "#f39c12")  # Orange color to indicate preview state
-            print("Recording stopped. Ready for preview.")
-            
-        # Stop the hotkey listener
-        if self.stop_listener:
-            self.stop_listener.listener.stop()
-            self.stop_listener = None
+            logger.info("Recording stopped. Ready for preview.")
+            if self.recorder.stream_pending:
+                # Turning a long session log into a recording takes a while; keep the window responsive.
+                # If it is cancelled the log stays on disk and is recovered on the next start.
+                self.run_io_task("Saving...", self.recorder.finalize_stream, (),
+                                 lambda task: self.update_projected_duration())
+            else:
+                self.update_projected_duration()
 
     def start_playback(self):
         if self.recorder.recording:
@@ -1030,22 +987,73 @@ class Application(tk.Tk):
             return
 
         # Check if we're playing a saved recording or previewing
+        source = None
+        selected = self.loaded_recording
         if not self.recorder.events:  # If no events in memory, load from file
             selected = self.selected_recording.get()
             if selected == "No Recordings":
                 messagebox.showwarning("Warning", "No recordings available to play.")
                 return
-            filename = os.path.join(RECORDINGS_DIR, f"recording_{selected}.json")
-            success = self.recorder.load_events(filename)
-            if not success:
+            filename = find_recording(RECORDINGS_DIR, selected) or recording_path(RECORDINGS_DIR, selected)
+            if os.path.exists(filename) and os.path.getsize(filename) > STREAM_PLAYBACK_THRESHOLD:
+                # Large recordings are streamed from disk so the first event fires immediately
+                try:
+                    source = open_playback_stream(filename)
+                except (OSError, ValueError) as e:
+                    logger.error("Error opening recording for playback: %s", e)
+                    messagebox.showerror("Error", f"Failed to open recording: {e}")
+                    return
+            else:
+                # Load in the background and start once it is done
+                self.run_io_task("Loading...", self.recorder.load_events, (filename,),
+                                 lambda task: self.on_play_load_done(task, selected))
                 return
+        self.begin_playback(source, selected)
+
+    def on_play_load_done(self, task, name):
+        if task.result:
+            self.loaded_recording = name
+            self.begin_playback(None, name)
+
+    def begin_playback(self, source=None, recording=None):
+        from engine import Player
+        if source is None:
+            source = self.recorder.get_plan()
+
+        # Offer to continue a saved recording from where its last playback was stopped
+        start_index = 0
+        checkpoint = self.player.checkpoint if self.player else None
+        identity = self.recording_identity(recording)
+        if checkpoint and identity and identity == self.player_recording:
+            if messagebox.askyesno("Resume Playback",
+                                   f"Playback of '{recording}' was stopped {checkpoint.time:.1f}s in. "
+                                   "Resume from there?"):
+                start_index = checkpoint.index
 
         loop = self.loop_var.get()
         speed = self.speed_var.get()
-        self.player = Player(self.recorder.events, loop=loop, speed=speed, progress_callback=self.update_progress)
-        self.player.start()
+        timing_mode = self.timing_var.get()
+        gap_policy = GAP_PRESETS[self.gap_var.get()]
+        try:
+            player = Player(source, loop=loop, speed=speed, progress_callback=self.bus.post_progress,
+                            timing_mode=timing_mode, bus=self.bus, metrics=self.metrics, tracer=self.tracer,
+                            start_index=start_index, gap_policy=gap_policy, catch_up=self.catch_up_var.get())
+        except ValueError as e:
+            # A start index past the end of the recording, for one
+            logger.error("Error starting playback: %s", e)
+            messagebox.showerror("Error", f"Failed to start playback: {e}")
+            self.player = None
+            self.player_recording = None
+            return
+        self.player = player
+        if self.gap_source is None or self.gap_source.policy is not gap_policy:
+            # Normally already shown from when the recording or preset was picked
+            self.update_projected_duration()
+        self.player_recording = identity
+        if not self.player.start():
+            return
         self.update_status("Playing", "#2ecc71")  # Green color
-        print(f"Playback started with loop={'On' if loop else 'Off'}, speed={speed}x.")
+        logger.info("Playback started with loop=%s, speed=%sx, timing=%s.", 'On' if loop else 'Off', speed, timing_mode)
         
         # Update regular mode buttons
         self.play_button.config(bg="#27ae60", text="Play")  # Reset text back to "Play"
@@ -1056,72 +1064,135 @@ class Application(tk.Tk):
         self.stop_button.config(state='normal', text="Stop Playback")
         
         # Update compact mode buttons
-        self.compact_play_button.config(bg="#27ae60", text="Play")  # Reset text back to "Play"
-        self.compact_record_button.config(state='disabled')
-        self.compact_stop_button.config(state='normal')
-        
-        # Set up hotkey to stop playback
-        if self.stop_listener:
-            self.stop_listener.listener.stop()
-        self.stop_listener = HotkeyListener(self.stop_current_action, STOP_HOTKEY)
+        if hasattr(self, 'compact_record_button'):
+            self.compact_play_button.config(bg="#27ae60", text="Play")  # Reset text back to "Play"
+            self.compact_record_button.config(state='disabled')
+            self.compact_stop_button.config(state='normal')
+
+    def update_projected_duration(self):
+        """Work out one loop's length under the Idle Pauses preset for the recording Play would use."""
+        gap_policy = GAP_PRESETS[self.gap_var.get()]
+        if gap_policy.keeps_everything or self.recorder is None:
+            self.show_projected_duration(None)
+            return
+        if self.recorder.events:
+            source = self.recorder.get_plan()
+        else:
+            path = find_recording(RECORDINGS_DIR, self.selected_recording.get())
+            if path is None:
+                self.show_projected_duration(None)
+                return
+            try:
+                source = open_playback_stream(path)
+            except (OSError, ValueError) as e:
+                logger.error("Error opening recording to measure idle pauses: %s", e)
+                self.show_projected_duration(None)
+                return
+        self.show_projected_duration(gap_policy.apply(source))
+
+    def show_projected_duration(self, retimed):
+        """Show retimed's projected duration once known; a streamed recording is re-read in the background."""
+        self.gap_source = retimed
+        self.gap_duration = None
+        if retimed is None:
+            self.gap_info_label.config(text="")
+            return
+        self.gap_info_label.config(text="Measuring...")
+        retimed.measure_duration(lambda duration: self.bus.post("gap_measured", retimed, duration))
+
+    def on_gap_measured(self, retimed, duration):
+        if retimed is not self.gap_source:
+            return  # Another recording or preset has been picked since
+        self.gap_duration = duration
+        self.show_gap_duration()
+        logger.info("Idle pauses shortened: %.1fs per loop instead of %.1fs",
+                    duration, retimed.source.duration or 0)
+
+    def show_gap_duration(self):
+        if self.gap_duration is None:
+            return
+        speed = self.speed_var.get() or 1.0
+        recorded = (self.gap_source.source.duration or 0) / speed
+        self.gap_info_label.config(text=f"{self.gap_duration / speed:.1f}s per loop (was {recorded:.1f}s)")
+
+    def on_speed_change(self, value):
+        self.show_gap_duration()
+        # Running playback follows the slider from the current position
+        if self.player and self.player.playing:
+            self.player.set_speed(float(value))
 
     def stop_playback(self):
         if self.player and self.player.playing:
             self.player.stop()
-            self.update_status("Idle", "blue")
-            print("Playback stopped.")
-            
-            # Update regular mode buttons
-            self.play_button.config(bg="#2ecc71", text="Play")
-            self.record_button.config(state='normal')
-            
-            # If there are unsaved events in memory, enable save button and show message
-            if self.recorder.events:
-                self.save_button.config(state='normal')
-                self.load_button.config(state='disabled')  # Keep load disabled until saved or cleared
-                self.delete_button.config(state='disabled')  # Keep delete disabled until saved or cleared
-                messagebox.showinfo("Preview Complete", "You can now save the recording if desired, or record a new one.")
-            else:
-                self.save_button.config(state='normal')
-                self.load_button.config(state='normal')
-                self.delete_button.config(state='normal')
-            
-            self.stop_button.config(state='disabled', text="Stop")
-            
-            # Update compact mode buttons
+            logger.info("Playback stopped.")
+            self.reset_playback_ui()
+
+    def on_playback_finished(self, player):
+        # Ignore a finished message from a player that was already replaced
+        if player is not self.player:
+            return
+        self.reset_playback_ui()
+
+    def reset_playback_ui(self):
+        self.update_status("Idle", "blue")
+
+        # Update regular mode buttons
+        self.play_button.config(bg="#2ecc71", text="Play")
+        self.record_button.config(state='normal')
+        
+        # If there are unsaved events in memory, enable save button and show message
+        if self.recorder.events:
+            self.save_button.config(state='normal')
+            self.load_button.config(state='disabled')  # Keep load disabled until saved or cleared
+            self.delete_button.config(state='disabled')  # Keep delete disabled until saved or cleared
+            messagebox.showinfo("Preview Complete", "You can now save the recording if desired, or record a new one.")
+        else:
+            self.save_button.config(state='normal')
+            self.load_button.config(state='normal')
+            self.delete_button.config(state='normal')
+        
+        self.stop_button.config(state='disabled', text="Stop")
+        
+        # Update compact mode buttons
+        if hasattr(self, 'compact_record_button'):
             self.compact_play_button.config(bg="#2ecc71", text="Play")
             self.compact_record_button.config(state='normal')
             self.compact_stop_button.config(state='disabled')
-            
-        # Stop the hotkey listener
-        if self.stop_listener:
-            self.stop_listener.listener.stop()
-            self.stop_listener = None
 
     def update_progress(self, value):
         self.progress['value'] = value
 
     def on_closing(self):
+        # Let a running save clean up its temporary file
+        if self.io_task:
+            self.io_task.cancel()
+            self.io_task.thread.join(timeout=5)
         # Stop all listeners before closing
-        if self.recorder.recording:
-            self.recorder.stop()
+        if self.recorder and self.recorder.recording:
+            # A streamed recording's log is recovered on the next start rather than finalized here
+            self.recorder.stop(finalize=False)
         if self.player and self.player.playing:
             self.player.stop()
-        if self.stop_listener:
-            self.stop_listener.listener.stop()
-        if self.start_listener:
-            self.start_listener.listener.stop()
+        if self.recorder is not None:
+            from input_hub import get_input_hub
+            get_input_hub().stop()
+            if self.metrics_writer:
+                self.metrics_writer.stop()
+        self.catalog.close()
         self.destroy()
 
     def stop_current_action(self):
-        """Unified method to stop either recording or playback."""
-        if self.recorder.recording:
+        """Unified method to stop recording or playback, or cancel a save or load."""
+        if self.io_task:
+            self.io_task.cancel()
+        elif self.recorder.recording:
             self.stop_recording()
         elif self.player and self.player.playing:
             self.stop_playback()
 
 
 def main():
+    configure_logging()
     app = Application()
     app.mainloop()
 
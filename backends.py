@@ -0,0 +1,151 @@
+import time
+from log import logger
+from plan import OP_NAMES, OP_KEY_PRESS, OP_KEY_RELEASE, OP_MOVE, OP_BUTTON_PRESS, OP_BUTTON_RELEASE, OP_SCROLL
+
+# Where Player sends the events it plays. A backend has one method per plan
+# opcode, called with the compiled arguments:
+#   press(key), release(key), move(x, y), button_press(x, y, button),
+#   button_release(x, y, button), scroll(dx, dy)
+# Keys and buttons arrive as their recorded names ('a', 'Key.esc', 'left').
+# Only the pynput backend touches the real keyboard and mouse, so recordings
+# can be validated and benchmarked on machines without a display.
+
+
+class NullBackend:
+    """Accepts every event and does nothing with it."""
+
+    name = "null"
+
+    def press(self, key):
+        pass
+
+    def release(self, key):
+        pass
+
+    def move(self, x, y):
+        pass
+
+    def button_press(self, x, y, button):
+        pass
+
+    def button_release(self, x, y, button):
+        pass
+
+    def scroll(self, dx, dy):
+        pass
+
+    def handlers(self):
+        """Return the per-opcode handler tuple Player indexes into."""
+        handlers = [None] * len(OP_NAMES)
+        handlers[OP_KEY_PRESS] = self.press
+        handlers[OP_KEY_RELEASE] = self.release
+        handlers[OP_MOVE] = self.move
+        handlers[OP_BUTTON_PRESS] = self.button_press
+        handlers[OP_BUTTON_RELEASE] = self.button_release
+        handlers[OP_SCROLL] = self.scroll
+        return tuple(handlers)
+
+
+class PynputBackend(NullBackend):
+    """Drives the real keyboard and mouse."""
+
+    name = "pynput"
+
+    def __init__(self):
+        from pynput.keyboard import Controller as KeyboardController, Key, KeyCode
+        from pynput.mouse import Controller as MouseController, Button
+        self.keyboard_controller = KeyboardController()
+        self.mouse_controller = MouseController()
+        self.scroll = self.mouse_controller.scroll
+        self.Key = Key
+        self.KeyCode = KeyCode
+        self.Button = Button
+        # Recorded name -> pynput key or button, resolved on first use
+        self.keys = {}
+        self.buttons = {}
+
+    def parse_key(self, key_str):
+        key = self.keys.get(key_str)
+        if key is None:
+            if len(key_str) == 1:
+                key = key_str
+            elif key_str[:1] == '<' and key_str[1:-1].isdigit():
+                key = self.KeyCode.from_vk(int(key_str[1:-1]))  # Recorded by its virtual key code
+            else:
+                try:
+                    key = getattr(self.Key, key_str.replace('Key.', ''))
+                except AttributeError:
+                    logger.warning("Unknown key: %s", key_str)
+                    key = key_str
+            self.keys[key_str] = key
+        return key
+
+    def get_button(self, button_str):
+        button = self.buttons.get(button_str)
+        if button is None:
+            try:
+                button = getattr(self.Button, button_str)
+            except (AttributeError, TypeError):
+                logger.warning("Unknown mouse button: %s", button_str)
+                button = self.Button.left
+            self.buttons[button_str] = button
+        return button
+
+    def press(self, key):
+        self.keyboard_controller.press(self.parse_key(key))
+
+    def release(self, key):
+        self.keyboard_controller.release(self.parse_key(key))
+
+    def move(self, x, y):
+        self.mouse_controller.position = (x, y)
+
+    def button_press(self, x, y, button):
+        self.mouse_controller.position = (x, y)
+        self.mouse_controller.press(self.get_button(button))
+
+    def button_release(self, x, y, button):
+        self.mouse_controller.position = (x, y)
+        self.mouse_controller.release(self.get_button(button))
+
+
+class CaptureBackend(NullBackend):
+    """Logs every effect it would have produced as (perf_counter(), opcode, args) in self.effects."""
+
+    name = "capture"
+
+    def __init__(self):
+        self.effects = []
+        self._clock = time.perf_counter
+
+    def handlers(self):
+        append = self.effects.append
+        clock = self._clock
+
+        def capture(op):
+            def handler(*args):
+                append((clock(), op, args))
+            return handler
+
+        return tuple(capture(op) for op in range(len(OP_NAMES)))
+
+    def clear(self):
+        self.effects.clear()
+
+
+OUTPUT_BACKENDS = {
+    "pynput": PynputBackend,
+    "null": NullBackend,
+    "capture": CaptureBackend,
+}
+
+DEFAULT_OUTPUT_BACKEND = "pynput"
+
+
+def create_backend(name=DEFAULT_OUTPUT_BACKEND):
+    """Create an output backend by name. Raises ValueError for unknown names."""
+    try:
+        backend_class = OUTPUT_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown output backend: {name}")
+    return backend_class()
@@ -0,0 +1,59 @@
+"""Measure how long Recorder hook callbacks hold the input hook thread.
+
+Run from the repository root: python benchmarks/bench_callbacks.py
+
+The callbacks are fed stand-ins for pynput's key and button objects, so
+this runs headless and without pynput installed.
+"""
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import Recorder  # noqa: E402
+
+# Only the attributes the Recorder reads: KeyCode.char and Button.name
+KEY_A = SimpleNamespace(char='a', vk=65)
+BUTTON_LEFT = SimpleNamespace(name='left')
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def time_callback(name, callback, args_for, count):
+    samples = []
+    perf_counter_ns = time.perf_counter_ns
+    for i in range(count):
+        args = args_for(i)
+        start = perf_counter_ns()
+        callback(*args)
+        samples.append(perf_counter_ns() - start)
+    samples.sort()
+    return {
+        "callback": name,
+        "calls": count,
+        "p50_ns": percentile(samples, 0.5),
+        "p99_ns": percentile(samples, 0.99),
+        "max_ns": samples[-1],
+    }
+
+
+def run(count=100000):
+    recorder = Recorder()
+    recorder.start(listen=False)
+    results = [
+        time_callback("on_move", recorder.on_move, lambda i: (i % 1920, i % 1080), count),
+        time_callback("on_click", recorder.on_click, lambda i: (10, 10, BUTTON_LEFT, i % 2 == 0), count),
+        time_callback("on_press", recorder.on_press, lambda i: (KEY_A,), count),
+    ]
+    recorder.stop()
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'callback':<10} {'p50 (ns)':>10} {'p99 (ns)':>10} {'max (ns)':>12}")
+    for result in run():
+        print(f"{result['callback']:<10} {result['p50_ns']:>10} {result['p99_ns']:>10} {result['max_ns']:>12}")
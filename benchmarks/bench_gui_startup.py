@@ -0,0 +1,85 @@
+"""Measure how long the GUI takes to import and to show its first frame.
+
+Run from the repository root: python benchmarks/bench_gui_startup.py
+
+Each measurement runs in a fresh interpreter. import_ms is the time to
+import app.py; first_paint_ms counts from the start of the interpreter to
+the first <Expose> of the main window, and ready_ms to the point where the
+recorder and hotkeys are set up. The window rows need a display and are
+skipped without one.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Target from process start to the first painted frame
+FIRST_PAINT_TARGET_MS = 150
+
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+import app
+print(round((time.perf_counter() - start) * 1000, 1))
+"""
+
+WINDOW_SCRIPT = """
+import time
+start = time.perf_counter()
+import json
+import app
+result = {"import_ms": round((time.perf_counter() - start) * 1000, 1)}
+application = app.Application()
+finish_startup = application.finish_startup
+
+def record_ready():
+    finish_startup()
+    result.setdefault("ready_ms", round((time.perf_counter() - start) * 1000, 1))
+    application.after(50, application.on_closing)
+
+def record_paint(event):
+    if event.widget is application:
+        result.setdefault("first_paint_ms", round((time.perf_counter() - start) * 1000, 1))
+
+application.finish_startup = record_ready
+application.bind_all("<Expose>", record_paint, add="+")
+application.mainloop()
+print(json.dumps(result))
+"""
+
+
+def run_script(directory, script):
+    path = os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")]))
+    result = subprocess.run([sys.executable, "-c", script], cwd=directory, capture_output=True, text=True,
+                            env=dict(os.environ, PYTHONPATH=path))
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed")
+    return result.stdout.strip().splitlines()[-1]
+
+
+def run(repeat=10):
+    results = {}
+    # A scratch directory so the measured runs do not touch the real recordings
+    with tempfile.TemporaryDirectory() as directory:
+        results["import_ms"] = statistics.median(float(run_script(directory, IMPORT_SCRIPT)) for _ in range(repeat))
+        try:
+            windows = [json.loads(run_script(directory, WINDOW_SCRIPT)) for _ in range(repeat)]
+        except RuntimeError as e:
+            print(f"Skipping window startup: {e}", file=sys.stderr)
+            return results
+    for key in ("first_paint_ms", "ready_ms"):
+        values = [window[key] for window in windows if key in window]
+        results[key] = statistics.median(values) if values else None
+    return results
+
+
+if __name__ == "__main__":
+    results = run()
+    for key in ("import_ms", "first_paint_ms", "ready_ms"):
+        value = results.get(key)
+        print(f"{key:<16} {value:>8.1f}" if value is not None else f"{key:<16} {'-':>8}")
+    print(f"Target: first paint within {FIRST_PAINT_TARGET_MS} ms")
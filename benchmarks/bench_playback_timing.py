@@ -0,0 +1,198 @@
+"""Measure how faithfully Player reproduces the timing of a recording.
+
+Run from the repository root: python benchmarks/bench_playback_timing.py
+
+Synthetic recordings with different densities, durations and gap
+distributions are played through the capture backend in every timing mode,
+so no real input is sent. For each run the report gives per-event lateness
+percentiles (when the backend saw the event minus when it was due), drift
+from the first to the last event, and CPU time as a fraction of wall time.
+A separate max-speed run gives the events/sec ceiling of the play loop.
+
+The report is written as JSON (see --output) and --compare prints the
+change against an earlier report, e.g. one taken before a scheduler change.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")  # Ignored by git
+
+from backends import CaptureBackend  # noqa: E402
+from engine import Player  # noqa: E402
+from event_buffer import EventBuffer  # noqa: E402
+from plan import compile_events  # noqa: E402
+from scheduler import TIMING_MODES, calibrate_sleep  # noqa: E402
+
+# name, events per second, duration in seconds, gap distribution
+SCENARIOS = (
+    ("sparse", 20, 5.0, "regular"),
+    ("typing", 200, 5.0, "exponential"),
+    ("dense", 500, 4.0, "regular"),
+    ("mouse-1000hz", 1000, 3.0, "regular"),
+    ("bursty", 500, 4.0, "bursty"),
+)
+
+# Events played back to back for the events/sec ceiling
+CEILING_EVENTS = 200000
+
+# Bursts of this many events 1 ms apart, separated by a pause that keeps the average rate
+BURST_SIZE = 50
+
+
+def gaps(distribution, rate, count, rng):
+    """Yield count gaps in seconds averaging 1 / rate."""
+    mean = 1.0 / rate
+    for i in range(count):
+        if distribution == "regular":
+            yield mean
+        elif distribution == "exponential":
+            yield rng.expovariate(rate)
+        elif distribution == "bursty":
+            # Every burst spans the same time as BURST_SIZE regular gaps
+            yield 0.001 if i % BURST_SIZE else BURST_SIZE * mean - (BURST_SIZE - 1) * 0.001
+        else:
+            raise ValueError(f"Unknown gap distribution: {distribution}")
+
+
+def make_plan(rate, duration, distribution, seed=0):
+    rng = random.Random(seed)
+    events = EventBuffer()
+    t = 0.0
+    for i, gap in enumerate(gaps(distribution, rate, int(rate * duration), rng)):
+        t += gap
+        events.append_move(t, i % 1920, i % 1080)
+    return compile_events(events)
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def play(plan, timing_mode="balanced", max_speed=False):
+    """Play a plan through a fresh capture backend. Returns (player, effects, wall, cpu)."""
+    backend = CaptureBackend()
+    player = Player(plan, timing_mode=timing_mode, backend=backend, max_speed=max_speed)
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    player.start()
+    player.wait()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    if player.error:
+        raise RuntimeError(f"Playback failed: {player.error}")
+    return player, backend.effects, wall, cpu
+
+
+def measure_fidelity(name, rate, duration, distribution, timing_mode):
+    plan = make_plan(rate, duration, distribution)
+    player, effects, wall, cpu = play(plan, timing_mode)
+    anchor = player.iteration_start
+    lateness = [(effect[0] - anchor - due) * 1000 for effect, due in zip(effects, plan.times)]
+    drift = lateness[-1] - lateness[0]
+    lateness.sort()
+    return {
+        "scenario": name,
+        "mode": timing_mode,
+        "events": len(plan),
+        "rate": rate,
+        "duration": duration,
+        "gaps": distribution,
+        "p50_ms": round(percentile(lateness, 0.5), 4),
+        "p99_ms": round(percentile(lateness, 0.99), 4),
+        "max_ms": round(lateness[-1], 4),
+        "drift_ms": round(drift, 4),
+        "cpu": round(cpu / wall, 4) if wall > 0 else 0.0,
+    }
+
+
+def measure_ceiling(count=CEILING_EVENTS):
+    plan = make_plan(1000, count / 1000, "regular")
+    _, effects, wall, cpu = play(plan, max_speed=True)
+    span = effects[-1][0] - effects[0][0]
+    return {
+        "events": count,
+        "events_per_sec": round(count / span) if span > 0 else None,
+        "cpu": round(cpu / wall, 4) if wall > 0 else 0.0,
+    }
+
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def run(modes=None, scale=1.0):
+    modes = modes or list(TIMING_MODES)
+    results = []
+    for name, rate, duration, distribution in SCENARIOS:
+        for mode in modes:
+            results.append(measure_fidelity(name, rate, duration * scale, distribution, mode))
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sleep_calibration_ms": {key: round(value * 1000, 4) for key, value in calibrate_sleep().items()},
+        "results": results,
+        "ceiling": measure_ceiling(),
+    }
+
+
+def compare(report, baseline):
+    """Print p99 lateness, drift and CPU against an earlier report."""
+    earlier = {(result["scenario"], result["mode"]): result for result in baseline["results"]}
+    print(f"\nChange against {baseline.get('commit') or 'baseline'}:")
+    print(f"{'scenario':<14} {'mode':<10} {'p99 (ms)':>18} {'drift (ms)':>18} {'cpu':>16}")
+    for result in report["results"]:
+        before = earlier.get((result["scenario"], result["mode"]))
+        if before is None:
+            continue
+        print(f"{result['scenario']:<14} {result['mode']:<10} "
+              f"{before['p99_ms']:>8.3f} -> {result['p99_ms']:<7.3f} "
+              f"{before['drift_ms']:>8.3f} -> {result['drift_ms']:<7.3f} "
+              f"{before['cpu']:>6.1%} -> {result['cpu']:<6.1%}")
+    before = baseline["ceiling"]["events_per_sec"]
+    print(f"ceiling: {before} -> {report['ceiling']['events_per_sec']} events/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="JSON report to write (default: benchmarks/results/playback-timing-COMMIT.json)")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    parser.add_argument("--mode", action="append", choices=list(TIMING_MODES), help="only these timing modes")
+    parser.add_argument("--quick", action="store_true", help="play each scenario for a quarter of its duration")
+    args = parser.parse_args()
+
+    report = run(args.mode, 0.25 if args.quick else 1.0)
+    print(f"{'scenario':<14} {'mode':<10} {'events':>7} {'p50 (ms)':>9} {'p99 (ms)':>9} "
+          f"{'max (ms)':>9} {'drift (ms)':>11} {'cpu':>6}")
+    for result in report["results"]:
+        print(f"{result['scenario']:<14} {result['mode']:<10} {result['events']:>7} {result['p50_ms']:>9.3f} "
+              f"{result['p99_ms']:>9.3f} {result['max_ms']:>9.3f} {result['drift_ms']:>11.3f} {result['cpu']:>6.1%}")
+    ceiling = report["ceiling"]
+    print(f"ceiling: {ceiling['events_per_sec']} events/s at max speed ({ceiling['cpu']:.1%} cpu)")
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"playback-timing-{report['commit'] or 'local'}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Report written to {output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Measure cold start of the headless CLI.
+
+Run from the repository root: python benchmarks/bench_startup.py
+
+Each command runs in a fresh interpreter against a small synthetic
+recording in a temporary directory. Wall time covers the whole process;
+first_event_ms is reported by `cli.py play` and counts from the start of
+cli.py to the first event sent to the OS. The play row needs pynput and a
+display, and is skipped if playback cannot start.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from event_buffer import EventBuffer  # noqa: E402
+from recording_format import recording_path, save_recording  # noqa: E402
+
+# Target from process start to the first event played
+FIRST_EVENT_TARGET_MS = 100
+
+
+def make_recording(directory):
+    events = EventBuffer()
+    for i in range(200):
+        events.append_move(i * 0.001, 100 + i, 100)
+    path = recording_path(os.path.join(directory, "recordings"), "bench")
+    os.makedirs(os.path.dirname(path))
+    save_recording(path, events)
+
+
+def run_command(directory, args):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, os.path.join(ROOT, "cli.py"), "--json", "-q"] + args,
+                            cwd=directory, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    try:
+        summary = json.loads(result.stdout)
+    except ValueError:
+        summary = {"exit_status": result.returncode, "error": result.stderr.strip().splitlines()[-1:]}
+    return wall_ms, summary
+
+
+def run(repeat=10):
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        make_recording(directory)
+        baseline = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", "pass"], check=True)
+            baseline.append((time.perf_counter() - start) * 1000)
+        results.append({"command": "python -c pass", "wall_ms": statistics.median(baseline), "first_event_ms": None})
+        for args in (["list"], ["info", "bench"], ["play", "bench", "--speed", "100"]):
+            walls = []
+            first_events = []
+            for _ in range(repeat):
+                wall_ms, summary = run_command(directory, args)
+                if summary.get("exit_status"):
+                    break
+                walls.append(wall_ms)
+                if summary.get("first_event_ms") is not None:
+                    first_events.append(summary["first_event_ms"])
+            if not walls:
+                print(f"Skipping {' '.join(args)}: {summary.get('error')}", file=sys.stderr)
+                continue
+            results.append({
+                "command": "cli.py " + " ".join(args),
+                "wall_ms": statistics.median(walls),
+                "first_event_ms": statistics.median(first_events) if first_events else None,
+            })
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'command':<32} {'wall (ms)':>10} {'first event (ms)':>17}")
+    for result in run():
+        first_event = f"{result['first_event_ms']:.1f}" if result["first_event_ms"] is not None else "-"
+        print(f"{result['command']:<32} {result['wall_ms']:>10.1f} {first_event:>17}")
+    print(f"Target: first event within {FIRST_EVENT_TARGET_MS} ms")
@@ -0,0 +1,257 @@
+"""Measure recording, saving, loading and listing throughput.
+
+Run from the repository root: python benchmarks/bench_throughput.py
+
+Everything runs headless on synthetic data in a temporary directory:
+  - Recorder callback cost per event (see bench_callbacks.py)
+  - Recorder.save_events and load_events in both formats for 10k to 10M
+    events, in MB/s and events/s, plus the time to compile the loaded
+    recording for playback and the peak RSS of the loading process. Each
+    load runs in a fresh interpreter so its peak RSS is its own; the file
+    is still in the OS page cache from the save. Binary recordings are
+    memory-mapped, so their load is nearly free and the cost of reading
+    them shows up in the compile time instead.
+  - Application.get_all_recordings for directories of 10, 1k and 100k
+    recordings: the first call indexes the directory, later calls read the
+    catalog. No window is created.
+
+The report is written as JSON (see --output) and --compare prints the
+change against an earlier report.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import bench_callbacks  # noqa: E402
+from bench_playback_timing import RESULTS_DIR, git_commit  # noqa: E402
+from engine import Recorder  # noqa: E402
+from event_buffer import EventBuffer  # noqa: E402
+from recording_format import write_binary, recording_path, RECORDINGS_DIR  # noqa: E402
+from recording_format import BINARY_EXTENSION, JSON_EXTENSION  # noqa: E402
+
+EVENT_COUNTS = (10000, 100000, 1000000, 10000000)
+FILE_COUNTS = (10, 1000, 100000)
+# JSON recordings above this size take minutes to write and are skipped
+JSON_MAX_EVENTS = 1000000
+# Caps used by --quick
+QUICK_MAX_EVENTS = 100000
+QUICK_MAX_FILES = 1000
+
+# Loads one recording in a fresh interpreter and prints timings and peak RSS as JSON
+LOAD_SCRIPT = """
+import json, sys, time
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def peak_rss_mb():
+    # ru_maxrss on Linux carries over the parent's peak from before exec; VmHWM does not
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+from engine import Recorder
+from plan import compile_events
+recorder = Recorder()
+baseline = peak_rss_mb()
+start = time.perf_counter()
+if not recorder.load_events(sys.argv[1]):
+    sys.exit(1)
+loaded = time.perf_counter()
+compile_events(recorder.events)
+compiled = time.perf_counter()
+print(json.dumps({"load_s": loaded - start, "compile_s": compiled - loaded,
+                  "baseline_rss_mb": baseline, "peak_rss_mb": peak_rss_mb()}))
+"""
+
+
+def make_events(count):
+    """A recording that is mostly mouse moves with a click and a key press every 100 events."""
+    events = EventBuffer()
+    append_move = events.append_move
+    for i in range(count):
+        t = i * 0.001
+        if i % 100 == 98:
+            events.append_click(t, i % 1920, i % 1080, "left", i % 200 < 100)
+        elif i % 100 == 99:
+            events.append_key(t, "a", i % 200 < 100)
+        else:
+            append_move(t, i % 1920, i % 1080)
+    return events
+
+
+def rate(amount, seconds):
+    return round(amount / seconds, 1) if seconds > 0 else None
+
+
+def measure_save_load(count, extension, events):
+    recorder = Recorder()
+    recorder.events = events
+    start = time.perf_counter()
+    path = recorder.save_events(f"bench {count}", extension)
+    save_s = time.perf_counter() - start
+    if path is None:
+        raise RuntimeError(f"Saving {count} events as {extension} failed")
+    size = os.path.getsize(path)
+    python_path = os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")]))
+    result = subprocess.run([sys.executable, "-c", LOAD_SCRIPT, path], capture_output=True, text=True,
+                            env=dict(os.environ, PYTHONPATH=python_path))
+    if result.returncode:
+        raise RuntimeError(f"Loading {path} failed: {result.stderr.strip()}")
+    load = json.loads(result.stdout.strip().splitlines()[-1])
+    os.remove(path)
+    mb = size / (1024 * 1024)
+    return {
+        "events": count,
+        "format": extension,
+        "bytes": size,
+        "save_s": round(save_s, 4),
+        "save_mb_s": rate(mb, save_s),
+        "save_events_s": rate(count, save_s),
+        "load_s": round(load["load_s"], 4),
+        "load_mb_s": rate(mb, load["load_s"]),
+        "load_events_s": rate(count, load["load_s"]),
+        "compile_s": round(load["compile_s"], 4),
+        "peak_rss_mb": load["peak_rss_mb"],
+        "load_rss_mb": (round(load["peak_rss_mb"] - load["baseline_rss_mb"], 1)
+                        if load["peak_rss_mb"] is not None else None),
+    }
+
+
+def measure_listing(count):
+    """Time Application.get_all_recordings on a directory of count small recordings."""
+    import app
+    from catalog import Catalog
+    directory = f"listing-{count}"
+    os.makedirs(directory)
+    events = make_events(20)
+    for i in range(count):
+        write_binary(recording_path(directory, f"recording {i}", BINARY_EXTENSION), events)
+    catalog = Catalog(directory)
+    search = SimpleNamespace(value="")
+    # Only the attributes get_all_recordings reads, so no Tk window is needed
+    application = SimpleNamespace(catalog=catalog, catalog_refreshing=False,
+                                  search_var=SimpleNamespace(get=lambda: search.value))
+    timings = {}
+    for label, text in (("first_ms", ""), ("cached_ms", ""), ("search_ms", "recording 1")):
+        search.value = text
+        start = time.perf_counter()
+        names = app.Application.get_all_recordings(application)
+        timings[label] = round((time.perf_counter() - start) * 1000, 2)
+        if label == "first_ms" and len(names) != count:
+            raise RuntimeError(f"Listed {len(names)} of {count} recordings")
+    catalog.close()
+    return {"files": count, **timings}
+
+
+def run(max_events=None, max_files=None, callback_calls=100000):
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "callbacks": bench_callbacks.run(callback_calls),
+        "save_load": [],
+        "listing": [],
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            os.makedirs(RECORDINGS_DIR)
+            for count in EVENT_COUNTS:
+                if max_events and count > max_events:
+                    continue
+                events = make_events(count)
+                for extension in (BINARY_EXTENSION, JSON_EXTENSION):
+                    if extension == JSON_EXTENSION and count > JSON_MAX_EVENTS:
+                        continue
+                    report["save_load"].append(measure_save_load(count, extension, events))
+                del events
+            for count in FILE_COUNTS:
+                if max_files and count > max_files:
+                    continue
+                report["listing"].append(measure_listing(count))
+        finally:
+            os.chdir(cwd)
+    return report
+
+
+def print_report(report):
+    print(f"{'callback':<10} {'p50 (ns)':>10} {'p99 (ns)':>10}")
+    for result in report["callbacks"]:
+        print(f"{result['callback']:<10} {result['p50_ns']:>10} {result['p99_ns']:>10}")
+    print(f"\n{'events':>9} {'format':<6} {'MB':>8} {'save MB/s':>10} {'save ev/s':>11} "
+          f"{'load MB/s':>10} {'load ev/s':>12} {'compile (s)':>12} {'load RSS (MB)':>14}")
+    for result in report["save_load"]:
+        print(f"{result['events']:>9} {result['format']:<6} {result['bytes'] / (1024 * 1024):>8.1f} "
+              f"{result['save_mb_s']:>10} {result['save_events_s']:>11.0f} {result['load_mb_s']:>10} "
+              f"{result['load_events_s']:>12.0f} {result['compile_s']:>12.3f} {result['load_rss_mb']!s:>14}")
+    print(f"\n{'files':>7} {'first (ms)':>11} {'cached (ms)':>12} {'search (ms)':>12}")
+    for result in report["listing"]:
+        print(f"{result['files']:>7} {result['first_ms']:>11} {result['cached_ms']:>12} {result['search_ms']:>12}")
+
+
+def compare(report, baseline):
+    """Print save/load throughput and listing times against an earlier report."""
+    print(f"\nChange against {baseline.get('commit') or 'baseline'}:")
+    earlier = {(result["events"], result["format"]): result for result in baseline["save_load"]}
+    for result in report["save_load"]:
+        before = earlier.get((result["events"], result["format"]))
+        if before is not None:
+            print(f"{result['events']:>9} {result['format']:<6} save {before['save_events_s']:.0f} -> "
+                  f"{result['save_events_s']:.0f} ev/s, load {before['load_events_s']:.0f} -> "
+                  f"{result['load_events_s']:.0f} ev/s")
+    earlier = {result["files"]: result for result in baseline["listing"]}
+    for result in report["listing"]:
+        before = earlier.get(result["files"])
+        if before is not None:
+            print(f"{result['files']:>9} files  first {before['first_ms']} -> {result['first_ms']} ms, "
+                  f"cached {before['cached_ms']} -> {result['cached_ms']} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="JSON report to write (default: benchmarks/results/throughput-COMMIT.json)")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    parser.add_argument("--quick", action="store_true",
+                        help=f"stop at {QUICK_MAX_EVENTS} events and {QUICK_MAX_FILES} files")
+    args = parser.parse_args()
+
+    if args.quick:
+        report = run(QUICK_MAX_EVENTS, QUICK_MAX_FILES)
+    else:
+        report = run()
+    print_report(report)
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"throughput-{report['commit'] or 'local'}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Report written to {output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
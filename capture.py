@@ -0,0 +1,82 @@
+# A dropped move followed by at least this many seconds without moves is
+# where the cursor came to rest, and is kept
+REST_INTERVAL = 0.05
+
+
+class CapturePolicy:
+    """Controls which mouse moves the Recorder keeps.
+
+    max_move_rate caps recorded moves per second; min_move_distance drops
+    moves closer than that many pixels to the last kept move. With
+    keep_position_before_click the last dropped move is still written just
+    before a click, scroll or key event, so clicks and shortcuts happen
+    where the cursor was. The position where each motion comes to rest and
+    the final position of a recording are always kept.
+    """
+
+    def __init__(self, max_move_rate=None, min_move_distance=0, keep_position_before_click=True):
+        self.max_move_rate = max_move_rate
+        self.min_move_distance = min_move_distance
+        self.keep_position_before_click = keep_position_before_click
+
+    @property
+    def keeps_everything(self):
+        return not self.max_move_rate and not self.min_move_distance
+
+    def new_coalescer(self):
+        return MoveCoalescer(self)
+
+
+class MoveCoalescer:
+    """Per-recording state for applying a CapturePolicy to a stream of moves."""
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.min_interval = 1.0 / policy.max_move_rate if policy.max_move_rate else 0.0
+        self.min_distance_sq = policy.min_move_distance ** 2
+        self.rest_interval = max(self.min_interval, REST_INTERVAL)
+        self.last = None  # Last kept move as (time, x, y)
+        self.pending = None  # Most recent dropped move
+        self.dropped = 0
+
+    def accept(self, time_value, x, y):
+        """Return True if the move should be recorded; otherwise remember it as pending."""
+        last = self.last
+        if last is not None:
+            dx = x - last[1]
+            dy = y - last[2]
+            if time_value - last[0] < self.min_interval or dx * dx + dy * dy < self.min_distance_sq:
+                self.pending = (time_value, x, y)
+                self.dropped += 1
+                return False
+        self.last = (time_value, x, y)
+        self.pending = None
+        return True
+
+    def take_resting(self, time_value):
+        """Return the pending move if the cursor rested there until a move at time_value, and treat it as kept."""
+        pending = self.pending
+        if pending is not None and time_value - pending[0] >= self.rest_interval:
+            return self.take_pending()
+        return None
+
+    def take_pending(self):
+        """Return the pending move, if any, and treat it as kept."""
+        pending = self.pending
+        if pending is not None:
+            self.pending = None
+            self.last = pending
+            self.dropped -= 1
+        return pending
+
+
+# Presets offered in the UI, from full fidelity to heavily thinned
+CAPTURE_PRESETS = {
+    "Full": CapturePolicy(),
+    "240 Hz": CapturePolicy(max_move_rate=240),
+    "120 Hz": CapturePolicy(max_move_rate=120, min_move_distance=1),
+    "60 Hz": CapturePolicy(max_move_rate=60, min_move_distance=2),
+    "30 Hz": CapturePolicy(max_move_rate=30, min_move_distance=3),
+}
+
+DEFAULT_CAPTURE_PRESET = "Full"
@@ -0,0 +1,230 @@
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+from event_buffer import CODE_KEY_PRESS, CODE_KEY_RELEASE, CODE_MOVE, CODE_CLICK_PRESS, CODE_CLICK_RELEASE, CODE_SCROLL
+from event_buffer import coordinate
+from log import logger
+from recording_format import load_recording, recording_name, MappedRecording, RECORDING_EXTENSIONS
+
+# SQLite index of the recordings directory, kept next to the recordings
+CATALOG_FILENAME = ".catalog.sqlite3"
+
+# Bump when the schema or the stored statistics change; the index is rebuilt
+CATALOG_VERSION = 1
+
+CatalogEntry = namedtuple("CatalogEntry", [
+    "name", "filename", "size", "mtime_ns", "duration", "events",
+    "keys", "moves", "clicks", "scrolls", "min_x", "min_y", "max_x", "max_y",
+])
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recordings (
+    filename TEXT PRIMARY KEY,
+    name TEXT NOT NULL COLLATE NOCASE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    duration REAL,
+    events INTEGER,
+    keys INTEGER,
+    moves INTEGER,
+    clicks INTEGER,
+    scrolls INTEGER,
+    min_x INTEGER,
+    min_y INTEGER,
+    max_x INTEGER,
+    max_y INTEGER
+);
+CREATE INDEX IF NOT EXISTS recordings_name ON recordings (name);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER);
+"""
+
+_COLUMNS = ", ".join(CatalogEntry._fields)
+
+# Binary recordings sort first so each name resolves to the file find_recording would pick
+_EXTENSION_ORDER = " ".join(
+    f"WHEN filename LIKE '%{extension}' THEN {order}" for order, extension in enumerate(RECORDING_EXTENSIONS))
+
+
+def recording_stats(events):
+    """Return (duration, events, keys, moves, clicks, scrolls, min_x, min_y, max_x, max_y) for a recording."""
+    columns, _ = events.as_columns()
+    codes = columns["code"].tobytes()
+    count = len(codes)
+    if not count:
+        return 0.0, 0, 0, 0, 0, 0, None, None, None, None
+    keys = codes.count(bytes([CODE_KEY_PRESS])) + codes.count(bytes([CODE_KEY_RELEASE]))
+    moves = codes.count(bytes([CODE_MOVE]))
+    clicks = codes.count(bytes([CODE_CLICK_PRESS])) + codes.count(bytes([CODE_CLICK_RELEASE]))
+    scrolls = codes.count(bytes([CODE_SCROLL]))
+    # Keyboard rows have no position and are left out of the bounding box
+    xs = columns["x"]
+    ys = columns["y"]
+    mouse_rows = [i for i, code in enumerate(codes) if code != CODE_KEY_PRESS and code != CODE_KEY_RELEASE]
+    if mouse_rows:
+        row_xs = [xs[i] for i in mouse_rows]
+        row_ys = [ys[i] for i in mouse_rows]
+        bounds = tuple(coordinate(value) for value in (min(row_xs), min(row_ys), max(row_xs), max(row_ys)))
+    else:
+        bounds = None, None, None, None
+    return (columns["time"][count - 1], count, keys, moves, clicks, scrolls) + bounds
+
+
+def _read_stats(path):
+    events = load_recording(path)
+    try:
+        return recording_stats(events)
+    finally:
+        if isinstance(events, MappedRecording):
+            events.close()
+
+
+def read_entry(path):
+    """Build a CatalogEntry for any recording file without adding it to a catalog."""
+    filename = os.path.basename(path)
+    stat = os.stat(path)
+    return CatalogEntry(recording_name(filename) or filename, filename, stat.st_size, stat.st_mtime_ns,
+                        *_read_stats(path))
+
+
+class Catalog:
+    """Index of the recordings in a directory with cached metadata.
+
+    Each file is keyed by name, size and mtime and is only parsed again when
+    one of them changes. Listing and searching query the index instead of
+    the directory. All methods may be called from any thread.
+    """
+
+    def __init__(self, directory, path=None):
+        self.directory = directory
+        self.path = path or os.path.join(directory, CATALOG_FILENAME)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL keeps its files open for the whole session, so writing the index
+        # does not keep changing the directory mtime that refresh(full=False) checks
+        self._db.execute("PRAGMA journal_mode=WAL")
+        with self._lock, self._db:
+            if self._db.execute("PRAGMA user_version").fetchone()[0] != CATALOG_VERSION:
+                self._db.executescript("DROP TABLE IF EXISTS recordings; DROP TABLE IF EXISTS meta;")
+                self._db.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+            self._db.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _directory_mtime(self):
+        try:
+            return os.stat(self.directory).st_mtime_ns
+        except OSError:
+            return None
+
+    def refresh(self, full=True):
+        """Bring the index up to date with the directory. Returns the number of files (re)indexed.
+
+        With full=False the directory is only rescanned when its mtime has
+        changed, which catches added, removed and renamed recordings but not
+        files rewritten in place.
+        """
+        directory_mtime = self._directory_mtime()
+        with self._lock:
+            if not full:
+                row = self._db.execute("SELECT value FROM meta WHERE key = 'directory_mtime_ns'").fetchone()
+                if row is not None and row[0] == directory_mtime:
+                    return 0
+            known = {filename: (size, mtime_ns) for filename, size, mtime_ns
+                     in self._db.execute("SELECT filename, size, mtime_ns FROM recordings")}
+        try:
+            entries = [entry for entry in os.scandir(self.directory)
+                       if recording_name(entry.name) is not None and entry.is_file()]
+        except OSError as e:
+            logger.error("Error scanning recordings directory: %s", e)
+            return 0
+
+        updated = 0
+        for entry in entries:
+            stat = entry.stat()
+            if known.pop(entry.name, None) != (stat.st_size, stat.st_mtime_ns):
+                self._index(entry.name, stat)
+                updated += 1
+        with self._lock, self._db:
+            self._db.executemany("DELETE FROM recordings WHERE filename = ?", [(filename,) for filename in known])
+            self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('directory_mtime_ns', ?)",
+                             (directory_mtime,))
+        if updated or known:
+            logger.info("Catalog updated: %d indexed, %d removed", updated, len(known))
+        return updated
+
+    def _index(self, filename, stat):
+        try:
+            stats = _read_stats(os.path.join(self.directory, filename))
+        except (OSError, ValueError) as e:
+            # Still list the file so it can be deleted, but without metadata
+            logger.warning("Could not index %s: %s", filename, e)
+            stats = (None,) * 10
+        with self._lock, self._db:
+            self._db.execute(f"INSERT OR REPLACE INTO recordings ({_COLUMNS}) VALUES ({', '.join('?' * 14)})",
+                             (recording_name(filename), filename, stat.st_size, stat.st_mtime_ns) + stats)
+
+    def update(self, path):
+        """Index or re-index one recording, e.g. right after it was saved."""
+        filename = os.path.basename(path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.remove(path)
+            return
+        self._index(filename, stat)
+
+    def remove(self, path):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM recordings WHERE filename = ?", (os.path.basename(path),))
+
+    def _query(self, where="", parameters=()):
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {_COLUMNS} FROM recordings {where} ORDER BY name, CASE {_EXTENSION_ORDER} ELSE 99 END",
+                parameters).fetchall()
+        # A recording may exist in both formats; keep the preferred file for each name
+        entries = {}
+        for row in rows:
+            entries.setdefault(row[0], CatalogEntry(*row))
+        return list(entries.values())
+
+    def entries(self):
+        return self._query()
+
+    def names(self):
+        return [entry.name for entry in self._query()]
+
+    def get(self, name):
+        """Return the CatalogEntry for a recording name, or None."""
+        entries = self._query("WHERE name = ?", (name,))
+        return entries[0] if entries else None
+
+    def search(self, text, prefix=False):
+        """Return the entries whose name starts with (prefix=True) or contains text, ignoring case."""
+        escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = f"{escaped}%" if prefix else f"%{escaped}%"
+        return self._query("WHERE name LIKE ? ESCAPE '\\'", (pattern,))
+
+
+def describe_entry(entry):
+    """One-line summary of a catalog entry for display, without its name."""
+    if entry.events is None:
+        return f"unreadable ({entry.size} bytes)"
+    text = (f"{entry.duration:.1f}s, {entry.events} events "
+            f"({entry.moves} moves, {entry.clicks} clicks, {entry.keys} keys, {entry.scrolls} scrolls)")
+    if entry.min_x is not None:
+        text += f", area ({entry.min_x}, {entry.min_y})-({entry.max_x}, {entry.max_y})"
+    return text
+
+
+if __name__ == "__main__":
+    import sys
+    catalog = Catalog(sys.argv[1] if len(sys.argv) > 1 else "recordings")
+    catalog.refresh()
+    entries = catalog.search(sys.argv[2]) if len(sys.argv) > 2 else catalog.entries()
+    for entry in entries:
+        print(f"{entry.name}: {describe_entry(entry)}")
+    catalog.close()
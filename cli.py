@@ -0,0 +1,532 @@
+import time
+
+# Taken before anything else is imported so startup cost is included
+CLI_START = time.perf_counter()
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import logging  # noqa: E402
+import os  # noqa: E402
+import sys  # noqa: E402
+import threading  # noqa: E402
+from log import logger, configure_logging  # noqa: E402
+from recording_format import find_recording, recording_path, recording_name, convert_recording, load_recording  # noqa: E402
+from recording_format import RECORDINGS_DIR, RECORDING_EXTENSIONS, DEFAULT_EXTENSION, MappedRecording  # noqa: E402
+
+# Headless command line for scripted and scheduled runs. It must never
+# import tkinter, and pynput and the engine are only imported by the
+# commands that drive input, so info, list and convert start quickly.
+#
+#   python cli.py record NAME [--duration S] [--stream] [--capture PRESET] [--metrics FILE] [--trace FILE]
+#   python cli.py play NAME [--speed X] [--loops N] [--start-offset S | --start-index N | --resume] [--timing MODE]
+#                           [--backend pynput|null|capture] [--max-speed] [--metrics FILE] [--trace FILE]
+#                           [--max-gap S] [--idle-threshold S --idle-scale X] [--catch-up POLICY]
+#   python cli.py validate [NAME ...]
+#   python cli.py convert SOURCE DESTINATION
+#   python cli.py info NAME [--max-gap S] [--idle-threshold S --idle-scale X]
+#   python cli.py list [SEARCH] [--prefix]
+#
+# NAME is a recording in the recordings directory or a path to a recording
+# file. With --json, stdout holds exactly one JSON summary object.
+#
+# A play stopped with ESC or Ctrl+C leaves NAME.checkpoint next to the
+# recording; play --resume continues from it. It is removed once playback
+# completes and ignored if the recording has changed since.
+
+CHECKPOINT_EXTENSION = ".checkpoint"
+
+# Exit statuses
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2  # Used by argparse
+EXIT_NOT_FOUND = 3
+EXIT_INTERRUPTED = 4  # Stopped with ESC or Ctrl+C before finishing
+
+
+class CommandError(Exception):
+    def __init__(self, message, status=EXIT_FAILED):
+        super().__init__(message)
+        self.status = status
+
+
+def elapsed_ms(since=CLI_START):
+    return round((time.perf_counter() - since) * 1000, 1)
+
+
+def resolve_recording(name):
+    """Return the path for a recording name or file path, or raise CommandError."""
+    if os.path.isfile(name):
+        return name
+    path = find_recording(RECORDINGS_DIR, name)
+    if path is None:
+        raise CommandError(f"Recording not found: {name}", EXIT_NOT_FOUND)
+    return path
+
+
+def output_path(name):
+    """Return the file to write for a recording name or file path."""
+    if os.sep in name or name.endswith(RECORDING_EXTENSIONS):
+        return name
+    return recording_path(RECORDINGS_DIR, name, DEFAULT_EXTENSION)
+
+
+def listen_for_stop_hotkey(callback):
+    """Return a HotkeyListener calling callback on ESC, or None if the keyboard can't be hooked."""
+    from engine import HotkeyListener, STOP_HOTKEY
+    try:
+        return HotkeyListener(callback, STOP_HOTKEY)
+    except Exception as e:
+        # No pynput, or no display to hook on a headless machine
+        logger.warning("ESC stop hotkey unavailable (%s); press Ctrl+C to stop.", e)
+        return None
+
+
+def wait_for_stop(done, stop_requested, timeout=None, hotkey=True):
+    """Block until done() is true, ESC or Ctrl+C is pressed, or timeout passes. Returns True if interrupted.
+
+    With hotkey false, or when the keyboard can't be hooked, only Ctrl+C stops early.
+    """
+    hotkey = listen_for_stop_hotkey(stop_requested.set) if hotkey else None
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        while not done() and not stop_requested.is_set():
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(0.05)
+    except KeyboardInterrupt:
+        stop_requested.set()
+    finally:
+        if hotkey is not None:
+            hotkey.stop()
+    return stop_requested.is_set()
+
+
+def start_metrics(path):
+    """Return (Metrics, MetricsWriter) writing Prometheus text to path, or (None, None) without a path."""
+    if not path:
+        return None, None
+    from metrics import Metrics, MetricsWriter
+    metrics = Metrics()
+    return metrics, MetricsWriter(metrics, path).start()
+
+
+def create_tracer(path):
+    if not path:
+        return None
+    from tracer import Tracer
+    return Tracer(path)
+
+
+def command_record(args):
+    from capture import CAPTURE_PRESETS
+    from engine import Recorder
+    from recording_format import save_recording
+    destination = output_path(args.name)
+    metrics, writer = start_metrics(args.metrics)
+    recorder = Recorder(stream=args.stream, capture_policy=CAPTURE_PRESETS[args.capture], metrics=metrics,
+                        tracer=create_tracer(args.trace))
+    recorder.start()
+    logger.info("Recording; press ESC to stop.")
+    started = time.perf_counter()
+    # ESC is the normal way to end a recording, so it is not an interruption
+    stopped_by_hotkey = wait_for_stop(lambda: False, threading.Event(), args.duration)
+    recorder.stop()
+    if writer is not None:
+        writer.stop()
+    events = recorder.events
+    count = len(events)
+    if not count:
+        raise CommandError("Nothing was recorded")
+    try:
+        save_recording(destination, events)
+    finally:
+        if isinstance(events, MappedRecording):
+            events.close()
+    if recorder.autosave_path and os.path.abspath(recorder.autosave_path) != os.path.abspath(destination):
+        os.remove(recorder.autosave_path)
+    summary = {"recording": destination, "events": count,
+               "duration": round(time.perf_counter() - started, 3),
+               "stopped_by": "hotkey" if stopped_by_hotkey else "duration"}
+    if metrics is not None:
+        summary["metrics"] = metrics.snapshot()
+    return EXIT_OK, summary
+
+
+def open_source(path):
+    """Return a playback source for a recording file, streamed from disk if it is large."""
+    from playback_stream import open_playback_stream, STREAM_PLAYBACK_THRESHOLD
+    from plan import compile_events
+    try:
+        if os.path.getsize(path) > STREAM_PLAYBACK_THRESHOLD:
+            return open_playback_stream(path)
+        # A compiled binary recording reads its arguments from the mapping; see close_source()
+        return compile_events(load_recording(path))
+    except (OSError, ValueError) as e:
+        raise CommandError(f"Cannot open {path}: {e}")
+
+
+def close_source(source):
+    """Release the memory mapping behind a source returned by open_source(), if any."""
+    if isinstance(getattr(source, "source", None), MappedRecording):
+        source.source.close()
+
+
+def checkpoint_path(path):
+    return os.path.splitext(path)[0] + CHECKPOINT_EXTENSION
+
+
+def save_checkpoint(path, checkpoint, loops):
+    """Write where playback of the recording at path stopped."""
+    with open(checkpoint_path(path), "w") as f:
+        json.dump({"index": checkpoint.index, "time": checkpoint.time, "iteration": checkpoint.iteration,
+                   "loops": loops, "recording_mtime_ns": os.stat(path).st_mtime_ns}, f)
+
+
+def load_checkpoint(path):
+    """Return the saved checkpoint dict for the recording at path. Raises CommandError if there is none."""
+    try:
+        with open(checkpoint_path(path)) as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        raise CommandError(f"No checkpoint to resume for {path}", EXIT_NOT_FOUND)
+    except (OSError, ValueError) as e:
+        raise CommandError(f"Cannot read checkpoint for {path}: {e}")
+    if checkpoint.get("recording_mtime_ns") != os.stat(path).st_mtime_ns:
+        raise CommandError(f"{path} has changed since its checkpoint was saved")
+    return checkpoint
+
+
+def remove_checkpoint(path):
+    try:
+        os.remove(checkpoint_path(path))
+    except FileNotFoundError:
+        pass
+
+
+def gap_policy_from_args(args):
+    """Return the GapPolicy asked for on the command line, or None to keep the recorded timing."""
+    from pacing import GapPolicy
+    policy = GapPolicy(args.max_gap, args.idle_threshold, args.idle_scale)
+    return None if policy.keeps_everything else policy
+
+
+def command_play(args):
+    from scheduler import start_calibration
+    # Measure sleep overshoot while pynput loads and the recording is compiled
+    start_calibration()
+    from engine import Player
+    from backends import create_backend, DEFAULT_OUTPUT_BACKEND
+    path = resolve_recording(args.name)
+    loops = args.loops
+    start_index = args.start_index
+    completed = 0  # Iterations finished by the run being resumed
+    if args.resume:
+        checkpoint = load_checkpoint(path)
+        start_index = checkpoint["index"]
+        completed = checkpoint["iteration"]
+        loops = checkpoint["loops"]
+    source = open_source(path)
+    if start_index and hasattr(source, "__len__") and start_index >= len(source):
+        raise CommandError(f"--start-index {start_index} is past the last event of {path} ({len(source)} events)",
+                           EXIT_USAGE)
+    gap_policy = gap_policy_from_args(args)
+    if gap_policy is not None:
+        source = gap_policy.apply(source)
+        # Streamed recordings are re-read in the background for this; don't hold up the first event
+        recorded = source.source.duration or 0
+        source.measure_duration(lambda duration: logger.info(
+            "Idle gaps compressed: %.1fs per loop (recorded %.1fs)", duration, recorded))
+    try:
+        backend = create_backend(args.backend)
+    except ImportError as e:
+        raise CommandError(f"The {args.backend} backend is unavailable ({e}); try --backend null or capture")
+    metrics, writer = start_metrics(args.metrics)
+    remaining = loops - completed if loops else 0
+    player = Player(source, loop=remaining != 1, speed=args.speed, timing_mode=args.timing,
+                    loop_count=remaining, start_offset=args.start_offset, backend=backend,
+                    max_speed=args.max_speed, metrics=metrics, tracer=create_tracer(args.trace),
+                    start_index=start_index, catch_up=args.catch_up)
+    if not player.start():
+        raise CommandError(f"{path} has no events to play")
+    started = time.perf_counter()
+    # Only real input needs the ESC hook; null and capture runs are often headless
+    interrupted = wait_for_stop(lambda: not player.playing, threading.Event(),
+                                hotkey=backend.name == DEFAULT_OUTPUT_BACKEND)
+    player.stop()
+    player.wait()
+    if writer is not None:
+        writer.stop()
+    if player.error:
+        raise CommandError(f"Playback failed: {player.error}")
+    checkpoint = player.checkpoint
+    if checkpoint is not None:
+        checkpoint = checkpoint._replace(iteration=completed + checkpoint.iteration)
+        save_checkpoint(path, checkpoint, loops)
+    else:
+        remove_checkpoint(path)
+    first_event_ms = round((player.first_event_time - CLI_START) * 1000, 1) if player.first_event_time else None
+    summary = {
+        "recording": path,
+        "backend": backend.name,
+        "events_played": player.events_played,
+        "iterations": completed + player.iterations,
+        "catch_ups": player.catch_ups,
+        "moves_skipped": player.moves_skipped,
+        "elapsed": round(time.perf_counter() - started, 3),
+        "first_event_ms": first_event_ms,
+    }
+    if hasattr(backend, "effects"):
+        summary["effects"] = len(backend.effects)
+    if gap_policy is not None:
+        summary["projected_duration"] = round(source.compute_duration(), 3)
+    if checkpoint is not None:
+        summary["checkpoint"] = checkpoint._asdict()
+    if metrics is not None:
+        summary["metrics"] = metrics.snapshot()
+    return EXIT_INTERRUPTED if interrupted else EXIT_OK, summary
+
+
+def validate_recording(path):
+    """Play one recording through the null backend at max speed and return a result dict."""
+    from engine import Player
+    from backends import NullBackend
+    result = {"recording": path, "events": None, "events_played": 0, "error": None}
+    try:
+        source = open_source(path)
+    except CommandError as e:
+        result["error"] = str(e)
+        return result
+    if hasattr(source, "__len__"):
+        result["events"] = len(source)
+    player = Player(source, backend=NullBackend(), max_speed=True)
+    if player.start():
+        player.wait()
+    close_source(source)
+    result["events_played"] = player.events_played
+    if player.error:
+        result["error"] = f"Playback failed: {player.error}"
+    elif result["events"] is not None and player.events_played != result["events"]:
+        result["error"] = f"Played {player.events_played} of {result['events']} events"
+    return result
+
+
+def command_validate(args):
+    if args.names:
+        paths = [resolve_recording(name) for name in args.names]
+    elif os.path.isdir(RECORDINGS_DIR):
+        from catalog import Catalog
+        catalog = Catalog(RECORDINGS_DIR)
+        try:
+            catalog.refresh(full=False)
+            paths = [os.path.join(RECORDINGS_DIR, entry.filename) for entry in catalog.entries()]
+        finally:
+            catalog.close()
+    else:
+        paths = []
+    started = time.perf_counter()
+    results = [validate_recording(path) for path in paths]
+    failed = sum(1 for result in results if result["error"])
+    return EXIT_FAILED if failed else EXIT_OK, {
+        "recordings": results,
+        "failed": failed,
+        "elapsed": round(time.perf_counter() - started, 3),
+    }
+
+
+def command_convert(args):
+    if not os.path.isfile(args.source):
+        raise CommandError(f"Recording not found: {args.source}", EXIT_NOT_FOUND)
+    try:
+        count = convert_recording(args.source, args.destination)
+    except ValueError as e:
+        raise CommandError(f"Cannot convert {args.source}: {e}")
+    return EXIT_OK, {"source": args.source, "destination": args.destination, "events": count}
+
+
+def command_info(args):
+    from catalog import Catalog, read_entry
+    path = resolve_recording(args.name)
+    entry = None
+    if os.path.dirname(os.path.abspath(path)) == os.path.abspath(RECORDINGS_DIR):
+        # Recordings in the recordings directory come from the catalog
+        catalog = Catalog(RECORDINGS_DIR)
+        try:
+            catalog.refresh(full=False)
+            entry = catalog.get(recording_name(os.path.basename(path)))
+        finally:
+            catalog.close()
+        if entry is not None and entry.filename != os.path.basename(path):
+            entry = None
+    if entry is None:
+        try:
+            entry = read_entry(path)
+        except ValueError as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+    summary = entry._asdict()
+    gap_policy = gap_policy_from_args(args)
+    if gap_policy is not None:
+        # How long playback would take with idle gaps compressed, at 1x speed
+        source = open_source(path)
+        summary["projected_duration"] = round(gap_policy.apply(source).compute_duration(), 3)
+        close_source(source)
+    return EXIT_OK, summary
+
+
+def command_list(args):
+    from catalog import Catalog
+    if not os.path.isdir(RECORDINGS_DIR):
+        return EXIT_OK, {"recordings": []}
+    catalog = Catalog(RECORDINGS_DIR)
+    try:
+        catalog.refresh(full=False)
+        entries = catalog.search(args.search, prefix=args.prefix) if args.search else catalog.entries()
+    finally:
+        catalog.close()
+    return EXIT_OK, {"recordings": [entry._asdict() for entry in entries]}
+
+
+def print_summary(command, summary):
+    """Print the summary for people rather than as JSON."""
+    if command == "list":
+        from catalog import CatalogEntry, describe_entry
+        for entry in summary["recordings"]:
+            print(f"{entry['name']}: {describe_entry(CatalogEntry(**entry))}")
+    elif command == "info":
+        from catalog import CatalogEntry, describe_entry
+        entry = CatalogEntry(**{field: summary[field] for field in CatalogEntry._fields})
+        print(f"{summary['name']}: {describe_entry(entry)}")
+        if "projected_duration" in summary:
+            print(f"projected duration: {summary['projected_duration']:.1f}s")
+    elif command == "validate":
+        for result in summary["recordings"]:
+            print(f"{result['recording']}: {result['error'] or 'ok'} ({result['events_played']} events)")
+        print(f"{len(summary['recordings'])} recordings checked, {summary['failed']} failed "
+              f"in {summary['elapsed']:.2f}s")
+    else:
+        for key, value in summary.items():
+            if key not in ("command", "status", "exit_status", "metrics"):
+                print(f"{key}: {value}")
+
+
+def add_gap_arguments(parser):
+    parser.add_argument("--max-gap", type=float, help="shorten every pause between events to at most this many seconds")
+    parser.add_argument("--idle-threshold", type=float,
+                        help="pauses longer than this many seconds are scaled by --idle-scale; shorter ones keep their timing")
+    parser.add_argument("--idle-scale", type=float, default=1.0,
+                        help="multiplier for the part of a pause above --idle-threshold (default: 1.0)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Record and play back AutoWiz macros without the GUI.")
+    parser.add_argument("--json", action="store_true", help="print a single JSON summary on stdout")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only log warnings and errors")
+    # The same options are accepted after the command name
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--json", action="store_true", default=argparse.SUPPRESS, help=argparse.SUPPRESS)
+    common.add_argument("-q", "--quiet", action="store_true", default=argparse.SUPPRESS, help=argparse.SUPPRESS)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", parents=[common], help="record until ESC is pressed or --duration passes")
+    record.add_argument("name", help="recording name, or a .awz/.json path")
+    record.add_argument("--duration", type=float, help="stop after this many seconds")
+    record.add_argument("--stream", action="store_true", help="stream events to disk while recording")
+    record.add_argument("--capture", default="Full", help="mouse move capture preset (default: Full)")
+    record.add_argument("--metrics", metavar="FILE", help="write Prometheus metrics to FILE every few seconds")
+    record.add_argument("--trace", metavar="FILE", help="write a Chrome/Perfetto trace to FILE when recording stops")
+
+    play = commands.add_parser("play", parents=[common], help="play a recording until it ends or ESC is pressed")
+    play.add_argument("name", help="recording name or path")
+    play.add_argument("--speed", type=float, default=1.0, help="playback speed multiplier (default: 1.0)")
+    play.add_argument("--loops", type=int, default=1, help="times to play the recording; 0 repeats until stopped")
+    start = play.add_mutually_exclusive_group()
+    start.add_argument("--start-offset", type=float, default=0.0, help="seconds into the recording to start at")
+    start.add_argument("--start-index", type=int, default=0, help="event index to start at")
+    start.add_argument("--resume", action="store_true", help="continue from where the last stopped play left off")
+    play.add_argument("--timing", default=None, help="timing mode: precise, balanced or low-power")
+    play.add_argument("--backend", default=None, help="where events go: pynput (default), null or capture")
+    play.add_argument("--max-speed", action="store_true", help="play events back to back, ignoring their timing")
+    play.add_argument("--catch-up", default=None,
+                      help="when playback falls behind: burst (default), shift or skip-moves")
+    play.add_argument("--metrics", metavar="FILE", help="write Prometheus metrics to FILE every few seconds")
+    play.add_argument("--trace", metavar="FILE", help="write a Chrome/Perfetto trace to FILE when playback ends")
+    add_gap_arguments(play)
+
+    validate = commands.add_parser("validate", parents=[common],
+                                   help="play recordings at max speed without touching the mouse or keyboard")
+    validate.add_argument("names", nargs="*", help="recording names or paths (default: all saved recordings)")
+
+    convert = commands.add_parser("convert", parents=[common], help="convert between .json and .awz")
+    convert.add_argument("source")
+    convert.add_argument("destination")
+
+    info = commands.add_parser("info", parents=[common], help="show duration, event counts and area of a recording")
+    info.add_argument("name", help="recording name or path")
+    add_gap_arguments(info)
+
+    listing = commands.add_parser("list", parents=[common], help="list saved recordings")
+    listing.add_argument("search", nargs="?", help="only show names containing this text")
+    listing.add_argument("--prefix", action="store_true", help="match the search text at the start of names")
+    return parser
+
+
+COMMANDS = {
+    "record": command_record,
+    "play": command_play,
+    "validate": command_validate,
+    "convert": command_convert,
+    "info": command_info,
+    "list": command_list,
+}
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    # Logs go to stderr so stdout only carries the summary
+    configure_logging(level=logging.WARNING if args.quiet else None, stream=sys.stderr)
+    if args.command == "play":
+        from scheduler import TIMING_MODES, DEFAULT_TIMING_MODE
+        args.timing = args.timing or DEFAULT_TIMING_MODE
+        if args.timing not in TIMING_MODES:
+            parser.error(f"unknown timing mode: {args.timing}")
+        from backends import OUTPUT_BACKENDS, DEFAULT_OUTPUT_BACKEND
+        args.backend = args.backend or DEFAULT_OUTPUT_BACKEND
+        if args.backend not in OUTPUT_BACKENDS:
+            parser.error(f"unknown output backend: {args.backend}")
+        from scheduler import CATCH_UP_POLICIES, DEFAULT_CATCH_UP_POLICY
+        args.catch_up = args.catch_up or DEFAULT_CATCH_UP_POLICY
+        if args.catch_up not in CATCH_UP_POLICIES:
+            parser.error(f"unknown catch-up policy: {args.catch_up}")
+        if args.speed <= 0 or args.loops < 0 or args.start_offset < 0 or args.start_index < 0:
+            parser.error("--speed must be positive and --loops, --start-offset and --start-index not negative")
+    if args.command in ("play", "info"):
+        if (args.max_gap is not None and args.max_gap < 0 or args.idle_threshold is not None
+                and args.idle_threshold < 0 or args.idle_scale < 0):
+            parser.error("--max-gap, --idle-threshold and --idle-scale must not be negative")
+        if args.idle_scale != 1.0 and args.idle_threshold is None:
+            parser.error("--idle-scale needs --idle-threshold")
+    if args.command == "record":
+        from capture import CAPTURE_PRESETS
+        if args.capture not in CAPTURE_PRESETS:
+            parser.error(f"unknown capture preset: {args.capture}")
+
+    try:
+        status, summary = COMMANDS[args.command](args)
+        error = None
+    except CommandError as e:
+        status, summary, error = e.status, {}, str(e)
+    except (OSError, ValueError, ImportError) as e:
+        # ImportError: pynput is missing where a command needs the keyboard and mouse
+        status, summary, error = EXIT_FAILED, {}, str(e)
+    if args.json:
+        print(json.dumps({"command": args.command, "exit_status": status, "error": error,
+                          "runtime_ms": elapsed_ms(), **summary}))
+    elif error:
+        print(f"Error: {error}", file=sys.stderr)
+    else:
+        print_summary(args.command, summary)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
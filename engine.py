@@ -0,0 +1,749 @@
+import threading
+import time
+from bisect import bisect_left
+import os
+import logging
+from collections import deque, namedtuple
+from log import logger
+from input_hub import get_input_hub, key_name
+from metrics import timed, DEPTH_BUCKETS, ITERATION_BUCKETS
+from tracer import traced
+from io_task import OperationCancelled
+from scheduler import Scheduler, Timeline, DEFAULT_TIMING_MODE
+from scheduler import CATCH_UP_POLICIES, DEFAULT_CATCH_UP_POLICY, CATCH_UP_AFTER
+from event_buffer import EventBuffer
+from recording_format import load_recording, save_recording, recording_path, RECORDINGS_DIR
+from recording_format import MappedRecording, RECORDING_EXTENSIONS, DEFAULT_EXTENSION, BINARY_EXTENSION
+from stream_log import StreamingLog, new_log_path, finalize_log
+from plan import PlaybackPlan, OP_NAMES, compile_events, compile_event, playback_state
+from plan import OP_KEY_RELEASE, OP_MOVE, OP_BUTTON_RELEASE
+from backends import create_backend
+
+# Recording and playback engine shared by the Tk application and the
+# headless command line. Nothing here may import tkinter.
+
+# Constants for the unified stop hotkey, as recorded key names
+STOP_HOTKEY = {"Key.esc"}
+
+# Raw event kinds pushed by the hook callbacks
+RAW_KEY_PRESS = 0
+RAW_KEY_RELEASE = 1
+RAW_MOVE = 2
+RAW_CLICK = 3
+RAW_SCROLL = 4
+
+RAW_NAMES = ("Keyboard Press", "Keyboard Release", "Mouse Move", "Mouse Click", "Mouse Scroll")
+
+# Metric label values for raw event kinds and plan opcodes, e.g. "mouse_move"
+RAW_LABELS = tuple(name.lower().replace(" ", "_") for name in RAW_NAMES)
+OP_LABELS = tuple(name.lower().replace(" ", "_") for name in OP_NAMES)
+
+# Where a stopped playback can be resumed: the index of the first step that
+# did not run, its recording time, and how many iterations had completed
+PlaybackCheckpoint = namedtuple("PlaybackCheckpoint", ["index", "time", "iteration"])
+
+# How long the consumer thread sleeps when the hook queue is empty
+CONSUMER_POLL_INTERVAL = 0.005
+# Raw events normalized before the consumer yields the GIL back to the hooks
+CONSUMER_BATCH_SIZE = 256
+
+
+class Recorder:
+    def __init__(self, stream=False, capture_policy=None, bus=None, hub=None, metrics=None, tracer=None):
+        # In stream mode events go to an append-only session log on disk
+        # instead of memory, and are finalized into a recording on stop
+        self.stream = stream
+        self.log_path = None
+        self.autosave_path = None  # Recording finalized from the last streamed session
+        # Which mouse moves to keep; None records every move
+        self.capture_policy = capture_policy
+        self.move_coalescer = None
+        self.bus = bus  # UIBus that errors are reported to, if any
+        self.events = EventBuffer()
+        self.plan = None  # Compiled playback plan for self.events, built on demand
+        self.start_time = None
+        self.start_ns = 0
+        self.recording = False
+        self.debug = False  # Cached at start so the consumer skips per-event logging cheaply
+        self.hub = hub  # InputHub the hooks come from; the shared one if None
+        self.subscription = None
+        self.metrics = metrics  # Metrics registry to update, or None to skip all instrumentation
+        self.tracer = tracer  # Tracer that records hook and consumer spans, written on stop
+        self._event_counters = None
+        self._queue_depth = None
+        # Hook callbacks only append raw tuples here; deque appends and pops
+        # are atomic, so the handoff to the consumer thread needs no lock
+        self.raw_queue = deque()
+        self._push = self.raw_queue.append
+        self.consumer_thread = None
+        self._consumer_stop = threading.Event()
+
+    def start(self, listen=True):
+        """Start capturing. With listen=False no OS hooks are installed and the
+        on_* callbacks can be fed directly, e.g. from benchmarks."""
+        self.close_events()
+        self.autosave_path = None
+        if self.stream:
+            os.makedirs(RECORDINGS_DIR, exist_ok=True)
+            self.log_path = new_log_path(RECORDINGS_DIR)
+            self.events = StreamingLog(self.log_path)
+        else:
+            self.events = EventBuffer()
+        self.raw_queue.clear()
+        policy = self.capture_policy
+        self.move_coalescer = policy.new_coalescer() if policy and not policy.keeps_everything else None
+        self.start_time = time.time()
+        self.start_ns = time.perf_counter_ns()
+        self.debug = logger.isEnabledFor(logging.DEBUG)
+        callbacks = {"on_press": self.on_press, "on_release": self.on_release, "on_move": self.on_move,
+                     "on_click": self.on_click, "on_scroll": self.on_scroll}
+        metrics = self.metrics
+        if metrics is not None:
+            self._event_counters = tuple(
+                metrics.counter("autowiz_recorder_events_total", "Input events received from the hooks", type=label)
+                for label in RAW_LABELS)
+            self._queue_depth = metrics.histogram("autowiz_recorder_queue_depth",
+                                                  "Hook events waiting each time the consumer drains",
+                                                  DEPTH_BUCKETS)
+            # Each hook thread only writes its own callback's histogram
+            callbacks = {name: timed(callback, metrics.histogram(
+                "autowiz_recorder_hook_seconds", "Time the recorder holds the input hook thread", callback=name))
+                for name, callback in callbacks.items()}
+        if self.tracer is not None:
+            callbacks = {name: traced(callback, self.tracer, name, "hook") for name, callback in callbacks.items()}
+        self._consumer_stop.clear()
+        self.consumer_thread = threading.Thread(target=self.consume_loop, name="autowiz-recorder", daemon=True)
+        self.consumer_thread.start()
+        self.recording = True
+
+        if listen:
+            hub = self.hub or get_input_hub()
+            self.subscription = hub.subscribe(**callbacks)
+
+        logger.info("Recording started...")
+
+    def stop(self, finalize=True):
+        """Stop capturing. A streamed recording's log is flushed and, unless
+        finalize is False, turned into a recording with finalize_stream()."""
+        self.recording = False
+        if self.subscription is not None:
+            self.subscription.cancel()
+            self.subscription = None
+        # Let the consumer drain what the hooks already queued
+        self._consumer_stop.set()
+        if self.consumer_thread is not None:
+            self.consumer_thread.join()
+            self.consumer_thread = None
+            self.finish_consuming()
+        if isinstance(self.events, StreamingLog):
+            self.events.close()
+            self.events = EventBuffer()
+            if finalize:
+                self.finalize_stream()
+        logger.info("Recording stopped.")
+        if self.tracer is not None:
+            self.tracer.write()
+
+    @property
+    def stream_pending(self):
+        """True once a streamed recording has stopped but its log is not a recording yet."""
+        return not self.recording and self.log_path is not None
+
+    def finalize_stream(self, progress=None):
+        """Turn the closed session log into a normal recording and load it for preview or saving.
+
+        Slow for long recordings, so the GUI runs it as an IOTask. Returns
+        the path of the recording, or None.
+        """
+        try:
+            self.autosave_path = finalize_log(self.log_path, RECORDINGS_DIR, progress=progress)
+        except (OSError, ValueError) as e:
+            # The log stays on disk and will be recovered on the next start
+            logger.error("Error finalizing session log %s: %s", self.log_path, e)
+            return None
+        self.log_path = None
+        if self.autosave_path:
+            self.events = load_recording(self.autosave_path)
+            logger.info("Streamed recording saved to %s", self.autosave_path)
+        return self.autosave_path
+
+    # The on_* callbacks run inside the OS input hook threads. They only take a
+    # timestamp and queue the raw arguments; consume_loop does everything else.
+
+    def on_press(self, key):
+        if self.recording:
+            self._push((time.perf_counter_ns(), RAW_KEY_PRESS, key))
+
+    def on_release(self, key):
+        if self.recording:
+            self._push((time.perf_counter_ns(), RAW_KEY_RELEASE, key))
+
+    def on_move(self, x, y):
+        if self.recording:
+            self._push((time.perf_counter_ns(), RAW_MOVE, x, y))
+
+    def on_click(self, x, y, button, pressed):
+        if self.recording:
+            self._push((time.perf_counter_ns(), RAW_CLICK, x, y, button, pressed))
+
+    def on_scroll(self, x, y, dx, dy):
+        if self.recording:
+            self._push((time.perf_counter_ns(), RAW_SCROLL, x, y, dx, dy))
+
+    def consume_loop(self):
+        """Drain the hook queue into self.events until stop() is called."""
+        queue_depth = self._queue_depth
+        tracer = self.tracer
+        while not self._consumer_stop.is_set():
+            if queue_depth is not None:
+                queue_depth.observe(len(self.raw_queue))
+            if tracer is None:
+                handled = self.drain_raw_queue(CONSUMER_BATCH_SIZE)
+            else:
+                start = time.perf_counter()
+                handled = self.drain_raw_queue(CONSUMER_BATCH_SIZE)
+                if handled:
+                    tracer.span("drain", "recorder", start, time.perf_counter(), {"events": handled})
+            if handled == CONSUMER_BATCH_SIZE:
+                time.sleep(0)  # Backlog left; yield so hook callbacks are not kept waiting
+            elif not handled:
+                self._consumer_stop.wait(CONSUMER_POLL_INTERVAL)
+
+    def finish_consuming(self):
+        """Drain whatever the hooks queued last and flush the held-back move. Runs in stop()
+        after the consumer thread has ended, so queued events are kept even if it died."""
+        self.drain_raw_queue()
+        if self.move_coalescer is not None:
+            # Always keep the final cursor position
+            self.flush_pending_move()
+            if self.move_coalescer.dropped:
+                logger.info("Capture policy dropped %d mouse moves", self.move_coalescer.dropped)
+                if self.metrics is not None:
+                    self.metrics.counter("autowiz_recorder_moves_dropped_total",
+                                         "Mouse moves dropped by the capture policy").inc(self.move_coalescer.dropped)
+
+    def flush_pending_move(self):
+        pending = self.move_coalescer.take_pending()
+        if pending is not None:
+            self.events.append_move(*pending)
+
+    def drain_raw_queue(self, limit=None):
+        """Normalize up to limit queued raw hook events into self.events. Returns how many were handled."""
+        queue = self.raw_queue
+        events = self.events
+        start_ns = self.start_ns
+        debug = self.debug
+        coalescer = self.move_coalescer
+        flush_before_input = coalescer is not None and coalescer.policy.keep_position_before_click
+        counters = self._event_counters
+        handled = 0
+        while queue and handled != limit:
+            raw = queue.popleft()
+            handled += 1
+            try:
+                timestamp = (raw[0] - start_ns) / 1e9
+                kind = raw[1]
+                if counters is not None:
+                    counters[kind].value += 1
+                if kind == RAW_MOVE:
+                    if coalescer is not None:
+                        # Keep where the previous motion came to rest before starting the next
+                        resting = coalescer.take_resting(timestamp)
+                        if resting is not None:
+                            events.append_move(*resting)
+                        if not coalescer.accept(timestamp, raw[2], raw[3]):
+                            continue
+                    events.append_move(timestamp, raw[2], raw[3])
+                elif kind == RAW_CLICK:
+                    if flush_before_input:
+                        self.flush_pending_move()
+                    events.append_click(timestamp, raw[2], raw[3], raw[4].name, raw[5])
+                elif kind == RAW_SCROLL:
+                    if flush_before_input:
+                        self.flush_pending_move()
+                    events.append_scroll(timestamp, raw[2], raw[3], raw[4], raw[5])
+                else:
+                    key = self.get_key_name(raw[2])
+                    if key in STOP_HOTKEY:
+                        # Don't record the stop hotkey
+                        continue
+                    if flush_before_input:
+                        self.flush_pending_move()
+                    events.append_key(timestamp, key, kind == RAW_KEY_PRESS)
+                if debug:
+                    logger.debug("Recorded %s: %s at %.3fs", RAW_NAMES[kind], raw[2:], timestamp)
+            except Exception as e:
+                # One bad event must not stop the recording; the hooks keep queueing
+                logger.error("Error recording %s %s: %s", RAW_NAMES[raw[1]], raw[2:], e)
+        return handled
+
+    def close_events(self):
+        """Release the memory mapping behind loaded binary events, if any."""
+        if isinstance(self.events, MappedRecording):
+            self.events.close()
+
+    def get_plan(self):
+        """Return the playback plan for the current events, compiling it only when they changed."""
+        if self.plan is None or not self.plan.is_compiled_from(self.events):
+            self.plan = compile_events(self.events)
+        return self.plan
+
+    def get_key_name(self, key):
+        return key_name(key)
+
+    def save_events(self, name, extension=DEFAULT_EXTENSION, progress=None):
+        # Sanitize the recording name
+        safe_name = "".join([c for c in name if c.isalpha() or c.isdigit() or c in (' ', '_', '-')]).rstrip()
+        if not safe_name:
+            safe_name = f"recording_{int(time.time())}"
+        filename = recording_path(RECORDINGS_DIR, safe_name, extension)
+        try:
+            os.makedirs(RECORDINGS_DIR, exist_ok=True)
+            if (extension == BINARY_EXTENSION and isinstance(self.events, MappedRecording)
+                    and self.events.path == self.autosave_path):
+                # A streamed recording is already on disk in the right format; just rename it
+                self.events.close()
+                os.replace(self.autosave_path, filename)
+                self.autosave_path = None
+                self.events = load_recording(filename)
+            else:
+                if isinstance(self.events, MappedRecording):
+                    # A mapped file cannot be replaced while it is open on every platform
+                    events = EventBuffer.from_events(self.events)
+                    self.events.close()
+                    self.events = events
+                save_recording(filename, self.events, progress)
+            # Drop a copy of the same recording left in the other format
+            for other_extension in RECORDING_EXTENSIONS:
+                stale = recording_path(RECORDINGS_DIR, safe_name, other_extension)
+                if other_extension != extension and os.path.exists(stale):
+                    os.remove(stale)
+            logger.info("Events saved to %s", filename)
+            return filename
+        except OperationCancelled:
+            logger.info("Save cancelled.")
+            raise
+        except Exception as e:
+            logger.error("Error saving events: %s", e)
+            self.report_error(f"Failed to save events: {e}")
+            return None
+
+    def load_events(self, filename, progress=None):
+        try:
+            events = load_recording(filename, progress)
+            self.close_events()
+            self.events = events
+            logger.info("Events loaded from %s", filename)
+            return True
+        except OperationCancelled:
+            logger.info("Load cancelled.")
+            raise
+        except FileNotFoundError:
+            logger.warning("No recorded events found. Please record actions first.")
+            self.report_error("No recorded events found. Please record actions first.")
+            return False
+        except ValueError:  # Also covers json.JSONDecodeError
+            logger.error("Recorded events file is corrupted.")
+            self.report_error("Recorded events file is corrupted.")
+            return False
+        except Exception as e:
+            logger.error("Error loading events: %s", e)
+            self.report_error(f"Failed to load events: {e}")
+            return False
+
+    def report_error(self, message):
+        if self.bus:
+            self.bus.post("error", "Error", message)
+
+
+class Player:
+    def __init__(self, events, loop=False, speed=1.0, progress_callback=None, timing_mode=DEFAULT_TIMING_MODE,
+                 bus=None, loop_count=0, start_offset=0.0, backend=None, max_speed=False, metrics=None,
+                 tracer=None, start_index=0, gap_policy=None, catch_up=DEFAULT_CATCH_UP_POLICY):
+        # Accept raw recorded events, an already compiled plan, or a chunked
+        # source that streams the recording from disk (see playback_stream)
+        if isinstance(events, PlaybackPlan) or hasattr(events, "chunks"):
+            self.source = events
+        else:
+            self.source = compile_events(events)
+        # Idle pauses are shortened by playing a retimed view of the source
+        if gap_policy is not None and not gap_policy.keeps_everything:
+            self.source = gap_policy.apply(self.source)
+        self.events = events
+        self.playing = False
+        self.loop = loop
+        self.loop_count = loop_count  # Iterations to play when looping; 0 loops until stopped
+        # Where the first iteration starts: a recording time, or a step index
+        # (e.g. from a checkpoint), which takes precedence when non-zero
+        self.start_offset = start_offset
+        if start_index < 0 or start_index and hasattr(self.source, "__len__") and start_index >= len(self.source):
+            raise ValueError(f"Start index {start_index} is outside the recording")
+        self.start_index = start_index
+        self.speed = speed
+        # Maps recording time to wall time; set_speed() and ramp_speed() change it mid-run
+        self.timeline = Timeline(speed)
+        self.tracer = tracer  # Tracer that records per-event and scheduler spans, written when playback ends
+        self.scheduler = Scheduler(timing_mode, tracer=tracer)
+        self.max_speed = max_speed  # Fire events back to back, ignoring their times
+        if catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"Unknown catch-up policy: {catch_up}")
+        self.catch_up = catch_up  # What to do about events that are overdue (see CATCH_UP_POLICIES)
+        # Where events go; the real keyboard and mouse unless a backend is given
+        self.backend = backend if backend is not None else create_backend()
+        self.handlers = self.backend.handlers()
+        self.metrics = metrics  # Metrics registry to update, or None to skip all instrumentation
+        self.play_thread = None
+        self.progress_callback = progress_callback  # Called from the playback thread with 0-100
+        self.bus = bus  # UIBus told when playback ends or fails, if any
+        # Outcome of the last run, for callers without a bus
+        self.iterations = 0
+        self.events_played = 0
+        self.first_event_time = None  # perf_counter() when the first event fired
+        self.iteration_start = None  # perf_counter() that recording time 0 mapped to when the current iteration started
+        self.checkpoint = None  # PlaybackCheckpoint if the last run was stopped part way through
+        self.catch_ups = 0  # Times the catch-up policy acted on an overdue event
+        self.moves_skipped = 0  # Overdue moves dropped by the skip-moves policy
+        self.error = None
+
+    def start(self):
+        """Start the playback thread. Returns False if there is nothing to play."""
+        if hasattr(self.source, "__len__") and not len(self.source):
+            logger.warning("No events to play.")
+            if self.bus:
+                self.bus.post("warning", "Warning", "No recorded events to play.")
+            return False
+        self.playing = True
+        self.play_thread = threading.Thread(target=self.play_loop, daemon=True)
+        self.play_thread.start()
+        logger.info("Playback started...")
+        if self.progress_callback:
+            self.progress_callback(0)  # Initialize progress
+        return True
+
+    def wait(self, timeout=None):
+        """Block until the playback thread exits. Returns False on timeout."""
+        if self.play_thread:
+            self.play_thread.join(timeout)
+            return not self.play_thread.is_alive()
+        return True
+
+    def stop(self):
+        self.playing = False
+        self.timeline.cancel_ramp()
+        logger.info("Playback stopped.")
+
+    def set_speed(self, speed):
+        """Change the playback speed; the remaining events follow it from now on."""
+        self.timeline.set_speed(speed)
+        self.speed = speed
+        logger.info("Playback speed set to %sx", speed)
+
+    def ramp_speed(self, speed, duration):
+        """Change the playback speed gradually to speed over duration seconds."""
+        self.timeline.ramp(speed, duration)
+        self.speed = speed
+        logger.info("Ramping playback speed to %sx over %ss", speed, duration)
+
+    def is_playing(self):
+        return self.playing
+
+    def play_loop(self):
+        handlers = self.handlers
+        perf_counter = time.perf_counter
+        debug = logger.isEnabledFor(logging.DEBUG)
+        timeline = self.timeline
+        wait = not self.max_speed
+        played = 0
+        first_event_time = None
+        metrics = self.metrics
+        tracer = self.tracer
+        observe = self.event_observer(metrics, tracer)
+        if metrics is not None:
+            iteration_seconds = metrics.histogram("autowiz_player_iteration_seconds",
+                                                  "Wall time of each completed playback iteration", ITERATION_BUCKETS)
+        progress_callback = self.progress_callback
+        if tracer is not None and progress_callback:
+            progress_callback = traced(progress_callback, tracer, "progress", "ui")
+        catch_up = self.catch_up
+        shift = catch_up == "shift"
+        skip_moves = catch_up == "skip-moves"
+        catch_up_counter = skipped_counter = None
+        if metrics is not None:
+            catch_up_counter = metrics.counter("autowiz_player_catch_ups_total",
+                                               "Overdue events the catch-up policy acted on", policy=catch_up)
+            skipped_counter = metrics.counter("autowiz_player_moves_skipped_total",
+                                              "Overdue mouse moves dropped to catch up")
+        self.checkpoint = None
+        while self.playing:
+            try:
+                logger.debug("Starting playback iteration...")
+                iteration_started = perf_counter()
+
+                # The first iteration may start part way into the recording,
+                # at a step index or else at a recording time
+                seek_index = self.start_index if self.iterations == 0 else 0
+                offset = self.start_offset if self.iterations == 0 and not seek_index else 0.0
+                seeking = bool(seek_index or offset)
+
+                # Anchor the timeline for this iteration. Targets are recomputed
+                # from the anchor whenever its version changes, i.e. after a
+                # speed change, so the remaining events follow the new rate
+                self.iteration_start = timeline.start(offset)
+                version = timeline.version
+                start_time, speed = timeline.anchor
+                scale = 1.0 / speed
+
+                def keep_waiting():
+                    return self.playing and timeline.version == version
+                
+                # A compiled plan is a single chunk reused by every iteration;
+                # streamed sources are re-read from disk with read-ahead
+                chunks = self.source.chunks()
+                base = 0  # Index of the chunk's first step within the recording
+                next_index = 0  # First step that has not run yet
+                try:
+                    for chunk in chunks:
+                        # Everything the inner loop touches is resolved once per chunk
+                        times = chunk.times
+                        ops = chunk.ops
+                        args = chunk.args
+                        count = len(times)
+                        first = 0
+                        # A retimed source measures its duration in the background
+                        total_time = self.source.duration or 0
+                        if seeking:
+                            # Binary search for the first step to play. The
+                            # offset is in recording time, before any retiming
+                            original = getattr(chunk, "original_times", times)
+                            if seek_index:
+                                first = seek_index - base
+                            elif count and original[-1] >= offset:
+                                first = bisect_left(original, offset)
+                            else:
+                                first = count
+                            if first >= count:
+                                base += count
+                                continue  # The whole chunk is before the start point
+                            seeking = False
+                            self.restore_state(base + first)
+                            # Anchor the timeline so the seek point is now, keeping
+                            # the (retimed) pause between the offset and the first step
+                            lead = original[first] - offset if offset else 0.0
+                            if lead and original is not times:
+                                lead = self.source.retime_gap(lead)
+                            self.iteration_start = timeline.start(times[first] - lead)
+                        for i in range(first, count):
+                            if not self.playing:
+                                break
+                            if timeline.version != version:
+                                version = timeline.version
+                                start_time, speed = timeline.anchor
+                                scale = 1.0 / speed
+                                
+                            # Calculate when this event should occur relative to start time
+                            target_time = start_time + times[i] * scale
+                            
+                            if wait:
+                                now = perf_counter()
+                                # If we're ahead of schedule, wait until the right moment
+                                if now < target_time:
+                                    while not self.scheduler.wait_until(target_time, keep_waiting):
+                                        if not self.playing:
+                                            break
+                                        # The speed changed during the wait; aim for the re-anchored time
+                                        version = timeline.version
+                                        start_time, speed = timeline.anchor
+                                        scale = 1.0 / speed
+                                        target_time = start_time + times[i] * scale
+                                    if not self.playing:
+                                        break  # Stopped during the wait; this step has not run
+                                elif now - target_time > CATCH_UP_AFTER:
+                                    # Behind schedule; a burst just fires the step now
+                                    late = now - target_time
+                                    acted = True
+                                    if shift:
+                                        # Delay everything left so the gaps after the stall keep their timing
+                                        timeline.shift(late)
+                                        version = timeline.version
+                                        start_time, speed = timeline.anchor
+                                        target_time = start_time + times[i] * scale
+                                    elif skip_moves:
+                                        # Drop a move only if the next step is overdue too
+                                        acted = (ops[i] == OP_MOVE and i + 1 < count
+                                                 and start_time + times[i + 1] * scale <= now)
+                                    if acted:
+                                        self.catch_ups += 1
+                                        if catch_up_counter is not None:
+                                            catch_up_counter.inc()
+                                        if tracer is not None:
+                                            tracer.instant(catch_up, "catch-up", now, {"late_ms": late * 1000})
+                                        if skip_moves:
+                                            self.moves_skipped += 1
+                                            if skipped_counter is not None:
+                                                skipped_counter.inc()
+                                            continue
+                            
+                            # Execute the event
+                            op = ops[i]
+                            try:
+                                if observe is None:
+                                    handlers[op](*args[i])
+                                else:
+                                    fired = perf_counter()
+                                    handlers[op](*args[i])
+                                    observe(i, op, target_time, fired, perf_counter())
+                            except Exception as e:
+                                logger.error("Error executing %s %s: %s", OP_NAMES[op], args[i], e)
+                                raise e  # Re-raise exception to be caught below
+                            played += 1
+                            if first_event_time is None:
+                                first_event_time = self.first_event_time = perf_counter()
+                            if debug:
+                                logger.debug("Executed %s: %s", OP_NAMES[op], args[i])
+                            # Update progress
+                            if progress_callback and total_time > 0:
+                                progress = (times[i] / total_time) * 100
+                                progress_callback(progress)
+                        else:
+                            i = count
+                        next_index = base + i
+                        self.events_played = played
+                        if not self.playing:
+                            logger.info("Playback interrupted by user.")
+                            # In recording time, not the time idle-gap compression moved the step to
+                            original = getattr(chunk, "original_times", chunk.times)
+                            self.checkpoint = PlaybackCheckpoint(
+                                next_index, original[min(i, count - 1)] if count else 0.0, self.iterations)
+                            break
+                        base += count
+                finally:
+                    if hasattr(chunks, "close"):
+                        chunks.close()  # Stops the read-ahead thread of a streamed source
+
+                if not self.playing:
+                    # Stopped by the user; let go of anything the recording still holds down
+                    self.release_held(next_index)
+                    break
+                self.iterations += 1
+                if metrics is not None:
+                    iteration_seconds.observe(perf_counter() - iteration_started)
+                if tracer is not None:
+                    tracer.span(f"iteration {self.iterations}", "player", iteration_started, perf_counter())
+                if self.loop and (not self.loop_count or self.iterations < self.loop_count):
+                    logger.debug("Completed one loop. Restarting playback...")
+                else:
+                    logger.info("Completed playback.")
+                    self.playing = False  # Stop after the last iteration
+                    if self.progress_callback:
+                        self.progress_callback(100)  # Ensure progress is complete
+                    if self.bus:
+                        self.bus.post("playback_finished", self)
+            except Exception as e:
+                logger.error("Error during playback: %s", e)
+                self.playing = False
+                self.error = e
+                if self.bus:
+                    self.bus.post("error", "Error", f"An error occurred during playback: {e}")
+                    self.bus.post("playback_finished", self)
+        if self.catch_ups:
+            logger.info("Caught up with schedule %d times using %s (%d moves skipped)",
+                        self.catch_ups, catch_up, self.moves_skipped)
+        if tracer is not None:
+            tracer.write()
+
+    def restore_state(self, index):
+        """Prepare to start at step index: release what the recording holds there and move to its position."""
+        held_keys, held_buttons, position = playback_state(self.source, index)
+        self.release(held_keys, held_buttons, position)
+        if position is not None:
+            self.handlers[OP_MOVE](*position)
+        logger.info("Starting playback at step %d", index)
+
+    def release_held(self, index):
+        """Release the keys and buttons the recording holds down after its first index steps."""
+        try:
+            held_keys, held_buttons, position = playback_state(self.source, index)
+            self.release(held_keys, held_buttons, position)
+        except Exception as e:
+            logger.error("Error releasing held keys and buttons: %s", e)
+
+    def release(self, keys, buttons, position):
+        handlers = self.handlers
+        for key in keys:
+            handlers[OP_KEY_RELEASE](key)
+        if buttons:
+            x, y = position
+            for button in buttons:
+                handlers[OP_BUTTON_RELEASE](x, y, button)
+        if keys or buttons:
+            logger.info("Released %d held keys and %d held buttons", len(keys), len(buttons))
+
+    @staticmethod
+    def event_observer(metrics, tracer):
+        """Return observe(index, op, target, fired, done) feeding the metrics and tracer, or None without either."""
+        if metrics is None and tracer is None:
+            return None
+        if metrics is not None:
+            observe_lateness = metrics.histogram("autowiz_player_lateness_seconds",
+                                                 "How long after its scheduled time each event fired").observe
+            observe_controller = tuple(metrics.histogram("autowiz_player_controller_seconds",
+                                                         "Time spent in the output backend per event",
+                                                         op=label).observe
+                                       for label in OP_LABELS)
+            counters = tuple(metrics.counter("autowiz_player_events_total", "Events played", op=label)
+                             for label in OP_LABELS)
+
+        def observe(index, op, target, fired, done):
+            if metrics is not None:
+                observe_lateness(fired - target)
+                observe_controller[op](done - fired)
+                counters[op].value += 1
+            if tracer is not None:
+                # The instant marks when the event was due, the span when it actually ran
+                tracer.instant("due", "schedule", target, {"index": index})
+                tracer.span(OP_NAMES[op], "controller", fired, done,
+                            {"index": index, "late_us": round((fired - target) * 1e6, 1)})
+        return observe
+
+    def execute_event(self, event):
+        """Execute a single recorded event immediately, outside of the compiled plan."""
+        step = compile_event(event)
+        if step is None:
+            return
+        op, step_args = step
+        try:
+            self.handlers[op](*step_args)
+            logger.debug("Executed %s: %s", OP_NAMES[op], step_args)
+        except Exception as e:
+            logger.error("Error executing event %s: %s", event, e)
+            raise e
+
+
+class HotkeyListener:
+    def __init__(self, callback, keys, hub=None):
+        self.callback = callback
+        self.keys = keys  # Key names, as recorded: 'r', 'Key.esc'
+        self.current_keys = set()
+        self.hub = hub or get_input_hub()
+        self.subscription = None
+        self.start()
+
+    def start(self):
+        """Listen for the hotkey again after stop(). Does nothing if already listening."""
+        if self.subscription is None:
+            self.current_keys.clear()
+            self.subscription = self.hub.subscribe(on_press=self.on_press, on_release=self.on_release)
+
+    def stop(self):
+        if self.subscription is not None:
+            self.subscription.cancel()
+            self.subscription = None
+
+    def on_press(self, key):
+        self.current_keys.add(key_name(key))
+        if self.keys.issubset(self.current_keys):
+            logger.debug("Hotkey pressed.")
+            self.callback()
+
+    def on_release(self, key):
+        self.current_keys.discard(key_name(key))
@@ -0,0 +1,223 @@
+from array import array
+from collections.abc import Mapping
+
+# Event codes for the code column
+CODE_KEY_PRESS = 0
+CODE_KEY_RELEASE = 1
+CODE_MOVE = 2
+CODE_CLICK_PRESS = 3
+CODE_CLICK_RELEASE = 4
+CODE_SCROLL = 5
+
+# Column name, array typecode and item size. The binary recording format
+# stores the columns in this order. Positions and scroll amounts are 32-bit
+# floats: pynput reports fractional coordinates on macOS, and whole and half
+# pixels are stored exactly.
+COLUMNS = (
+    ("time", "d", 8),
+    ("x", "f", 4),
+    ("y", "f", 4),
+    ("dx", "f", 4),
+    ("dy", "f", 4),
+    ("string", "i", 4),
+    ("code", "B", 1),
+)
+
+
+def encode_event(event):
+    """Return (code, x, y, dx, dy, string) for a recorded event dict."""
+    event_type = event['type']
+    action = event['action']
+    if event_type == 'keyboard':
+        code = CODE_KEY_PRESS if action == 'press' else CODE_KEY_RELEASE
+        return code, 0, 0, 0, 0, event['key']
+    if event_type == 'mouse':
+        x, y = event['position']
+        if action == 'move':
+            return CODE_MOVE, x, y, 0, 0, None
+        if action == 'click':
+            code = CODE_CLICK_PRESS if event['pressed'] else CODE_CLICK_RELEASE
+            return code, x, y, 0, 0, event['button']
+        if action == 'scroll':
+            dx, dy = event['scroll']
+            return CODE_SCROLL, x, y, dx, dy, None
+    raise ValueError(f"Unsupported event: {event}")
+
+
+def coordinate(value):
+    """Return a stored position or scroll amount as an int when it is a whole number."""
+    return value if value % 1 else int(value)
+
+
+def decode_event(time_value, code, x, y, dx, dy, string):
+    """Build the recorded event dict for one row of columns."""
+    if code == CODE_MOVE:
+        return {'type': 'mouse', 'action': 'move', 'position': (x, y), 'time': time_value}
+    if code == CODE_KEY_PRESS or code == CODE_KEY_RELEASE:
+        return {'type': 'keyboard', 'action': 'press' if code == CODE_KEY_PRESS else 'release',
+                'key': string, 'time': time_value}
+    if code == CODE_CLICK_PRESS or code == CODE_CLICK_RELEASE:
+        return {'type': 'mouse', 'action': 'click', 'position': (x, y), 'button': string,
+                'pressed': code == CODE_CLICK_PRESS, 'time': time_value}
+    if code == CODE_SCROLL:
+        return {'type': 'mouse', 'action': 'scroll', 'position': (x, y), 'scroll': (dx, dy), 'time': time_value}
+    raise ValueError(f"Unknown event code: {code}")
+
+
+def decode_row(columns, strings, index):
+    string_id = columns["string"][index]
+    return decode_event(columns["time"][index], columns["code"][index], coordinate(columns["x"][index]),
+                        coordinate(columns["y"][index]), coordinate(columns["dx"][index]),
+                        coordinate(columns["dy"][index]), strings[string_id] if string_id >= 0 else None)
+
+
+class EventView(Mapping):
+    """Dict-like view of one event stored in columns.
+
+    event['time'] is read straight from the time column; any other key
+    decodes the row once and caches the result.
+    """
+
+    __slots__ = ("_columns", "_strings", "_index", "_event")
+
+    def __init__(self, columns, strings, index):
+        self._columns = columns
+        self._strings = strings
+        self._index = index
+        self._event = None
+
+    def _decode(self):
+        if self._event is None:
+            self._event = decode_row(self._columns, self._strings, self._index)
+        return self._event
+
+    def __getitem__(self, key):
+        if key == 'time':
+            return self._columns["time"][self._index]
+        return self._decode()[key]
+
+    def __iter__(self):
+        return iter(self._decode())
+
+    def __len__(self):
+        return len(self._decode())
+
+    def __repr__(self):
+        return repr(self._decode())
+
+
+class ColumnEvents:
+    """Sequence of events stored column-wise; indexing returns EventView objects."""
+
+    def __init__(self, columns, strings):
+        self.columns = columns
+        self.strings = strings
+
+    def as_columns(self):
+        return self.columns, self.strings
+
+    def __len__(self):
+        return len(self.columns["time"])
+
+    def __getitem__(self, index):
+        count = len(self)
+        if isinstance(index, slice):
+            return [EventView(self.columns, self.strings, i) for i in range(*index.indices(count))]
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("event index out of range")
+        return EventView(self.columns, self.strings, index)
+
+    def __iter__(self):
+        columns = self.columns
+        strings = self.strings
+        for i in range(len(self)):
+            yield EventView(columns, strings, i)
+
+
+class EventAppender:
+    """The append API shared by EventBuffer and the on-disk StreamingLog.
+
+    Subclasses provide intern(string) and _append_row(time, code, x, y, dx, dy, string_id).
+    """
+
+    def append(self, event):
+        """Append a recorded event dict."""
+        code, x, y, dx, dy, string = encode_event(event)
+        self._append_row(event['time'], code, x, y, dx, dy, -1 if string is None else self.intern(string))
+
+    def append_key(self, time_value, key_name, pressed):
+        self._append_row(time_value, CODE_KEY_PRESS if pressed else CODE_KEY_RELEASE, 0, 0, 0, 0,
+                         -1 if key_name is None else self.intern(key_name))
+
+    def append_move(self, time_value, x, y):
+        self._append_row(time_value, CODE_MOVE, x, y, 0, 0, -1)
+
+    def append_click(self, time_value, x, y, button_name, pressed):
+        self._append_row(time_value, CODE_CLICK_PRESS if pressed else CODE_CLICK_RELEASE, x, y,
+                         0, 0, -1 if button_name is None else self.intern(button_name))
+
+    def append_scroll(self, time_value, x, y, dx, dy):
+        self._append_row(time_value, CODE_SCROLL, x, y, dx, dy, -1)
+
+
+class EventBuffer(ColumnEvents, EventAppender):
+    """Growable in-memory recording backed by typed arrays.
+
+    Each event costs 29 bytes across the columns instead of a dict per event.
+    Key and button names are interned in a string table. The append_* methods
+    are the cheap path used by the Recorder callbacks.
+    """
+
+    def __init__(self):
+        super().__init__({name: array(typecode) for name, typecode, _ in COLUMNS}, [])
+        self._string_ids = {}
+        columns = self.columns
+        # Bound append methods, looked up once
+        self._time = columns["time"].append
+        self._code = columns["code"].append
+        self._x = columns["x"].append
+        self._y = columns["y"].append
+        self._dx = columns["dx"].append
+        self._dy = columns["dy"].append
+        self._string = columns["string"].append
+
+    @classmethod
+    def from_events(cls, events):
+        """Build a buffer from event dicts, or copy another column-backed recording."""
+        buffer = cls()
+        if hasattr(events, "as_columns"):
+            columns, strings = events.as_columns()
+            for name, column in columns.items():
+                column = memoryview(column)
+                if column.format == buffer.columns[name].typecode:
+                    buffer.columns[name].frombytes(column.cast("B"))
+                else:
+                    buffer.columns[name].extend(column)  # Integer positions of a version 1 recording
+            for string in strings:
+                buffer.intern(string)
+            return buffer
+        for event in events:
+            buffer.append(event)
+        return buffer
+
+    def intern(self, string):
+        string_id = self._string_ids.get(string)
+        if string_id is None:
+            string_id = self._string_ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    def _append_row(self, time_value, code, x, y, dx, dy, string_id):
+        self._time(time_value)
+        self._code(code)
+        self._x(x)
+        self._y(y)
+        self._dx(dx)
+        self._dy(dy)
+        self._string(string_id)
+
+    @property
+    def nbytes(self):
+        return sum(len(column) * column.itemsize for column in self.columns.values())
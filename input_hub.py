@@ -0,0 +1,145 @@
+import threading
+from log import logger
+
+# One keyboard hook and one mouse hook for the whole process. The recorder,
+# the hotkeys and any other trigger subscribe to the hub instead of starting
+# their own pynput listeners, so nothing creates a hook thread per use.
+
+KEYBOARD_EVENTS = ("on_press", "on_release")
+MOUSE_EVENTS = ("on_move", "on_click", "on_scroll")
+INPUT_EVENTS = KEYBOARD_EVENTS + MOUSE_EVENTS
+
+# Process-wide hub shared by everything that watches input, see get_input_hub()
+_input_hub = None
+_input_hub_lock = threading.Lock()
+
+
+class Subscription:
+    """Handle returned by InputHub.subscribe(); cancel() unsubscribes."""
+
+    __slots__ = ("hub", "callbacks")
+
+    def __init__(self, hub, callbacks):
+        self.hub = hub
+        self.callbacks = callbacks  # Event name -> callback
+
+    def cancel(self):
+        self.hub.unsubscribe(self)
+
+
+class InputHub:
+    """Dispatches OS keyboard and mouse events to any number of subscribers.
+
+    Callbacks take the pynput listener arguments: on_press(key),
+    on_release(key), on_move(x, y), on_click(x, y, button, pressed) and
+    on_scroll(x, y, dx, dy). They run on the hook threads and should only
+    queue work. Each hook is installed the first time something subscribes
+    to its events and stays installed until stop(), so subscribe() and
+    unsubscribe() only touch a dict entry. The hooks read a tuple of
+    callbacks per event that is rebuilt once after a subscription changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {event: {} for event in INPUT_EVENTS}  # Event -> {Subscription: callback}
+        self._snapshots = dict.fromkeys(INPUT_EVENTS, ())  # None when the tuple must be rebuilt
+        self.keyboard_listener = None
+        self.mouse_listener = None
+
+    def subscribe(self, on_press=None, on_release=None, on_move=None, on_click=None, on_scroll=None):
+        callbacks = {event: callback for event, callback
+                     in zip(INPUT_EVENTS, (on_press, on_release, on_move, on_click, on_scroll))
+                     if callback is not None}
+        subscription = Subscription(self, callbacks)
+        with self._lock:
+            for event, callback in callbacks.items():
+                self._subscribers[event][subscription] = callback
+                self._snapshots[event] = None
+            try:
+                self._install_hooks(callbacks)
+            except Exception:
+                # Without its hooks the subscription would never be called
+                for event in callbacks:
+                    del self._subscribers[event][subscription]
+                raise
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Stop delivering events to a subscription. Unknown or cancelled subscriptions are ignored."""
+        with self._lock:
+            for event in subscription.callbacks:
+                if self._subscribers[event].pop(subscription, None) is not None:
+                    self._snapshots[event] = None
+
+    def _install_hooks(self, events):
+        # Called with the lock held. pynput is only imported once a hook is needed.
+        from pynput.keyboard import Listener as KeyboardListener
+        from pynput.mouse import Listener as MouseListener
+        if self.keyboard_listener is None and any(event in KEYBOARD_EVENTS for event in events):
+            self.keyboard_listener = KeyboardListener(on_press=self._dispatcher("on_press"),
+                                                      on_release=self._dispatcher("on_release"))
+            self.keyboard_listener.start()
+            logger.debug("Keyboard hook installed.")
+        if self.mouse_listener is None and any(event in MOUSE_EVENTS for event in events):
+            self.mouse_listener = MouseListener(on_move=self._dispatcher("on_move"),
+                                                on_click=self._dispatcher("on_click"),
+                                                on_scroll=self._dispatcher("on_scroll"))
+            self.mouse_listener.start()
+            logger.debug("Mouse hook installed.")
+
+    def _callbacks(self, event):
+        with self._lock:
+            callbacks = self._snapshots[event]
+            if callbacks is None:
+                callbacks = self._snapshots[event] = tuple(self._subscribers[event].values())
+            return callbacks
+
+    def _dispatcher(self, event):
+        snapshots = self._snapshots
+        rebuild = self._callbacks
+
+        def dispatch(*args):
+            callbacks = snapshots[event]
+            if callbacks is None:
+                callbacks = rebuild(event)
+            for callback in callbacks:
+                # pynput stops the whole hook if a callback raises
+                try:
+                    callback(*args)
+                except Exception as e:
+                    logger.error("Error in %s subscriber %s: %s", event, getattr(callback, "__name__", callback), e)
+        return dispatch
+
+    def stop(self):
+        """Remove the OS hooks. A later subscribe() installs them again."""
+        with self._lock:
+            listeners = self.keyboard_listener, self.mouse_listener
+            self.keyboard_listener = self.mouse_listener = None
+        for listener in listeners:
+            if listener is not None:
+                listener.stop()
+
+
+def key_name(key):
+    """Return the name a pynput key is recorded and matched under.
+
+    That is its character, 'Key.esc' for special keys, or '<vk>' for keys
+    with only a virtual key code, such as media keys.
+    """
+    try:
+        char = key.char
+    except AttributeError:
+        return str(key)
+    if char is None:
+        vk = getattr(key, "vk", None)
+        return str(key) if vk is None else f"<{vk}>"
+    return char
+
+
+def get_input_hub():
+    """Return the hub shared by the whole process, creating it on first use."""
+    global _input_hub
+    with _input_hub_lock:
+        if _input_hub is None:
+            _input_hub = InputHub()
+        return _input_hub
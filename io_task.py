@@ -0,0 +1,54 @@
+import threading
+from log import logger
+
+
+class OperationCancelled(Exception):
+    """Raised inside a background task once it has been cancelled."""
+
+
+class IOTask:
+    """Run a save or load on a worker thread with progress and cancellation.
+
+    function is called as function(*args, progress=task.report). report()
+    forwards the fraction done to progress_callback as a percentage and
+    raises OperationCancelled after cancel(), so the function stops at its
+    next progress step. done_callback(task) runs on the worker thread when
+    the function returns; the caller decides how to get back to the UI.
+    """
+
+    def __init__(self, function, args=(), progress_callback=None, done_callback=None):
+        self.function = function
+        self.args = args
+        self.progress_callback = progress_callback
+        self.done_callback = done_callback
+        self.result = None
+        self.error = None
+        self.cancelled = False
+        self._cancel_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="autowiz-io", daemon=True)
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def report(self, fraction):
+        if self._cancel_event.is_set():
+            raise OperationCancelled()
+        if self.progress_callback:
+            self.progress_callback(fraction * 100)
+
+    def _run(self):
+        try:
+            self.result = self.function(*self.args, progress=self.report)
+        except OperationCancelled:
+            self.cancelled = True
+        except Exception as e:
+            logger.error("Background task failed: %s", e)
+            self.error = e
+        finally:
+            if self.done_callback:
+                self.done_callback(self)
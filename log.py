@@ -0,0 +1,99 @@
+import logging
+import os
+import sys
+import threading
+from collections import deque
+
+# Shared logger for the recorder, player and UI. Per-event messages are
+# logged at DEBUG and callers check a cached flag before building them, so
+# the default INFO level costs nothing on the hot paths.
+logger = logging.getLogger("autowiz")
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+
+# Set AUTOWIZ_DEBUG=1 to enable per-event debug logging
+DEBUG_ENV_VAR = "AUTOWIZ_DEBUG"
+
+
+class RingBufferHandler(logging.Handler):
+    """Push records into a bounded ring drained by a background writer thread.
+
+    Logging threads only append to a deque, they never take the handler lock
+    or touch stdout. When the writer falls behind the oldest records are
+    dropped and counted rather than blocking the input hook or playback.
+    """
+
+    def __init__(self, target, capacity=10000, flush_interval=0.1):
+        super().__init__()
+        self.target = target
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._ring = deque(maxlen=capacity)
+        self._stop_event = threading.Event()
+        self._writer = threading.Thread(target=self._drain_loop, name="autowiz-log-writer", daemon=True)
+        self._writer.start()
+
+    def handle(self, record):
+        # Skip Handler.handle's lock; deque.append is already thread-safe
+        if not self.filter(record):
+            return False
+        if len(self._ring) == self.capacity:
+            self.dropped += 1
+        self._ring.append(record)
+        return True
+
+    def emit(self, record):
+        self.handle(record)
+
+    def _drain(self):
+        ring = self._ring
+        while ring:
+            try:
+                record = ring.popleft()
+            except IndexError:
+                break
+            self.target.handle(record)
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            self.target.handle(logging.makeLogRecord({
+                "name": logger.name, "levelno": logging.WARNING, "levelname": "WARNING",
+                "msg": "Log ring buffer full, dropped %d records", "args": (dropped,),
+            }))
+
+    def _drain_loop(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self._drain()
+        self._drain()
+
+    def flush(self):
+        self._drain()
+        self.target.flush()
+
+    def close(self):
+        self._stop_event.set()
+        self._writer.join(timeout=1.0)
+        self.target.close()
+        super().close()
+
+
+def configure_logging(level=None, debug=None, stream=None):
+    """Configure the autowiz logger.
+
+    By default messages at INFO and above go straight to stdout. In debug mode
+    the level drops to DEBUG and records are routed through a RingBufferHandler
+    so the threads producing them never block on the stream.
+    """
+    if debug is None:
+        debug = os.environ.get(DEBUG_ENV_VAR, "") not in ("", "0")
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    if debug:
+        handler = RingBufferHandler(handler)
+    logger.addHandler(handler)
+    logger.setLevel(level if level is not None else (logging.DEBUG if debug else logging.INFO))
+    logger.propagate = False
+    return logger
@@ -0,0 +1,208 @@
+import json
+import os
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from log import logger
+
+# Counters and histograms for the recorder and player. Recorder and Player
+# take metrics=None by default and then skip all of it: hooks are not
+# wrapped and the hot loops only test a local for None. Every metric has a
+# single writer thread, so updates take no lock; a snapshot taken while they
+# run may be off by the events in flight.
+
+# Set AUTOWIZ_METRICS=path/to/autowiz.prom to collect metrics in the GUI
+METRICS_ENV_VAR = "AUTOWIZ_METRICS"
+
+# How often MetricsWriter rewrites the Prometheus file, in seconds
+METRICS_WRITE_INTERVAL = 5.0
+
+# Upper bounds in seconds for durations from a microsecond to a second
+DURATION_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+                    1e-3, 2.5e-3, 5e-3, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+# Upper bounds for queue lengths
+DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384)
+# Upper bounds in seconds for playback iterations
+ITERATION_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 300, 600, 1800, 3600)
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Histogram:
+    """Counts observations into fixed buckets, like a Prometheus histogram."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # The last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Return [(upper bound, observations <= bound)], ending with +Inf."""
+        total = 0
+        buckets = []
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            total += count
+            buckets.append((bound, total))
+        return buckets
+
+
+class Metrics:
+    """A registry of named counters and histograms, each optionally labelled."""
+
+    def __init__(self):
+        self._lock = threading.Lock()  # Only guards registration, not updates
+        self._families = {}  # name -> (kind, help, {labels tuple: metric})
+
+    def _get(self, kind, name, help_text, labels, create):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._families.setdefault(name, (kind, help_text, {}))
+            if family[0] != kind:
+                raise ValueError(f"{name} is already registered as a {family[0]}")
+            metric = family[2].get(key)
+            if metric is None:
+                metric = family[2][key] = create()
+            return metric
+
+    def counter(self, name, help_text, **labels):
+        return self._get("counter", name, help_text, labels, Counter)
+
+    def histogram(self, name, help_text, buckets=DURATION_BUCKETS, **labels):
+        return self._get("histogram", name, help_text, labels, lambda: Histogram(buckets))
+
+    def snapshot(self):
+        """Return every metric as plain data that json.dumps accepts."""
+        with self._lock:
+            families = [(name, kind, help_text, list(children.items()))
+                        for name, (kind, help_text, children) in sorted(self._families.items())]
+        result = {}
+        for name, kind, help_text, children in families:
+            samples = []
+            for labels, metric in children:
+                sample = {"labels": dict(labels)}
+                if kind == "counter":
+                    sample["value"] = metric.value
+                else:
+                    sample["count"] = metric.count
+                    sample["sum"] = metric.sum
+                    sample["buckets"] = [["+Inf" if bound == float("inf") else bound, count]
+                                         for bound, count in metric.cumulative()]
+                samples.append(sample)
+            result[name] = {"type": kind, "help": help_text, "samples": samples}
+        return result
+
+    def prometheus_text(self):
+        """Render the metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, family in self.snapshot().items():
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['type']}")
+            for sample in family["samples"]:
+                labels = sample["labels"]
+                if family["type"] == "counter":
+                    lines.append(f"{name}{_format_labels(labels)} {sample['value']}")
+                    continue
+                for bound, count in sample["buckets"]:
+                    lines.append(f"{name}_bucket{_format_labels(dict(labels, le=bound))} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {sample['sum']!r}")
+                lines.append(f"{name}_count{_format_labels(labels)} {sample['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def write_text(path, text):
+    """Replace path with text without readers ever seeing a partial file."""
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+
+class MetricsWriter:
+    """Rewrites a Prometheus text file from a background thread every interval seconds.
+
+    Point node_exporter's textfile collector, or anything else that reads
+    the format, at the file. stop() writes a final copy.
+    """
+
+    def __init__(self, metrics, path, interval=METRICS_WRITE_INTERVAL):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._write_loop, name="autowiz-metrics", daemon=True)
+        self._thread.start()
+        return self
+
+    def write(self):
+        try:
+            write_text(self.path, self.metrics.prometheus_text())
+        except OSError as e:
+            logger.error("Error writing metrics to %s: %s", self.path, e)
+
+    def _write_loop(self):
+        while not self._stop_event.wait(self.interval):
+            self.write()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.write()
+
+
+def timed(function, histogram):
+    """Wrap function so the duration of every call is observed in histogram."""
+    def wrapper(*args):
+        start = perf_counter()
+        try:
+            return function(*args)
+        finally:
+            histogram.observe(perf_counter() - start)
+    wrapper.__name__ = getattr(function, "__name__", "timed")
+    return wrapper
+
+
+def write_snapshot(metrics, path):
+    """Write a JSON snapshot of the metrics to path."""
+    write_text(path, json.dumps(metrics.snapshot(), indent=4))
+
+
+def metrics_from_environment():
+    """Return (Metrics, started MetricsWriter) if AUTOWIZ_METRICS is set, else (None, None)."""
+    path = os.environ.get(METRICS_ENV_VAR)
+    if not path:
+        return None, None
+    metrics = Metrics()
+    logger.info("Writing metrics to %s", path)
+    return metrics, MetricsWriter(metrics, path).start()
@@ -0,0 +1,294 @@
+import argparse
+import os
+import sys
+from functools import partial
+from event_buffer import EventBuffer
+from recording_format import load_recording, save_recording, MappedRecording
+
+# Maximum distance in pixels between a simplified move path and the original
+DEFAULT_EPSILON = 1.0
+
+# Longest time in seconds between kept moves of a run. Playback jumps from
+# one move to the next, so a longer gap would leave the cursor standing
+# still part way through a drag.
+DEFAULT_MAX_INTERVAL = 0.05
+
+
+def _is_move(event):
+    return event['type'] == 'mouse' and event['action'] == 'move'
+
+
+def drop_dead_events(events):
+    """Drop events that have no effect when played back.
+
+    That is scrolls of zero distance and releases of keys or buttons that
+    were never pressed in the recording, such as the release of the hotkey
+    that started it.
+    """
+    held_keys = set()
+    held_buttons = set()
+    kept = []
+    for event in events:
+        if event['type'] == 'keyboard':
+            key = event['key']
+            if event['action'] == 'press':
+                held_keys.add(key)
+            elif key in held_keys:
+                held_keys.discard(key)
+            else:
+                continue
+        elif event['action'] == 'click':
+            button = event['button']
+            if event['pressed']:
+                held_buttons.add(button)
+            elif button in held_buttons:
+                held_buttons.discard(button)
+            else:
+                continue
+        elif event['action'] == 'scroll' and not any(event['scroll']):
+            continue
+        kept.append(event)
+    return kept
+
+
+def collapse_key_repeats(events):
+    """Collapse auto-repeat storms into a single press/release pair.
+
+    Holding a key makes the OS report the press again and again until the
+    key is released; only the first press is kept.
+    """
+    held_keys = set()
+    kept = []
+    for event in events:
+        if event['type'] == 'keyboard':
+            key = event['key']
+            if event['action'] == 'press':
+                if key in held_keys:
+                    continue
+                held_keys.add(key)
+            else:
+                held_keys.discard(key)
+        kept.append(event)
+    return kept
+
+
+def drop_duplicate_moves(events):
+    """Drop moves to the position the cursor is already at."""
+    position = None
+    kept = []
+    for event in events:
+        if event['type'] == 'mouse':
+            event_position = tuple(event['position'])
+            if event['action'] == 'move' and event_position == position:
+                continue
+            position = event_position
+        kept.append(event)
+    return kept
+
+
+def _synchronized_distance_sq(point, start, end):
+    """Squared distance from an (x, y, time) point to where the cursor would be at that
+    time moving from start to end at constant speed."""
+    px, py, pt = point
+    ax, ay, at = start
+    bx, by, bt = end
+    duration = bt - at
+    fraction = (pt - at) / duration if duration > 0 else 0.0
+    ex = ax + (bx - ax) * fraction
+    ey = ay + (by - ay) * fraction
+    return (px - ex) ** 2 + (py - ey) ** 2
+
+
+def rdp_keep(points, epsilon):
+    """Return a list of flags marking the (x, y, time) points kept by Ramer-Douglas-Peucker simplification.
+
+    Distances are synchronized: each point is compared with where the
+    simplified path is at the same time, so pauses and changes of speed are
+    kept as well as changes of direction.
+    """
+    keep = [False] * len(points)
+    if not points:
+        return keep
+    keep[0] = keep[-1] = True
+    epsilon_sq = epsilon * epsilon
+    # Iterative to handle long runs without hitting the recursion limit
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        farthest = None
+        farthest_sq = epsilon_sq
+        for i in range(first + 1, last):
+            distance_sq = _synchronized_distance_sq(points[i], points[first], points[last])
+            if distance_sq > farthest_sq:
+                farthest = i
+                farthest_sq = distance_sq
+        if farthest is not None:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+    return keep
+
+
+def cap_intervals(times, keep, max_interval):
+    """Keep more points so no two kept points are more than max_interval apart, where the times allow."""
+    last = 0
+    for i in range(1, len(times) - 1):
+        if not keep[i] and times[i + 1] - times[last] > max_interval:
+            keep[i] = True
+        if keep[i]:
+            last = i
+    return keep
+
+
+def simplify_moves(events, epsilon=DEFAULT_EPSILON, max_interval=DEFAULT_MAX_INTERVAL):
+    """Simplify each run of consecutive moves with Ramer-Douglas-Peucker in position and time.
+
+    Kept moves keep their original times, the first and last move of every
+    run are always kept, and kept moves are at most max_interval seconds
+    apart wherever the recording had moves that close. The cursor therefore
+    still follows drags as it did and arrives where it did before the next
+    click, scroll or key event.
+    """
+    kept = []
+    run = []
+
+    def flush_run():
+        if len(run) > 2:
+            flags = rdp_keep([(*event['position'], event['time']) for event in run], epsilon)
+            if max_interval is not None:
+                cap_intervals([event['time'] for event in run], flags, max_interval)
+            kept.extend(event for event, keep in zip(run, flags) if keep)
+        else:
+            kept.extend(run)
+        run.clear()
+
+    for event in events:
+        if _is_move(event):
+            run.append(event)
+        else:
+            flush_run()
+            kept.append(event)
+    flush_run()
+    return kept
+
+
+# Passes by name, run in the order given to build_pipeline
+PASSES = {
+    "dead": drop_dead_events,
+    "repeats": collapse_key_repeats,
+    "duplicates": drop_duplicate_moves,
+    "simplify": simplify_moves,
+}
+
+# repeats is opt-in: it changes what is typed when a key is held down in a text field
+DEFAULT_PASSES = ("dead", "duplicates", "simplify")
+
+
+def build_pipeline(names=DEFAULT_PASSES, epsilon=DEFAULT_EPSILON, max_interval=DEFAULT_MAX_INTERVAL):
+    """Return the (name, pass) pairs for the named passes."""
+    pipeline = []
+    for name in names:
+        if name not in PASSES:
+            raise ValueError(f"Unknown optimizer pass: {name}")
+        function = PASSES[name]
+        if function is simplify_moves:
+            function = partial(simplify_moves, epsilon=epsilon, max_interval=max_interval)
+        pipeline.append((name, function))
+    return pipeline
+
+
+class OptimizeReport:
+    """Event counts and durations before and after optimizing a recording."""
+
+    def __init__(self, events_before, duration_before):
+        self.events_before = events_before
+        self.duration_before = duration_before
+        self.events_after = events_before
+        self.duration_after = duration_before
+        self.removed = {}  # Events removed by each pass
+
+    def __str__(self):
+        saved = self.events_before - self.events_after
+        percent = 100.0 * saved / self.events_before if self.events_before else 0.0
+        passes = ", ".join(f"{name} -{count}" for name, count in self.removed.items())
+        return (f"{self.events_before} -> {self.events_after} events ({percent:.1f}% fewer; {passes}), "
+                f"duration {self.duration_before:.3f}s -> {self.duration_after:.3f}s")
+
+
+def _duration(events):
+    return events[-1]['time'] if events else 0.0
+
+
+def optimize_events(events, pipeline=None):
+    """Run events through the optimizer pipeline. Returns (event dicts, OptimizeReport)."""
+    if pipeline is None:
+        pipeline = build_pipeline()
+    events = [dict(event) for event in events]
+    report = OptimizeReport(len(events), _duration(events))
+    for name, function in pipeline:
+        count = len(events)
+        events = function(events)
+        report.removed[name] = count - len(events)
+    report.events_after = len(events)
+    report.duration_after = _duration(events)
+    return events, report
+
+
+def optimize_recording(source, destination=None, pipeline=None, dry_run=False):
+    """Optimize a saved recording, rewriting it in place unless destination is given.
+
+    The output is written in the format given by the destination extension,
+    exactly as Recorder.save_events would write it. Returns the OptimizeReport.
+    """
+    recording = load_recording(source)
+    try:
+        events, report = optimize_events(recording, pipeline)
+    finally:
+        # The mapping must be closed before the file can be replaced
+        if isinstance(recording, MappedRecording):
+            recording.close()
+    if not dry_run:
+        save_recording(destination or source, EventBuffer.from_events(events))
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shrink saved recordings with a pipeline of optimizer passes.")
+    parser.add_argument("recordings", nargs="+", help="recording files to optimize in place")
+    parser.add_argument("-o", "--output", help="write the result here instead (single recording only)")
+    parser.add_argument("--passes", default=",".join(DEFAULT_PASSES),
+                        help=f"comma-separated passes to run, from {', '.join(PASSES)} "
+                             f"(default: {','.join(DEFAULT_PASSES)})")
+    parser.add_argument("--epsilon", type=float, default=DEFAULT_EPSILON,
+                        help=f"move simplification tolerance in pixels (default: {DEFAULT_EPSILON})")
+    parser.add_argument("--max-interval", type=float, default=DEFAULT_MAX_INTERVAL,
+                        help=f"longest gap in seconds between simplified moves (default: {DEFAULT_MAX_INTERVAL:.3f})")
+    parser.add_argument("--dry-run", action="store_true", help="report the savings without writing anything")
+    args = parser.parse_args(argv)
+    if args.output and len(args.recordings) > 1:
+        parser.error("--output can only be used with a single recording")
+    try:
+        pipeline = build_pipeline([name.strip() for name in args.passes.split(",") if name.strip()], args.epsilon,
+                                  args.max_interval)
+    except ValueError as e:
+        parser.error(str(e))
+
+    total_before = total_after = 0
+    failed = 0
+    for path in args.recordings:
+        try:
+            report = optimize_recording(path, args.output, pipeline, args.dry_run)
+        except (OSError, ValueError) as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        total_before += report.events_before
+        total_after += report.events_after
+        print(f"{os.path.basename(path)}: {report}")
+    if len(args.recordings) > 1:
+        print(f"Total: {total_before} -> {total_after} events")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
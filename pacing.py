@@ -0,0 +1,171 @@
+import threading
+from array import array
+from log import logger
+from plan import PlaybackPlan
+
+
+class GapPolicy:
+    """Shortens the idle pauses between played events.
+
+    Gaps up to threshold seconds keep their timing, so drags and typing play
+    as recorded; the part of a longer gap above threshold is multiplied by
+    idle_scale. max_gap then caps every gap. Applied before the playback
+    speed, which still divides the result.
+    """
+
+    def __init__(self, max_gap=None, threshold=None, idle_scale=1.0):
+        if max_gap is not None and max_gap < 0 or threshold is not None and threshold < 0 or idle_scale < 0:
+            raise ValueError("Gap limits and idle scale must not be negative")
+        self.max_gap = max_gap
+        self.threshold = threshold
+        self.idle_scale = idle_scale
+
+    @property
+    def keeps_everything(self):
+        return self.max_gap is None and (self.threshold is None or self.idle_scale == 1.0)
+
+    def retime(self, times, last=0.0, new_last=0.0):
+        """Return (retimed times, last original time, last retimed time).
+
+        Pass the last two values back in to continue with the next chunk of
+        the same recording. The first gap is measured from time 0.
+        """
+        max_gap = self.max_gap
+        threshold = None if self.idle_scale == 1.0 else self.threshold
+        idle_scale = self.idle_scale
+        # Gaps at or below this are never changed
+        floor = min(limit for limit in (max_gap, threshold, float("inf")) if limit is not None)
+        retimed = array('d')
+        append = retimed.append
+        for t in times:
+            gap = t - last
+            if gap > floor:
+                if threshold is not None and gap > threshold:
+                    gap = threshold + (gap - threshold) * idle_scale
+                if max_gap is not None and gap > max_gap:
+                    gap = max_gap
+            new_last += gap
+            last = t
+            append(new_last)
+        return retimed, last, new_last
+
+    def projected_duration(self, times):
+        """Return how long a recording with these event times lasts under the policy, at 1x speed."""
+        last = new_last = 0.0
+        for chunk in times:
+            _, last, new_last = self.retime(chunk, last, new_last)
+        return new_last
+
+    def apply(self, source):
+        """Return a playback source that plays source with its gaps retimed."""
+        return RetimedSource(source, self)
+
+
+class RetimedSource:
+    """Playback source wrapping a plan or stream so its steps play on a GapPolicy's timeline.
+
+    A compiled plan is retimed once; streamed chunks are retimed as they are
+    read. Opcodes and arguments are shared with the wrapped source, and each
+    chunk keeps its recorded times as original_times, so a start offset in
+    recording time can still be found.
+    """
+
+    def __init__(self, source, policy):
+        self.source = source
+        self.policy = policy
+        self._plan = None
+        self._duration = None
+        self._lock = threading.Lock()
+        self._measuring = None  # Thread working out a streamed source's duration
+        self._duration_callbacks = []
+        if isinstance(source, PlaybackPlan):
+            self._plan = self._retimed_chunk(source, policy.retime(source.times)[0])
+            self._duration = self._plan.duration
+
+    def __len__(self):
+        return len(self.source)
+
+    @property
+    def duration(self):
+        """Retimed length. For a streamed source this starts measure_duration()
+        and is the recorded duration until the retimed one is known."""
+        if self._duration is None:
+            self.measure_duration()
+            return self.source.duration
+        return self._duration
+
+    def measure_duration(self, callback=None):
+        """Work out the retimed duration on a background thread if it is not known yet.
+
+        callback(duration) is called once it is, from that thread, or right
+        away if it already is known.
+        """
+        with self._lock:
+            if self._duration is None:
+                if callback is not None:
+                    self._duration_callbacks.append(callback)
+                if self._measuring is None:
+                    self._measuring = threading.Thread(target=self._measure, name="autowiz-retime", daemon=True)
+                    self._measuring.start()
+                return
+        if callback is not None:
+            callback(self._duration)
+
+    def compute_duration(self):
+        """Return the retimed duration, working it out on this thread if needed."""
+        if self._duration is None:
+            # Streamed sources only read their time column for this
+            self._duration = self.policy.projected_duration(self.source.read_times())
+        return self._duration
+
+    def _measure(self):
+        try:
+            duration = self.policy.projected_duration(self.source.read_times())
+        except (OSError, ValueError) as e:
+            logger.error("Error measuring retimed duration: %s", e)
+            return
+        with self._lock:
+            self._duration = duration
+            callbacks, self._duration_callbacks = self._duration_callbacks, []
+        for callback in callbacks:
+            callback(duration)
+
+    def retime_gap(self, gap):
+        """Return how long a pause of gap seconds lasts under the policy."""
+        return self.policy.retime((gap,))[0][0]
+
+    @staticmethod
+    def _retimed_chunk(chunk, times):
+        retimed = PlaybackPlan()
+        retimed.times = times
+        retimed.original_times = chunk.times
+        retimed.ops = chunk.ops
+        retimed.args = chunk.args
+        return retimed
+
+    def chunks(self):
+        if self._plan is not None:
+            return (self._plan,)
+        return self._retime_chunks(self.source.chunks())
+
+    def _retime_chunks(self, chunks):
+        last = new_last = 0.0
+        try:
+            for chunk in chunks:
+                times, last, new_last = self.policy.retime(chunk.times, last, new_last)
+                yield self._retimed_chunk(chunk, times)
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+
+
+# Presets offered in the UI, from recorded timing to aggressive compression
+GAP_PRESETS = {
+    "Off": GapPolicy(),
+    "Cap at 5 s": GapPolicy(max_gap=5.0),
+    "Cap at 2 s": GapPolicy(max_gap=2.0),
+    "Cap at 1 s": GapPolicy(max_gap=1.0),
+    "Halve pauses over 1 s": GapPolicy(threshold=1.0, idle_scale=0.5),
+}
+
+DEFAULT_GAP_PRESET = "Off"
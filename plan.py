@@ -0,0 +1,199 @@
+import re
+from array import array
+from event_buffer import CODE_KEY_PRESS, CODE_KEY_RELEASE
+
+# Opcodes for compiled playback steps. Player maps each opcode to a handler
+# bound to its output backend, so the hot loop is a single indexed call.
+# Keys and buttons stay as their recorded names ('a', 'Key.esc', 'left'), so
+# compiling and playing through the null or capture backend needs no pynput;
+# the pynput backend resolves the names itself.
+OP_KEY_PRESS = 0
+OP_KEY_RELEASE = 1
+OP_MOVE = 2
+OP_BUTTON_PRESS = 3
+OP_BUTTON_RELEASE = 4
+OP_SCROLL = 5
+
+OP_NAMES = ("Keyboard Press", "Keyboard Release", "Mouse Move", "Mouse Press", "Mouse Release", "Mouse Scroll")
+
+# Event codes that are also opcodes, and a pattern finding key rows in a code column
+PLAYABLE_CODES = bytes(range(len(OP_NAMES)))
+KEY_CODES = re.compile(bytes([ord("["), CODE_KEY_PRESS, CODE_KEY_RELEASE, ord("]")]))
+
+
+def compile_event(event):
+    """Resolve a single recorded event into an (opcode, args) pair, or None if it is not playable."""
+    if event['type'] == 'keyboard':
+        key = event['key']
+        if key is None:
+            return None  # A key with no name was recorded
+        if event['action'] == 'press':
+            return OP_KEY_PRESS, (key,)
+        elif event['action'] == 'release':
+            return OP_KEY_RELEASE, (key,)
+    elif event['type'] == 'mouse':
+        action = event['action']
+        if action == 'move':
+            x, y = event['position']
+            return OP_MOVE, (x, y)
+        elif action == 'click':
+            x, y = event['position']
+            return (OP_BUTTON_PRESS if event['pressed'] else OP_BUTTON_RELEASE), (x, y, event['button'])
+        elif action == 'scroll':
+            dx, dy = event['scroll']
+            return OP_SCROLL, (dx, dy)
+    return None
+
+
+class PlaybackPlan:
+    """A recording compiled once into parallel columns of times, opcodes and resolved arguments."""
+
+    def __init__(self, source=None):
+        self.source = source
+        self.source_length = len(source) if source is not None else 0
+        self.times = array('d')
+        self.ops = array('B')
+        self.args = []
+
+    def __len__(self):
+        return len(self.ops)
+
+    @property
+    def duration(self):
+        return self.times[-1] if self.times else 0.0
+
+    def chunks(self):
+        """A compiled plan is its own single playback chunk."""
+        return (self,)
+
+    def is_compiled_from(self, events):
+        return self.source is events and self.source_length == len(events)
+
+
+def compile_events(events):
+    """Compile recorded events into a PlaybackPlan.
+
+    Column-backed events (EventBuffer, MappedRecording) are compiled straight
+    from their columns; anything else is treated as a list of event dicts.
+    """
+    if hasattr(events, "as_columns"):
+        return compile_columns(events)
+    plan = PlaybackPlan(events)
+    times = plan.times
+    ops = plan.ops
+    args = plan.args
+    for event in events:
+        step = compile_event(event)
+        if step is None:
+            continue
+        times.append(event['time'])
+        ops.append(step[0])
+        args.append(step[1])
+    return plan
+
+
+def compile_columns(events):
+    """Compile column-backed events without decoding them into dicts.
+
+    Opcodes share their numbers with the event codes, so the code column is
+    the opcode column. Arguments are read from the recording's own columns
+    by ColumnArgs, so the plan adds 9 bytes per event (13 if some events are
+    not playable) rather than a tuple per event.
+    """
+    plan = PlaybackPlan(events)
+    columns, strings = events.as_columns()
+    codes = bytes(columns["code"])
+    string_ids = columns["string"]
+    event_times = columns["time"]
+    # Rows that cannot be played: unknown codes and keys recorded without a name
+    unplayable = bool(codes.translate(None, PLAYABLE_CODES))
+    if not unplayable:
+        for match in KEY_CODES.finditer(codes):
+            if string_ids[match.start()] < 0:
+                unplayable = True
+                break
+    rows = None
+    if unplayable:
+        rows = array('I', (i for i in range(len(codes))
+                           if codes[i] < len(OP_NAMES) and not (codes[i] <= CODE_KEY_RELEASE and string_ids[i] < 0)))
+        plan.times = array('d', (event_times[i] for i in rows))
+        plan.ops = array('B', bytes(codes[i] for i in rows))
+    else:
+        plan.times.frombytes(memoryview(event_times).cast("B"))
+        plan.ops.frombytes(codes)
+    plan.args = ColumnArgs(plan.ops, rows, columns, strings)
+    return plan
+
+
+class ColumnArgs:
+    """The args of a plan compiled from columns: args[i] builds step i's argument tuple when it is played.
+
+    rows maps steps to rows of the columns, or is None when every row is a step.
+    """
+
+    __slots__ = ("ops", "rows", "xs", "ys", "dxs", "dys", "string_ids", "strings")
+
+    def __init__(self, ops, rows, columns, strings):
+        self.ops = ops
+        self.rows = rows
+        self.xs = columns["x"]
+        self.ys = columns["y"]
+        self.dxs = columns["dx"]
+        self.dys = columns["dy"]
+        self.string_ids = columns["string"]
+        self.strings = strings
+
+    def __len__(self):
+        return len(self.ops)
+
+    def __getitem__(self, index):
+        op = self.ops[index]
+        row = index if self.rows is None else self.rows[index]
+        if op == OP_MOVE:
+            return self.xs[row], self.ys[row]
+        if op == OP_SCROLL:
+            return self.dxs[row], self.dys[row]
+        string_id = self.string_ids[row]
+        if op == OP_KEY_PRESS or op == OP_KEY_RELEASE:
+            return self.strings[string_id],
+        return self.xs[row], self.ys[row], self.strings[string_id] if string_id >= 0 else None
+
+
+def playback_state(source, end_index):
+    """Return (held keys, held buttons, last mouse position) after the first end_index steps of a source.
+
+    Used to put the keyboard and mouse into a known state when playback
+    starts or stops part way through a recording.
+    """
+    held_keys = {}
+    held_buttons = {}
+    position = None
+    base = 0
+    # Streamed sources are read on this thread; a read-ahead thread would only waste work
+    chunks = getattr(source, "read_chunks", source.chunks)()
+    try:
+        for chunk in chunks:
+            if base >= end_index:
+                break
+            ops = chunk.ops
+            args = chunk.args
+            for i in range(min(len(ops), end_index - base)):
+                op = ops[i]
+                step_args = args[i]
+                if op == OP_MOVE:
+                    position = step_args
+                elif op == OP_BUTTON_PRESS:
+                    held_buttons[step_args[2]] = True
+                    position = step_args[:2]
+                elif op == OP_BUTTON_RELEASE:
+                    held_buttons.pop(step_args[2], None)
+                    position = step_args[:2]
+                elif op == OP_KEY_PRESS:
+                    held_keys[step_args[0]] = True
+                elif op == OP_KEY_RELEASE:
+                    held_keys.pop(step_args[0], None)
+            base += len(ops)
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+    return list(held_keys), list(held_buttons), position
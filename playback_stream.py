@@ -0,0 +1,166 @@
+import os
+import queue
+import re
+import sys
+import threading
+from array import array
+from event_buffer import ColumnEvents
+from plan import compile_events
+from recording_format import read_layout, is_binary_recording, iter_json_array
+
+# Events compiled per chunk and number of chunks read ahead of playback.
+# Together they bound how much of a streamed recording is held in memory.
+STREAM_CHUNK_SIZE = 1024
+READ_AHEAD_CHUNKS = 8
+
+# Recordings larger than this are streamed from disk instead of loaded
+STREAM_PLAYBACK_THRESHOLD = 8 * 1024 * 1024
+
+
+class _ReadError:
+    def __init__(self, error):
+        self.error = error
+
+
+_DONE = object()
+
+
+def read_ahead(iterable, window=READ_AHEAD_CHUNKS):
+    """Iterate over iterable while a background thread keeps up to window items ready.
+
+    Closing the returned generator (or dropping it) stops the reader thread.
+    """
+    ready = queue.Queue(maxsize=window)
+    stop_event = threading.Event()
+
+    def put(item):
+        while not stop_event.is_set():
+            try:
+                ready.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def reader():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+            put(_DONE)
+        except Exception as e:
+            put(_ReadError(e))
+
+    thread = threading.Thread(target=reader, name="autowiz-read-ahead", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = ready.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _ReadError):
+                raise item.error
+            yield item
+    finally:
+        stop_event.set()
+
+
+class BinaryChunkReader:
+    """Playback source that compiles a binary recording chunk by chunk.
+
+    Each chunk reads only its slice of every column, so memory use does not
+    depend on the size of the recording.
+    """
+
+    def __init__(self, path, chunk_size=STREAM_CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        with open(path, "rb") as f:
+            layout = read_layout(f, path)
+            self.count = layout.count
+            self.duration = self._read_time(f, layout, layout.count - 1) if layout.count else 0.0
+
+    def __len__(self):
+        return self.count
+
+    @staticmethod
+    def _read_column(f, layout, name, typecode, itemsize, start, count):
+        f.seek(layout.offsets[name] + start * itemsize)
+        column = array(typecode)
+        column.frombytes(f.read(count * itemsize))
+        if sys.byteorder != "little":
+            column.byteswap()
+        return column
+
+    def _read_time(self, f, layout, index):
+        return self._read_column(f, layout, "time", "d", 8, index, 1)[0]
+
+    def read_chunks(self):
+        with open(self.path, "rb") as f:
+            layout = read_layout(f, self.path)
+            for start in range(0, layout.count, self.chunk_size):
+                count = min(self.chunk_size, layout.count - start)
+                columns = {name: self._read_column(f, layout, name, typecode, itemsize, start, count)
+                           for name, typecode, itemsize in layout.columns}
+                yield compile_events(ColumnEvents(columns, layout.strings))
+
+    def read_times(self):
+        """Yield the time column chunk by chunk without compiling anything."""
+        with open(self.path, "rb") as f:
+            layout = read_layout(f, self.path)
+            for start in range(0, layout.count, self.chunk_size):
+                yield self._read_column(f, layout, "time", "d", 8, start, min(self.chunk_size, layout.count - start))
+
+    def chunks(self):
+        return read_ahead(self.read_chunks())
+
+
+# Matches the last "time" value of a recording written by json.dump
+_LAST_TIME = re.compile(rb'"time":\s*(-?[0-9][0-9.eE+-]*)')
+
+
+class JsonChunkReader:
+    """Playback source that parses a JSON recording incrementally, chunk by chunk."""
+
+    def __init__(self, path, chunk_size=STREAM_CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.duration = self._find_duration()
+
+    def _find_duration(self):
+        # Recorder writes 'time' last in every event, so the last match in the
+        # tail of the file is the duration of the recording
+        with open(self.path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 4096))
+            matches = _LAST_TIME.findall(f.read())
+        try:
+            return float(matches[-1]) if matches else None
+        except ValueError:
+            return None
+
+    def read_chunks(self):
+        with open(self.path, "r") as f:
+            batch = []
+            for event in iter_json_array(f):
+                batch.append(event)
+                if len(batch) == self.chunk_size:
+                    yield compile_events(batch)
+                    batch = []
+            if batch:
+                yield compile_events(batch)
+
+    def read_times(self):
+        """Yield the event times chunk by chunk."""
+        for chunk in self.read_chunks():
+            yield chunk.times
+
+    def chunks(self):
+        return read_ahead(self.read_chunks())
+
+
+def open_playback_stream(path, chunk_size=STREAM_CHUNK_SIZE):
+    """Return a chunked playback source for a recording in either format."""
+    if is_binary_recording(path):
+        return BinaryChunkReader(path, chunk_size)
+    return JsonChunkReader(path, chunk_size)
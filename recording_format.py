@@ -0,0 +1,366 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from event_buffer import COLUMNS, ColumnEvents, EventBuffer
+
+# Binary recording layout (all little-endian):
+#   header        magic, version, header size, event count, string count, string table size
+#   string table  (string count + 1) uint32 offsets followed by the UTF-8 blob
+#   columns       one fixed-width column per field, each 8-byte aligned:
+#                 time f64, x f32, y f32, dx f32, dy f32, string id i32, code u8
+# Version 1 stored x, y, dx and dy as i32; such recordings still load.
+# Key names and mouse button names are stored once in the string table and
+# referenced from the string id column (-1 when the event has neither).
+MAGIC = b"AWZR"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sHHQII")
+
+# Column layout of each format version
+VERSION_COLUMNS = {
+    1: tuple((name, "i" if typecode == "f" else typecode, itemsize) for name, typecode, itemsize in COLUMNS),
+    2: COLUMNS,
+}
+
+BINARY_EXTENSION = ".awz"
+JSON_EXTENSION = ".json"
+RECORDING_EXTENSIONS = (BINARY_EXTENSION, JSON_EXTENSION)
+DEFAULT_EXTENSION = BINARY_EXTENSION
+
+# Directory to store recordings
+RECORDINGS_DIR = "recordings"
+
+# Saves and loads report progress after roughly this many bytes or events
+PROGRESS_CHUNK_BYTES = 4 * 1024 * 1024
+PROGRESS_CHUNK_EVENTS = 20000
+
+# Suffix of the temporary file a recording is written to before it is renamed into place
+TEMP_SUFFIX = ".tmp"
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def write_binary(path, events, progress=None):
+    """Write events in the binary format. Column-backed recordings are written without decoding.
+
+    progress, if given, is called with the fraction written so far. It may
+    raise to abandon the write.
+    """
+    if not hasattr(events, "as_columns"):
+        events = EventBuffer.from_events(events)
+    columns, strings = events.as_columns()
+    count = len(columns["time"])
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = array("I", [0])
+    for blob in encoded:
+        offsets.append(offsets[-1] + len(blob))
+    blob = b"".join(encoded)
+    table_size = 4 * len(offsets) + len(blob)
+    total = count * sum(itemsize for _, _, itemsize in COLUMNS)
+    written = 0
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, HEADER.size, count, len(strings), table_size))
+        f.write(_little_endian(offsets))
+        f.write(blob)
+        position = HEADER.size + table_size
+        for name, typecode, _ in COLUMNS:
+            padding = _align(position) - position
+            f.write(b"\0" * padding)
+            column = columns[name]
+            if memoryview(column).format != typecode:
+                column = array(typecode, column)  # Integer positions of a version 1 recording
+            column = memoryview(_little_endian(column)).cast("B")
+            for start in range(0, len(column), PROGRESS_CHUNK_BYTES):
+                chunk = column[start:start + PROGRESS_CHUNK_BYTES]
+                f.write(chunk)
+                written += len(chunk)
+                if progress:
+                    progress(written / total)
+            position += padding + len(column)
+        if progress and not total:
+            progress(1.0)
+
+
+def _little_endian(column):
+    if sys.byteorder == "little":
+        return column
+    swapped = array(column.typecode if isinstance(column, array) else column.format, column)
+    swapped.byteswap()
+    return swapped
+
+
+class RecordingLayout:
+    """Event count, string table, column types and column offsets of a binary recording."""
+
+    def __init__(self, count, strings, offsets, columns=COLUMNS):
+        self.count = count
+        self.strings = strings
+        self.offsets = offsets
+        self.columns = columns  # (name, typecode, itemsize) of each column, see VERSION_COLUMNS
+
+
+def read_layout(f, path):
+    """Read and validate the header and string table of an open binary recording."""
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    f.seek(0)
+    if size < HEADER.size:
+        raise ValueError(f"{path} is truncated")
+    magic, version, header_size, count, string_count, table_size = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a binary recording")
+    if version > FORMAT_VERSION:
+        raise ValueError(f"{path} uses format version {version}, newer than supported ({FORMAT_VERSION})")
+    columns = VERSION_COLUMNS.get(version)
+    if columns is None:
+        raise ValueError(f"{path} uses unknown format version {version}")
+    offsets = {}
+    position = header_size + table_size
+    for name, typecode, itemsize in columns:
+        position = _align(position)
+        offsets[name] = position
+        position += itemsize * count
+    if position > size or 4 * (string_count + 1) > table_size:
+        raise ValueError(f"{path} is truncated")
+    f.seek(header_size)
+    table = f.read(table_size)
+    string_offsets = struct.unpack_from(f"<{string_count + 1}I", table)
+    blob_start = 4 * (string_count + 1)
+    strings = [table[blob_start + string_offsets[i]:blob_start + string_offsets[i + 1]].decode("utf-8")
+               for i in range(string_count)]
+    return RecordingLayout(count, strings, offsets, columns)
+
+
+class MappedRecording(ColumnEvents):
+    """Read-only view of a binary recording backed by mmap.
+
+    Columns are exposed without copying and events are only decoded when
+    they are indexed or iterated.
+    """
+
+    def __init__(self, path):
+        super().__init__({}, [])
+        self.path = path
+        self._buf = None
+        self._map = None
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path} is not a valid recording")
+        try:
+            self._parse()
+        except Exception:
+            self.close()
+            raise
+
+    def _parse(self):
+        # The layout is validated against the file size before any views are
+        # created, so a bad file never leaves exported buffers on the mapping
+        layout = read_layout(self._file, self.path)
+        self.strings = layout.strings
+        self._buf = memoryview(self._map)
+        for name, typecode, itemsize in layout.columns:
+            self.columns[name] = self._column(self._buf, layout.offsets[name], typecode, layout.count)
+
+    @staticmethod
+    def _column(buf, offset, typecode, count):
+        raw = buf[offset:offset + array(typecode).itemsize * count]
+        if sys.byteorder == "little":
+            return raw.cast(typecode)
+        # Big-endian hosts cannot use the mapping directly
+        column = array(typecode, bytes(raw))
+        column.byteswap()
+        return column
+
+    def close(self):
+        # Views into the mapping must be released before it can be closed
+        for column in self.columns.values():
+            if isinstance(column, memoryview):
+                column.release()
+        if self._buf is not None:
+            self._buf.release()
+            self._buf = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def is_binary_recording(path):
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def iter_json_array(f, block_size=65536):
+    """Yield the items of a top-level JSON array without reading the whole file."""
+    decoder = json.JSONDecoder()
+    text = ""
+    position = 0
+    eof = False
+    started = False
+    while True:
+        # Skip whitespace and separators, reading more text as needed
+        while position < len(text) and text[position] in " \t\r\n,":
+            position += 1
+        if position == len(text):
+            if eof:
+                raise ValueError("Recording is truncated" if started else "Recording is empty")
+            block = f.read(block_size)
+            eof = not block
+            text = block
+            position = 0
+            continue
+        if not started:
+            if text[position] != "[":
+                raise ValueError("Recording is not a JSON list")
+            started = True
+            position += 1
+            continue
+        if text[position] == "]":
+            return
+        try:
+            item, position = decoder.raw_decode(text, position)
+        except json.JSONDecodeError:
+            # The item continues past the text read so far
+            if eof:
+                raise
+            block = f.read(block_size)
+            eof = not block
+            text = text[position:] + block
+            position = 0
+            continue
+        yield item
+
+
+def read_json(path, progress=None):
+    """Read a JSON recording into an EventBuffer, reporting the fraction of the file read."""
+    events = EventBuffer()
+    size = os.path.getsize(path) or 1
+    with open(path, 'r') as f:
+        for i, event in enumerate(iter_json_array(f)):
+            events.append(event)
+            if progress and i % PROGRESS_CHUNK_EVENTS == 0:
+                progress(min(f.buffer.tell() / size, 1.0))
+    if progress:
+        progress(1.0)
+    return events
+
+
+def write_json(f, events, progress=None):
+    """Write events as an indented JSON list, the same text json.dump(..., indent=4) produces."""
+    total = len(events)
+    if not total:
+        f.write("[]")
+        if progress:
+            progress(1.0)
+        return
+    f.write("[\n    ")
+    for i, event in enumerate(events):
+        if i:
+            f.write(",\n    ")
+        f.write(json.dumps(dict(event), indent=4).replace("\n", "\n    "))
+        if progress and (i + 1) % PROGRESS_CHUNK_EVENTS == 0:
+            progress((i + 1) / total)
+    f.write("\n]")
+    if progress:
+        progress(1.0)
+
+
+def load_recording(path, progress=None):
+    """Load a recording in either format.
+
+    Binary recordings are memory-mapped; JSON recordings are packed into an
+    EventBuffer as they are read. progress, if given, is called with the
+    fraction loaded so far and may raise to abandon the load.
+    """
+    if is_binary_recording(path):
+        recording = MappedRecording(path)
+        if progress:
+            try:
+                progress(1.0)
+            except BaseException:
+                # Cancelled; unmap so the file can be replaced or deleted
+                recording.close()
+                raise
+        return recording
+    return read_json(path, progress)
+
+
+def save_recording(path, events, progress=None):
+    """Save events, choosing the format from the file extension.
+
+    The recording is written to a temporary file next to path and renamed
+    over it only once complete, so a crash or an abandoned save never
+    leaves a truncated recording behind.
+    """
+    temp_path = path + TEMP_SUFFIX
+    try:
+        if path.endswith(JSON_EXTENSION):
+            with open(temp_path, 'w') as f:
+                write_json(f, events, progress)
+                f.flush()
+                os.fsync(f.fileno())
+        else:
+            write_binary(temp_path, events, progress)
+            with open(temp_path, 'rb+') as f:
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def convert_recording(source, destination):
+    """Convert a recording between the JSON and binary formats. Returns the number of events."""
+    events = load_recording(source)
+    try:
+        save_recording(destination, events)
+        return len(events)
+    finally:
+        if isinstance(events, MappedRecording):
+            events.close()
+
+
+def recording_path(directory, name, extension=DEFAULT_EXTENSION):
+    return os.path.join(directory, f"recording_{name}{extension}")
+
+
+def find_recording(directory, name):
+    """Return the path of the named recording, preferring the binary format, or None."""
+    for extension in RECORDING_EXTENSIONS:
+        path = recording_path(directory, name, extension)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def recording_name(filename):
+    """Return the recording name for a recording_*.awz/json file name, or None."""
+    if not filename.startswith("recording_"):
+        return None
+    for extension in RECORDING_EXTENSIONS:
+        if filename.endswith(extension):
+            return filename[len("recording_"):-len(extension)]
+    return None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python recording_format.py <source> <destination>")
+        print("Converts between .json and .awz recordings based on the destination extension.")
+        sys.exit(2)
+    converted = convert_recording(sys.argv[1], sys.argv[2])
+    print(f"Converted {converted} events from {sys.argv[1]} to {sys.argv[2]}")
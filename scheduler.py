@@ -0,0 +1,250 @@
+import threading
+import time
+
+# Playback timing modes. Every wait is split into a coarse sleep followed by a
+# short busy-wait on perf_counter(). The spin window is sized from the measured
+# oversleep of time.sleep() on this machine, so we only spin for the final
+# fraction of a millisecond instead of the whole gap.
+#   spin_margin:   extra spin time on top of the calibrated oversleep (seconds)
+#   oversleep:     which calibrated oversleep figure to budget for ("p50", "p99" or None)
+#   max_sleep:     longest single sleep, bounds how quickly a stop is noticed
+TIMING_MODES = {
+    "precise": {"spin_margin": 0.0005, "oversleep": "p99", "max_sleep": 0.02},
+    "balanced": {"spin_margin": 0.0002, "oversleep": "p50", "max_sleep": 0.05},
+    "low-power": {"spin_margin": 0.0, "oversleep": None, "max_sleep": 0.1},
+}
+
+DEFAULT_TIMING_MODE = "balanced"
+
+# What playback does with an event found more than CATCH_UP_AFTER seconds
+# overdue, e.g. after a GC pause, a slow controller call or system load
+CATCH_UP_POLICIES = {
+    "burst": "fire overdue events back to back until back on schedule",
+    "shift": "delay the rest of the timeline by the lateness, keeping recorded gaps",
+    "skip-moves": "drop overdue mouse moves that a later overdue event supersedes; keys, clicks and scrolls always play",
+}
+
+DEFAULT_CATCH_UP_POLICY = "burst"
+
+CATCH_UP_AFTER = 0.02
+
+# Cached result of calibrate_sleep(), measured once per process
+_sleep_calibration = None
+_calibration_lock = threading.Lock()
+
+
+def calibrate_sleep(samples=25, request=0.001):
+    """Measure how late time.sleep() wakes up and cache the result.
+
+    Callers arriving while a measurement is running wait for it, so it can
+    be started early on a background thread (see start_calibration).
+    """
+    global _sleep_calibration
+    with _calibration_lock:
+        if _sleep_calibration is None:
+            _sleep_calibration = _measure_oversleep(samples, request)
+        return _sleep_calibration
+
+
+def start_calibration():
+    """Calibrate on a background thread while the caller does other startup work."""
+    threading.Thread(target=calibrate_sleep, name="autowiz-calibrate", daemon=True).start()
+
+
+def _measure_oversleep(samples, request):
+    overshoots = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        time.sleep(request)
+        overshoots.append(max(0.0, time.perf_counter() - start - request))
+    overshoots.sort()
+    return {
+        "p50": overshoots[len(overshoots) // 2],
+        "p99": overshoots[min(len(overshoots) - 1, int(len(overshoots) * 0.99))],
+    }
+
+
+class Scheduler:
+    def __init__(self, mode=DEFAULT_TIMING_MODE, tracer=None):
+        if mode not in TIMING_MODES:
+            raise ValueError(f"Unknown timing mode: {mode}")
+        settings = TIMING_MODES[mode]
+        self.mode = mode
+        self.max_sleep = settings["max_sleep"]
+        self.spin_window = settings["spin_margin"]
+        if settings["oversleep"]:
+            self.spin_window += calibrate_sleep()[settings["oversleep"]]
+        self.tracer = tracer
+        if tracer is not None:
+            # Swapped in per instance so untraced waits pay nothing for tracing
+            self.wait_until = self.traced_wait_until
+
+    def wait_until(self, target, keep_waiting=None):
+        """Block until time.perf_counter() reaches target.
+
+        keep_waiting is polled between sleeps; returns False if it reported
+        that the wait should be abandoned, True once the target is reached.
+        """
+        perf_counter = time.perf_counter
+        sleep_until = target - self.spin_window
+        # Coarse phase: sleep in bounded chunks so a stop request is noticed
+        while True:
+            remaining = sleep_until - perf_counter()
+            if remaining <= 0:
+                break
+            if keep_waiting is not None and not keep_waiting():
+                return False
+            time.sleep(min(remaining, self.max_sleep))
+        # Fine phase: spin for the last part of the wait
+        while perf_counter() < target:
+            pass
+        return keep_waiting is None or keep_waiting()
+
+    def traced_wait_until(self, target, keep_waiting=None):
+        """wait_until() that records its sleep and spin phases as tracer spans."""
+        perf_counter = time.perf_counter
+        tracer = self.tracer
+        sleep_until = target - self.spin_window
+        start = perf_counter()
+        sleeps = 0
+        while True:
+            now = perf_counter()
+            remaining = sleep_until - now
+            if remaining <= 0:
+                break
+            if keep_waiting is not None and not keep_waiting():
+                tracer.span("sleep", "scheduler", start, now, {"sleeps": sleeps, "abandoned": True})
+                return False
+            time.sleep(min(remaining, self.max_sleep))
+            sleeps += 1
+        if sleeps:
+            tracer.span("sleep", "scheduler", start, now, {"sleeps": sleeps})
+        spin_start = perf_counter()
+        while perf_counter() < target:
+            pass
+        tracer.span("spin", "scheduler", spin_start, perf_counter())
+        return keep_waiting is None or keep_waiting()
+
+
+# How often Timeline.ramp() steps the speed, in seconds
+RAMP_INTERVAL = 0.05
+
+
+class Timeline:
+    """Maps recording time to perf_counter() time at a speed that can change during playback.
+
+    anchor is an (origin, speed) tuple replaced in one assignment, where
+    origin is the perf_counter() that recording time 0 maps to; a reader
+    never sees the two halves of different changes. version goes up after
+    every change so a waiting player knows to recompute its target.
+    """
+
+    def __init__(self, speed=1.0):
+        if speed <= 0:
+            raise ValueError(f"Speed must be positive: {speed}")
+        self.anchor = (time.perf_counter(), speed)
+        self.version = 0
+        self._lock = threading.Lock()
+        self._ramp_stop = None
+
+    @property
+    def speed(self):
+        return self.anchor[1]
+
+    def start(self, position=0.0):
+        """Map recording time position to now at the current speed. Returns the new origin."""
+        with self._lock:
+            speed = self.anchor[1]
+            origin = time.perf_counter() - position / speed
+            self.anchor = (origin, speed)
+            self.version += 1
+        return origin
+
+    def position(self):
+        """Return the recording time that corresponds to now."""
+        origin, speed = self.anchor
+        return (time.perf_counter() - origin) * speed
+
+    def wall_time(self, recording_time):
+        """Return the perf_counter() at which recording_time is due."""
+        origin, speed = self.anchor
+        return origin + recording_time / speed
+
+    def shift(self, delay):
+        """Move the whole remaining timeline delay seconds later."""
+        with self._lock:
+            origin, speed = self.anchor
+            self.anchor = (origin + delay, speed)
+            self.version += 1
+
+    def set_speed(self, speed):
+        """Change the speed from now on, cancelling any ramp in progress."""
+        self.cancel_ramp()
+        self._set_speed(speed)
+
+    def _set_speed(self, speed):
+        if speed <= 0:
+            raise ValueError(f"Speed must be positive: {speed}")
+        with self._lock:
+            # Re-anchor at the current position so nothing jumps or bunches up
+            origin, old_speed = self.anchor
+            now = time.perf_counter()
+            position = (now - origin) * old_speed
+            self.anchor = (now - position / speed, speed)
+            self.version += 1
+
+    def ramp(self, speed, duration, interval=RAMP_INTERVAL):
+        """Change the speed linearly to speed over duration seconds, on a background thread."""
+        if speed <= 0:
+            raise ValueError(f"Speed must be positive: {speed}")
+        self.cancel_ramp()
+        start_speed = self.anchor[1]
+        steps = max(1, int(duration / interval))
+        stop_event = self._ramp_stop = threading.Event()
+
+        def step():
+            for i in range(1, steps + 1):
+                if stop_event.wait(duration / steps):
+                    return
+                self._set_speed(start_speed + (speed - start_speed) * i / steps)
+
+        threading.Thread(target=step, name="autowiz-speed-ramp", daemon=True).start()
+
+    def cancel_ramp(self):
+        if self._ramp_stop is not None:
+            self._ramp_stop.set()
+            self._ramp_stop = None
+
+
+def measure_jitter(mode, samples=200, interval=0.005):
+    """Schedule evenly spaced wakeups and report how late each one fired.
+
+    Returns lateness percentiles in microseconds and the fraction of one
+    core the scheduler kept busy while waiting.
+    """
+    scheduler = Scheduler(mode)
+    lateness = []
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for i in range(1, samples + 1):
+        target = wall_start + i * interval
+        scheduler.wait_until(target)
+        lateness.append((time.perf_counter() - target) * 1e6)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    lateness.sort()
+    return {
+        "mode": mode,
+        "p50_us": lateness[len(lateness) // 2],
+        "p99_us": lateness[min(len(lateness) - 1, int(len(lateness) * 0.99))],
+        "max_us": lateness[-1],
+        "cpu": cpu / wall if wall > 0 else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    print(f"{'mode':<10} {'p50 (us)':>10} {'p99 (us)':>10} {'max (us)':>10} {'cpu':>6}")
+    for timing_mode in TIMING_MODES:
+        result = measure_jitter(timing_mode)
+        print(f"{result['mode']:<10} {result['p50_us']:>10.1f} {result['p99_us']:>10.1f} "
+              f"{result['max_us']:>10.1f} {result['cpu']:>6.1%}")
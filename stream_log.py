@@ -0,0 +1,244 @@
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import deque
+from event_buffer import EventAppender, EventBuffer
+from log import logger
+from recording_format import save_recording, recording_path, BINARY_EXTENSION
+
+# Append-only session log written while a streamed recording is in progress.
+# Layout: a small header followed by records, each starting with a tag byte:
+#   string record  tag, string id u32, length u16, UTF-8 bytes
+#   event record   tag, time f64, code u8, x f32, y f32, dx f32, dy f32, string id i32
+# Version 1 logs stored x, y, dx and dy as i32 and are still read.
+# Strings are always logged before the first event that references them, so
+# any prefix of the file is a valid log. A record cut short by a crash is
+# simply ignored when the log is read back.
+LOG_MAGIC = b"AWZL"
+LOG_VERSION = 2
+LOG_HEADER = struct.Struct("<4sHH")
+STRING_RECORD = struct.Struct("<BIH")
+EVENT_RECORD = struct.Struct("<BdBffffi")
+# Event record layout of each log version
+VERSION_EVENT_RECORDS = {1: struct.Struct("<BdBiiiii"), 2: EVENT_RECORD}
+TAG_STRING = 1
+TAG_EVENT = 2
+
+LOG_PREFIX = ".session_"
+LOG_EXTENSION = ".awzlog"
+
+# Seconds between writes of the pending batch to disk
+STREAM_FLUSH_INTERVAL = 1.0
+
+
+class StreamingLog(EventAppender):
+    """Event sink that appends to an on-disk session log instead of memory.
+
+    The append methods only pack the row and queue it; a background writer
+    thread appends queued rows to the file in batches and fsyncs them every
+    flush_interval seconds.
+    """
+
+    def __init__(self, path, flush_interval=STREAM_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.count = 0
+        self._string_ids = {}
+        self._pending = deque()
+        self._push = self._pending.append
+        self._file = open(path, "wb")
+        self._file.write(LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION, 0))
+        self._file.flush()
+        self._stop_event = threading.Event()
+        self._writer = threading.Thread(target=self._write_loop, name="autowiz-stream-writer", daemon=True)
+        self._writer.start()
+
+    def __len__(self):
+        return self.count
+
+    def intern(self, string):
+        string_id = self._string_ids.get(string)
+        if string_id is None:
+            string_id = self._string_ids[string] = len(self._string_ids)
+            encoded = string.encode("utf-8")
+            self._push(STRING_RECORD.pack(TAG_STRING, string_id, len(encoded)) + encoded)
+        return string_id
+
+    def _append_row(self, time_value, code, x, y, dx, dy, string_id):
+        self._push(EVENT_RECORD.pack(TAG_EVENT, time_value, code, x, y, dx, dy, string_id))
+        self.count += 1
+
+    def _write_pending(self):
+        pending = self._pending
+        batch = []
+        while pending:
+            batch.append(pending.popleft())
+        if not batch:
+            return
+        position = self._file.tell()
+        try:
+            self._file.write(b"".join(batch))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except OSError:
+            # Requeue the batch and cut off anything partly written, so the
+            # next attempt writes it again from the same place
+            pending.extendleft(reversed(batch))
+            try:
+                self._file.seek(position)
+                self._file.truncate()
+            except OSError:
+                pass
+            raise
+
+    def _unwritten_events(self):
+        return sum(1 for record in list(self._pending) if record[0] == TAG_EVENT)
+
+    def _write_loop(self):
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self._write_pending()
+            except OSError as e:
+                logger.error("Error writing session log %s: %s; retrying %d events", self.path, e,
+                             self._unwritten_events())
+
+    def close(self):
+        """Stop the writer and flush everything queued so far."""
+        self._stop_event.set()
+        self._writer.join()
+        try:
+            self._write_pending()
+        except OSError as e:
+            logger.error("Error writing session log %s: %s; %d events were lost", self.path, e,
+                         self._unwritten_events())
+            self._pending.clear()
+        finally:
+            self._file.close()
+
+
+def new_log_path(directory):
+    return os.path.join(directory, f"{LOG_PREFIX}{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}{LOG_EXTENSION}")
+
+
+def read_log(path):
+    """Read a session log into an EventBuffer, stopping at a torn or corrupt tail."""
+    events = EventBuffer()
+    if os.path.getsize(path) < LOG_HEADER.size:
+        return events
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        magic, version, _ = LOG_HEADER.unpack_from(data)
+        if magic != LOG_MAGIC or version not in VERSION_EVENT_RECORDS:
+            raise ValueError(f"{path} is not a session log")
+        _read_records(path, data, events, VERSION_EVENT_RECORDS[version])
+    return events
+
+
+def _read_records(path, data, events, event_record=EVENT_RECORD):
+    strings = {}
+    position = LOG_HEADER.size
+    end = len(data)
+    while position < end:
+        tag = data[position]
+        if tag == TAG_EVENT:
+            if position + event_record.size > end:
+                break
+            _, time_value, code, x, y, dx, dy, string_id = event_record.unpack_from(data, position)
+            if string_id >= 0 and string_id not in strings:
+                logger.warning("Session log %s is corrupt at byte %d; keeping the events before it", path, position)
+                break
+            position += event_record.size
+            events._append_row(time_value, code, x, y, dx, dy,
+                               -1 if string_id < 0 else events.intern(strings[string_id]))
+        elif tag == TAG_STRING:
+            if position + STRING_RECORD.size > end:
+                break
+            _, string_id, length = STRING_RECORD.unpack_from(data, position)
+            start = position + STRING_RECORD.size
+            if start + length > end:
+                break
+            strings[string_id] = data[start:start + length].decode("utf-8")
+            position = start + length
+        else:
+            logger.warning("Session log %s is corrupt at byte %d; keeping the events before it", path, position)
+            break
+
+
+def finalize_log(log_path, directory, name=None, progress=None):
+    """Turn a session log into a normal binary recording and delete the log.
+
+    Returns the path of the new recording, or None if the log held no events.
+    progress is passed on to save_recording; if it raises, the log is kept.
+    """
+    events = read_log(log_path)
+    destination = None
+    if len(events):
+        if name is None:
+            stamp = os.path.basename(log_path)[len(LOG_PREFIX):-len(LOG_EXTENSION)]
+            name = f"autosave_{stamp}"
+        destination = recording_path(directory, name, BINARY_EXTENSION)
+        save_recording(destination, events, progress)
+    os.remove(log_path)
+    return destination
+
+
+def log_writer_pid(filename):
+    """Return the pid of the process that wrote a session log, from its name, or None."""
+    try:
+        return int(filename[:-len(LOG_EXTENSION)].rsplit("_", 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def process_alive(pid):
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        # os.kill would terminate the process on Windows, so ask for its exit code instead
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        try:
+            exit_code = ctypes.c_ulong()
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+            return exit_code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists but belongs to another user
+    return True
+
+
+def recover_logs(directory):
+    """Finalize session logs left behind by a crashed session. Returns the recovered recording paths.
+
+    Logs whose writer is still running, e.g. a cli.py record --stream in
+    another terminal, are left alone.
+    """
+    recovered = []
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return recovered
+    for filename in names:
+        if filename.startswith(LOG_PREFIX) and filename.endswith(LOG_EXTENSION):
+            log_path = os.path.join(directory, filename)
+            pid = log_writer_pid(filename)
+            if pid is not None and process_alive(pid):
+                logger.info("Skipping %s; the process writing it is still running", log_path)
+                continue
+            try:
+                destination = finalize_log(log_path, directory)
+                if destination:
+                    recovered.append(destination)
+                    logger.info("Recovered interrupted recording from %s", log_path)
+            except (OSError, ValueError) as e:
+                logger.error("Could not recover %s: %s", log_path, e)
+    return recovered
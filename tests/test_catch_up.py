@@ -0,0 +1,76 @@
+"""What playback does once it falls behind schedule. Run from the repository root: python -m pytest tests"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import CaptureBackend  # noqa: E402
+from engine import Player  # noqa: E402
+from event_buffer import EventBuffer  # noqa: E402
+from plan import OP_KEY_PRESS, OP_KEY_RELEASE, OP_MOVE, compile_events  # noqa: E402
+
+# How long the first event holds up playback
+STALL = 0.2
+
+
+class StallingBackend(CaptureBackend):
+    """Capture backend whose first effect takes STALL seconds, like a GC pause or a slow controller call."""
+
+    def handlers(self):
+        handlers = super().handlers()
+
+        def wrap(handler):
+            def stalling(*args):
+                if not self.effects:
+                    time.sleep(STALL)
+                handler(*args)
+            return stalling
+
+        return tuple(wrap(handler) for handler in handlers)
+
+
+def stalled_recording():
+    """A key press, a move every 10 ms for 0.3 s, then the key release."""
+    events = EventBuffer()
+    events.append_key(0.0, "a", True)
+    for i in range(30):
+        events.append_move(0.01 + i * 0.01, i, i)
+    events.append_key(0.31, "a", False)
+    return events
+
+
+def play(catch_up):
+    backend = StallingBackend()
+    player = Player(compile_events(stalled_recording()), backend=backend, catch_up=catch_up)
+    assert player.start()
+    player.wait(5)
+    assert player.error is None
+    return player, backend.effects
+
+
+def test_burst_fires_overdue_events_back_to_back():
+    player, effects = play("burst")
+    assert len(effects) == 32
+    assert player.catch_ups > 0 and player.moves_skipped == 0
+    # Back on schedule afterwards: the whole recording takes about as long as it was
+    elapsed = effects[-1][0] - effects[0][0]
+    assert elapsed < 0.31 - STALL + 0.1
+
+
+def test_shift_keeps_the_gaps_after_the_stall():
+    player, effects = play("shift")
+    assert len(effects) == 32
+    assert player.catch_ups > 0
+    # Everything after the stall is delayed by it, so the recorded 0.31 s still passes
+    assert effects[-1][0] - effects[0][0] >= 0.31 - 0.02
+
+
+def test_skip_moves_drops_overdue_moves_only():
+    player, effects = play("skip-moves")
+    assert player.moves_skipped > 0
+    assert player.moves_skipped == 32 - len(effects)
+    ops = [op for _, op, _ in effects]
+    assert ops[0] == OP_KEY_PRESS and ops[-1] == OP_KEY_RELEASE
+    # The cursor still gets to where the recording left it
+    assert [args for _, op, args in effects if op == OP_MOVE][-1] == (29, 29)
@@ -0,0 +1,97 @@
+"""Recording optimizer passes. Run from the repository root: python -m pytest tests"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import CaptureBackend  # noqa: E402
+from engine import Player  # noqa: E402
+from event_buffer import EventBuffer  # noqa: E402
+from optimizer import (build_pipeline, optimize_events, optimize_recording, drop_dead_events,  # noqa: E402
+                       collapse_key_repeats, drop_duplicate_moves, simplify_moves, DEFAULT_PASSES)
+from plan import OP_KEY_PRESS, OP_MOVE  # noqa: E402
+from recording_format import save_recording, load_recording  # noqa: E402
+
+
+def move(time_value, x, y):
+    return {'type': 'mouse', 'action': 'move', 'position': (x, y), 'time': time_value}
+
+
+def key(time_value, name, pressed):
+    return {'type': 'keyboard', 'action': 'press' if pressed else 'release', 'key': name, 'time': time_value}
+
+
+def click(time_value, pressed):
+    return {'type': 'mouse', 'action': 'click', 'position': (5, 5), 'button': 'Button.left',
+            'pressed': pressed, 'time': time_value}
+
+
+def test_dead_events():
+    events = [key(0.0, "r", False), click(0.1, False), click(0.2, True), click(0.3, False),
+              {'type': 'mouse', 'action': 'scroll', 'position': (5, 5), 'scroll': (0, 0), 'time': 0.4}]
+    assert drop_dead_events(events) == events[2:4]
+
+
+def test_key_repeats():
+    events = [key(0.0, "a", True), key(0.5, "a", True), key(0.53, "a", True), key(0.6, "a", False),
+              key(0.7, "a", True)]
+    assert collapse_key_repeats(events) == [events[0], events[3], events[4]]
+
+
+def test_duplicate_moves():
+    events = [move(0.0, 1, 1), move(0.1, 1, 1), click(0.2, True), move(0.3, 5, 5), move(0.4, 6, 6)]
+    assert drop_duplicate_moves(events) == [events[0], events[2], events[4]]
+
+
+def test_simplify_keeps_corners_and_run_ends():
+    events = [move(i * 0.01, i, 0) for i in range(5)] + [move(0.05 + i * 0.01, 4, i) for i in range(1, 5)]
+    events.append(click(0.1, True))
+    kept = simplify_moves(events)
+    assert [event['position'] for event in kept[:-1]] == [(0, 0), (4, 0), (4, 4)]
+    assert kept[-1] is events[-1]
+
+
+def test_simplify_keeps_the_timing_of_a_slow_drag():
+    # 101 moves over 2 s along a straight line: a slider dragged slowly
+    events = [click(0.0, True)] + [move(0.02 + i * 0.02, i, 0) for i in range(101)] + [click(2.1, False)]
+    kept = [event for event in simplify_moves(events) if event['action'] == 'move']
+    assert 2 < len(kept) < 101
+    assert max(b['time'] - a['time'] for a, b in zip(kept, kept[1:])) <= 0.05
+    assert kept[0] is events[1] and kept[-1] is events[-2]
+
+
+def test_simplify_keeps_a_pause_in_a_straight_line():
+    # Constant direction but the cursor stops half way
+    events = [move(i * 0.01, i, 0) for i in range(10)] + [move(1.0 + i * 0.01, 10 + i, 0) for i in range(10)]
+    kept = simplify_moves(events, max_interval=None)
+    assert events[9] in kept and events[10] in kept
+
+
+def test_repeats_is_opt_in():
+    assert "repeats" not in DEFAULT_PASSES
+    events = [key(0.0, "a", True), key(0.5, "a", True), key(0.6, "a", False)]
+    assert len(optimize_events(events)[0]) == 3
+    assert len(optimize_events(events, build_pipeline(["repeats"]))[0]) == 2
+
+
+def test_optimized_recording_plays_the_same_keys(tmp_path):
+    events = EventBuffer()
+    events.append_key(0.0, "r", False)
+    for i in range(50):
+        events.append_move(0.01 + i * 0.001, i, i)
+    events.append_key(0.06, "a", True)
+    events.append_key(0.07, "a", False)
+    path = str(tmp_path / "macro.awz")
+    save_recording(path, events)
+    report = optimize_recording(path)
+    assert report.events_after < report.events_before
+
+    recording = load_recording(path)
+    backend = CaptureBackend()
+    player = Player(recording, backend=backend, max_speed=True)
+    assert player.start()
+    player.wait(5)
+    recording.close()
+    effects = [(op, args) for _, op, args in backend.effects]
+    assert [args for op, args in effects if op == OP_KEY_PRESS] == [("a",)]
+    assert [args for op, args in effects if op == OP_MOVE][-1] == (49, 49)
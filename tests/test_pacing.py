@@ -0,0 +1,59 @@
+"""Idle-gap compression combined with seeking. Run from the repository root: python -m pytest tests"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import CaptureBackend  # noqa: E402
+from engine import Player  # noqa: E402
+from event_buffer import EventBuffer  # noqa: E402
+from pacing import GapPolicy  # noqa: E402
+from playback_stream import open_playback_stream  # noqa: E402
+from plan import OP_MOVE, compile_events  # noqa: E402
+from recording_format import save_recording  # noqa: E402
+
+
+def idle_recording():
+    """A move, 14 s of nothing, then a burst of moves 10 ms apart."""
+    events = EventBuffer()
+    events.append_move(0.0, 0, 0)
+    for i in range(10):
+        events.append_move(14.0 + i * 0.01, i, i)
+    return events
+
+
+def play(source, **options):
+    backend = CaptureBackend()
+    player = Player(source, backend=backend, gap_policy=GapPolicy(max_gap=0.1), **options)
+    assert player.start()
+    player.wait(5)
+    assert not player.playing
+    assert player.error is None
+    return [args for _, op, args in backend.effects if op == OP_MOVE]
+
+
+def test_start_offset_is_in_recording_time():
+    moves = play(compile_events(idle_recording()), start_offset=14.0)
+    assert moves[-10:] == [(i, i) for i in range(10)]
+
+
+def test_start_offset_between_events():
+    # The 13 s left of the idle gap is capped like the rest of it
+    moves = play(compile_events(idle_recording()), start_offset=1.0)
+    assert moves[-10:] == [(i, i) for i in range(10)]
+
+
+def test_start_offset_in_streamed_recording(tmp_path):
+    path = str(tmp_path / "idle.awz")
+    save_recording(path, idle_recording())
+    moves = play(open_playback_stream(path, chunk_size=4), start_offset=14.05)
+    assert moves[-5:] == [(i, i) for i in range(5, 10)]
+
+
+def test_streamed_duration_is_measured_in_the_background(tmp_path):
+    path = str(tmp_path / "idle.json")
+    save_recording(path, idle_recording())
+    retimed = GapPolicy(max_gap=0.1).apply(open_playback_stream(path))
+    # Until it is measured, the recorded duration stands in
+    assert retimed.duration in (retimed.source.duration, retimed.compute_duration())
+    assert abs(retimed.compute_duration() - 0.19) < 1e-9
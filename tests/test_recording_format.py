@@ -0,0 +1,71 @@
+"""Saving, loading and converting recordings. Run from the repository root: python -m pytest tests"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import CaptureBackend  # noqa: E402
+from engine import Player  # noqa: E402
+from event_buffer import EventBuffer  # noqa: E402
+from plan import OP_KEY_PRESS, OP_MOVE, OP_BUTTON_PRESS, OP_SCROLL  # noqa: E402
+from recording_format import load_recording, save_recording, convert_recording, MappedRecording  # noqa: E402
+
+
+def sample_recording():
+    """One event of every kind, with fractional positions and scrolls."""
+    events = EventBuffer()
+    events.append_move(0.0, 10, 20)
+    events.append_move(0.01, 10.5, 20.25)
+    events.append_click(0.02, 11, 21, "Button.left", True)
+    events.append_click(0.03, 11, 21, "Button.left", False)
+    events.append_scroll(0.04, 11, 21, 0, -1.5)
+    events.append_key(0.05, "a", True)
+    events.append_key(0.06, "a", False)
+    events.append_key(0.07, "Key.esc", True)
+    events.append_key(0.08, "<179>", True)  # A key with only a virtual key code
+    return events
+
+
+def load(path):
+    events = load_recording(path)
+    try:
+        return [dict(event) for event in events]
+    finally:
+        if isinstance(events, MappedRecording):
+            events.close()
+
+
+def test_round_trip(tmp_path):
+    expected = [dict(event) for event in sample_recording()]
+    for extension in (".awz", ".json"):
+        path = str(tmp_path / f"sample{extension}")
+        save_recording(path, sample_recording())
+        assert load(path) == expected
+        assert not os.path.exists(path + ".tmp")
+
+
+def test_conversion_keeps_every_event(tmp_path):
+    json_path = str(tmp_path / "sample.json")
+    binary_path = str(tmp_path / "sample.awz")
+    back_path = str(tmp_path / "back.json")
+    save_recording(json_path, sample_recording())
+    assert convert_recording(json_path, binary_path) == len(sample_recording())
+    assert convert_recording(binary_path, back_path) == len(sample_recording())
+    assert load(back_path) == load(json_path)
+
+
+def test_loaded_recording_plays_what_was_recorded(tmp_path):
+    path = str(tmp_path / "sample.awz")
+    save_recording(path, sample_recording())
+    events = load_recording(path)
+    backend = CaptureBackend()
+    player = Player(events, backend=backend, max_speed=True)
+    assert player.start()
+    player.wait(5)
+    events.close()
+    assert player.error is None
+    effects = [(op, args) for _, op, args in backend.effects]
+    assert (OP_MOVE, (10.5, 20.25)) in effects
+    assert (OP_BUTTON_PRESS, (11, 21, "Button.left")) in effects
+    assert (OP_SCROLL, (0, -1.5)) in effects
+    assert (OP_KEY_PRESS, ("<179>",)) in effects
@@ -0,0 +1,106 @@
+"""Seeking, restoring state and checkpoints. Run from the repository root: python -m pytest tests"""
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import CaptureBackend  # noqa: E402
+from engine import Player  # noqa: E402
+from event_buffer import EventBuffer  # noqa: E402
+from pacing import GapPolicy  # noqa: E402
+from playback_stream import open_playback_stream  # noqa: E402
+from plan import OP_KEY_PRESS, OP_KEY_RELEASE, OP_MOVE, OP_BUTTON_RELEASE, compile_events  # noqa: E402
+from recording_format import save_recording  # noqa: E402
+
+
+def drag_recording():
+    """Shift held and the left button dragged from (0, 0) to (9, 9), one step every 10 ms."""
+    events = EventBuffer()
+    events.append_key(0.0, "Key.shift", True)
+    events.append_click(0.0, 0, 0, "Button.left", True)
+    for i in range(10):
+        events.append_move(0.01 + i * 0.01, i, i)
+    events.append_click(0.11, 9, 9, "Button.left", False)
+    events.append_key(0.12, "Key.shift", False)
+    return events
+
+
+def play(source, **options):
+    backend = CaptureBackend()
+    player = Player(source, backend=backend, max_speed=True, **options)
+    assert player.start()
+    player.wait(5)
+    assert player.error is None
+    return [(op, args) for _, op, args in backend.effects]
+
+
+def test_start_index_restores_the_state_at_that_step():
+    effects = play(compile_events(drag_recording()), start_index=7)
+    # What the recording holds at step 7 is let go, then the cursor goes where it was
+    assert effects[:3] == [(OP_KEY_RELEASE, ("Key.shift",)), (OP_BUTTON_RELEASE, (4, 4, "Button.left")),
+                           (OP_MOVE, (4, 4))]
+    assert [args for op, args in effects[3:] if op == OP_MOVE] == [(i, i) for i in range(5, 10)]
+
+
+def test_start_offset_finds_the_first_step_at_or_after_it():
+    effects = play(compile_events(drag_recording()), start_offset=0.055)
+    assert [args for op, args in effects if op == OP_MOVE][1:] == [(i, i) for i in range(5, 10)]
+
+
+def test_streamed_start_index_crosses_chunks(tmp_path):
+    path = str(tmp_path / "drag.awz")
+    save_recording(path, drag_recording())
+    effects = play(open_playback_stream(path, chunk_size=3), start_index=7)
+    assert [args for op, args in effects[3:] if op == OP_MOVE] == [(i, i) for i in range(5, 10)]
+
+
+def test_start_index_past_the_end_is_refused():
+    with pytest.raises(ValueError):
+        Player(compile_events(drag_recording()), backend=CaptureBackend(), start_index=len(drag_recording()))
+
+
+def stop_part_way(source, **options):
+    backend = CaptureBackend()
+    player = Player(source, backend=backend, **options)
+    assert player.start()
+    time.sleep(0.2)
+    player.stop()
+    player.wait(5)
+    return player, backend
+
+
+def slow_recording():
+    """A key press, then a move every 50 ms for 5 s."""
+    events = EventBuffer()
+    events.append_key(0.0, "a", True)
+    for i in range(100):
+        events.append_move(0.05 + i * 0.05, i, 0)
+    return events
+
+
+def test_stopping_leaves_a_checkpoint_that_resumes_there():
+    source = compile_events(slow_recording())
+    player, backend = stop_part_way(source)
+    checkpoint = player.checkpoint
+    assert checkpoint is not None and 0 < checkpoint.index < 101
+    assert checkpoint.time == source.times[checkpoint.index]
+    # The held key is released when playback stops
+    assert backend.effects[-1][1:] == (OP_KEY_RELEASE, ("a",))
+
+    effects = play(source, start_index=checkpoint.index)
+    moves = [args for op, args in effects if op == OP_MOVE]
+    assert moves[1] == (checkpoint.index - 1, 0)
+    assert (OP_KEY_PRESS, ("a",)) not in effects
+
+
+def test_checkpoint_time_is_in_recording_time_with_idle_pauses_shortened():
+    events = slow_recording()
+    events.append_move(60.0, 0, 0)
+    for i in range(100):
+        events.append_move(60.05 + i * 0.05, i, 1)
+    # Starts just before the 55 s pause, which is shortened to 0.1 s, and stops after it
+    player, _ = stop_part_way(compile_events(events), gap_policy=GapPolicy(max_gap=0.1), start_offset=4.98)
+    assert player.checkpoint.time >= 60.0
@@ -0,0 +1,69 @@
+"""Session logs written by streamed recordings. Run from the repository root: python -m pytest tests"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recording_format import load_recording  # noqa: E402
+from stream_log import StreamingLog, read_log, finalize_log, EVENT_RECORD  # noqa: E402
+
+
+def write_log(path, count=10):
+    """A log of count moves with a key press in the middle, as a recording session leaves it."""
+    log = StreamingLog(path, flush_interval=60)
+    for i in range(count):
+        log.append_move(i * 0.01, i, i + 0.5)
+        if i == count // 2:
+            log.append_key(i * 0.01, "a", True)
+    log.close()
+
+
+def test_log_reads_back(tmp_path):
+    path = str(tmp_path / "session.awzlog")
+    write_log(path)
+    events = [dict(event) for event in read_log(path)]
+    assert len(events) == 11
+    assert events[0]['position'] == (0, 0.5)
+    assert events[6] == {'type': 'keyboard', 'action': 'press', 'key': 'a', 'time': 0.05}
+
+
+def test_torn_tail_keeps_the_complete_events(tmp_path):
+    path = str(tmp_path / "session.awzlog")
+    write_log(path)
+    # A crash part way through writing the last event
+    size = os.path.getsize(path)
+    with open(path, "r+b") as f:
+        f.truncate(size - EVENT_RECORD.size // 2)
+    events = read_log(path)
+    assert len(events) == 10
+    assert dict(events[-1])['position'] == (8, 8.5)
+
+
+def test_corrupt_tail_keeps_the_events_before_it(tmp_path):
+    path = str(tmp_path / "session.awzlog")
+    write_log(path)
+    with open(path, "ab") as f:
+        f.write(b"\xff" * 40)
+    assert len(read_log(path)) == 11
+
+
+def test_finalize_turns_a_torn_log_into_a_recording(tmp_path):
+    path = str(tmp_path / "session.awzlog")
+    write_log(path)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 3)
+    destination = finalize_log(path, str(tmp_path), "recovered")
+    assert not os.path.exists(path)
+    recording = load_recording(destination)
+    try:
+        assert len(recording) == 10
+        assert dict(recording[6])['key'] == 'a'
+    finally:
+        recording.close()
+
+
+def test_empty_log_is_removed_without_a_recording(tmp_path):
+    path = str(tmp_path / "session.awzlog")
+    StreamingLog(path, flush_interval=60).close()
+    assert finalize_log(path, str(tmp_path)) is None
+    assert not os.path.exists(path)
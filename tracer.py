@@ -0,0 +1,129 @@
+import json
+import os
+import threading
+from time import perf_counter
+from log import logger
+from metrics import write_text
+
+# Opt-in timeline of what the recorder and player spent their time on,
+# written in the Chrome trace-event format so it opens in Perfetto
+# (ui.perfetto.dev) or chrome://tracing. Spans are appended to a list in
+# memory as plain tuples and only turned into JSON by write(), which the
+# recorder and player call once they have stopped. The GUI traces every
+# recording and playback to its own numbered file, written in the background.
+
+# Set AUTOWIZ_TRACE=path/to/trace.json to trace recordings and playback in the GUI
+TRACE_ENV_VAR = "AUTOWIZ_TRACE"
+
+# Spans kept in memory; later ones are counted and dropped
+TRACE_MAX_EVENTS = 2000000
+
+
+class Tracer:
+    """Buffers timestamped spans and instants from any thread.
+
+    Times are perf_counter() values; they are written relative to when the
+    tracer was created. list.append is atomic, so recording takes no lock.
+    """
+
+    def __init__(self, path=None, max_events=TRACE_MAX_EVENTS, per_session=False):
+        self.path = path  # Where write() saves the trace by default
+        self.max_events = max_events
+        self.per_session = per_session  # Each write() starts over, see write()
+        self.sessions = 0
+        self.origin = perf_counter()
+        self.dropped = 0
+        self._events = []
+        self._thread_names = {}
+
+    def _append(self, event):
+        if len(self._events) >= self.max_events:
+            self.dropped += 1
+            return
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        self._events.append(event + (tid,))
+
+    def span(self, name, category, start, end, args=None):
+        """Record something that ran from start to end."""
+        self._append(("X", name, category, start, end, args))
+
+    def instant(self, name, category, when, args=None):
+        """Record a point in time, e.g. when an event was due."""
+        self._append(("i", name, category, when, when, args))
+
+    def trace_events(self):
+        """Return the buffered data as a list of Chrome trace events."""
+        pid = os.getpid()
+        origin = self.origin
+        trace = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                 for tid, name in list(self._thread_names.items())]
+        for phase, name, category, start, end, args, tid in list(self._events):
+            event = {"name": name, "cat": category, "ph": phase, "pid": pid, "tid": tid,
+                     "ts": round((start - origin) * 1e6, 3)}
+            if phase == "X":
+                event["dur"] = round((end - start) * 1e6, 3)
+            else:
+                event["s"] = "t"  # Instant scoped to its thread
+            if args:
+                event["args"] = args
+            trace.append(event)
+        return trace
+
+    def take_session(self):
+        """Return a Tracer holding everything buffered so far and start this one over empty."""
+        session = Tracer(self.path, self.max_events)
+        session.origin = self.origin
+        session._thread_names = dict(self._thread_names)
+        session._events, self._events = self._events, []
+        session.dropped, self.dropped = self.dropped, 0
+        return session
+
+    def write(self, path=None):
+        """Write the trace to path, or the tracer's own path. Returns the path written, if any.
+
+        A per-session tracer instead hands what it has buffered to a
+        background thread that writes it to a numbered file next to the path
+        (trace-1.json, trace-2.json, ...), and starts over for the next session.
+        """
+        path = path or self.path
+        if not path:
+            return None
+        if self.per_session:
+            self.sessions += 1
+            root, extension = os.path.splitext(path)
+            path = f"{root}-{self.sessions}{extension}"
+            threading.Thread(target=self.take_session().write, args=(path,), name="autowiz-trace-writer").start()
+            return path
+        if self.dropped:
+            logger.warning("Trace buffer full, dropped %d spans", self.dropped)
+        try:
+            write_text(path, json.dumps({"traceEvents": self.trace_events(), "displayTimeUnit": "ms",
+                                         "otherData": {"dropped": self.dropped}}))
+        except OSError as e:
+            logger.error("Error writing trace to %s: %s", path, e)
+            return None
+        logger.info("Trace written to %s", path)
+        return path
+
+
+def traced(function, tracer, name, category):
+    """Wrap function so every call is recorded as a span."""
+    def wrapper(*args):
+        start = perf_counter()
+        try:
+            return function(*args)
+        finally:
+            tracer.span(name, category, start, perf_counter())
+    wrapper.__name__ = getattr(function, "__name__", "traced")
+    return wrapper
+
+
+def tracer_from_environment():
+    """Return a per-session Tracer writing next to AUTOWIZ_TRACE if it is set, else None."""
+    path = os.environ.get(TRACE_ENV_VAR)
+    if not path:
+        return None
+    logger.info("Tracing to %s, one numbered file per recording or playback", path)
+    return Tracer(path, per_session=True)
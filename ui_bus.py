@@ -0,0 +1,61 @@
+from collections import deque
+from log import logger
+
+# How often the Tk thread drains the bus
+UI_FRAME_RATE = 60
+
+
+class UIBus:
+    """Hands state changes and progress from worker threads to the UI thread.
+
+    Worker threads call post() and post_progress(), which only append to a
+    deque or store a value and never touch the UI. The UI thread calls
+    drain() once per frame to run the subscribed handlers. Progress is
+    coalesced: a frame only sees the latest value, however many were posted.
+    """
+
+    def __init__(self):
+        self._messages = deque()
+        self._handlers = {}
+        self._progress_handler = None
+        self._progress = None
+        self._delivered_progress = None
+
+    def subscribe(self, topic, handler):
+        self._handlers.setdefault(topic, []).append(handler)
+
+    def subscribe_progress(self, handler):
+        self._progress_handler = handler
+
+    def post(self, topic, *args):
+        """Queue a message for the UI thread. Safe to call from any thread."""
+        self._messages.append((topic, args))
+
+    def post_progress(self, value):
+        """Record the latest progress value. Safe to call from any thread."""
+        self._progress = value
+
+    def drain(self):
+        """Deliver pending progress and messages. Must run on the UI thread."""
+        # Progress is never cleared, only compared, so no update can be lost
+        progress = self._progress
+        if progress != self._delivered_progress and self._progress_handler:
+            self._delivered_progress = progress
+            self._call(self._progress_handler, (progress,))
+        messages = self._messages
+        # Only what was queued before this frame, so a busy worker cannot starve the UI
+        for _ in range(len(messages)):
+            topic, args = messages.popleft()
+            handlers = self._handlers.get(topic)
+            if not handlers:
+                logger.debug("No UI handler for %s", topic)
+                continue
+            for handler in handlers:
+                self._call(handler, args)
+
+    @staticmethod
+    def _call(handler, args):
+        try:
+            handler(*args)
+        except Exception as e:
+            logger.error("Error in UI handler %s: %s", getattr(handler, "__name__", handler), e)